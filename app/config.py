@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     auto_model: str
     auto_model_token: Optional[str]
     auto_model_provider: Optional[str]
+    # локальный роутер авто-модели: веса линейной модели (scripts/train_router.py) и порог уверенности
+    router_weights_path: Optional[str] = None
+    router_confidence_threshold: float = 0.7
 
     light_class_id: int = 1
     normal_class_id: int = 2
@@ -33,6 +36,49 @@ class Settings(BaseSettings):
     dalle_class_id: int = 4
     midjourney_class_id: int = 5
 
+    # пулы соединений и лимиты на апстрим LLM-провайдера
+    provider_max_connections: int = 100
+    provider_max_keepalive_connections: int = 20
+    provider_connect_timeout: float = 10
+    provider_read_timeout: float = 300
+    provider_default_concurrency: int = 32
+    provider_max_queue: int = 64
+    provider_queue_timeout: float = 15
+
+    # распознавание голосовых: быстрая модель для коротких/бесплатных, точная для длинных;
+    # у каждой свой пул процессов (workers * cpu_threads — по числу свободных ядер)
+    whisper_fast_model: str = "small"
+    whisper_fast_compute_type: str = "int8"
+    whisper_fast_workers: int = 1
+    whisper_accurate_model: str = "large-v3"
+    whisper_accurate_compute_type: str = "int8"
+    whisper_accurate_workers: int = 1
+    whisper_device: str = "cpu"
+    whisper_cpu_threads: int = 4
+    whisper_short_clip_seconds: int = 30
+    # длиннее — нарезка по паузам и параллельное распознавание кусков
+    whisper_chunk_seconds: int = 30
+    whisper_max_queue: int = 8
+
+    # конвертация документов в PDF: пул процессов и лимиты
+    converter_workers: int = 2
+    converter_max_queue: int = 16
+    converter_max_input_mb: int = 20
+    converter_max_pages: int = 200
+    # таблицы длиннее обрезаются с пометкой в конце
+    converter_max_rows: int = 5000
+    # txt/csv/docx/xlsx уходят модели текстом (без PDF) в пределах этого бюджета
+    converter_text_max_tokens: int = 6000
+    converter_timeout: float = 60
+
+    # фото: уменьшаем до бюджета пикселей; до inline_max_bytes — base64 прямо провайдеру
+    photo_max_pixels: int = 1280 * 960
+    photo_inline_max_bytes: int = 1024 * 1024
+
+    # очередь апдейтов за /webhook
+    update_workers: int = 16
+    update_queue_size: int = 1000
+
     yookassa_shop_id: str
     yookassa_secret_key: str
 
@@ -0,0 +1,52 @@
+"""
+DDL для уже развёрнутых баз.
+
+Base.metadata.create_all создаёт только отсутствующие таблицы: новые колонки и индексы
+существующих таблиц он не добавляет. Для них в app/db/sql лежат идемпотентные скрипты
+(IF NOT EXISTS), которые выполняются по порядку имён при старте бота после create_all.
+Вручную, до выкладки:
+
+    python -m app.db.migrate
+"""
+import asyncio
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SQL_DIR = Path(__file__).parent / "sql"
+
+
+def load_statements(sql_dir: Path = SQL_DIR) -> list[tuple[str, str]]:
+    """(имя файла, оператор) по порядку; комментарии `--` убираются, операторы делятся по `;`"""
+    statements = []
+    for path in sorted(sql_dir.glob("*.sql")):
+        lines = [line for line in path.read_text(encoding="utf-8").splitlines()
+                 if not line.lstrip().startswith("--")]
+        for statement in "\n".join(lines).split(";"):
+            if statement.strip():
+                statements.append((path.name, statement.strip()))
+    return statements
+
+
+async def apply_migrations(engine: AsyncEngine):
+    # AUTOCOMMIT: CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for name, statement in load_statements():
+            await conn.exec_driver_sql(statement)
+            print(f"migration {name}: applied")
+
+
+async def main():
+    from app.config import Settings
+    from app.db.base import create_engine_and_session
+
+    engine, _ = create_engine_and_session(Settings())
+    try:
+        await apply_migrations(engine)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -24,6 +24,10 @@ class AiModels(Base):
     api_provider: Mapped[int] = mapped_column(String(255), nullable=False)
     api_link: Mapped[str] = mapped_column(String(255), nullable=False)
     generation_cost: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    # бюджет входных токенов на историю + запрос, NULL — значение по умолчанию из ContextBuilder
+    context_token_budget: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # максимум одновременных запросов к апстриму модели, NULL — Settings.provider_default_concurrency
+    max_concurrency: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
     selected_by_users = relationship("UserSelectedModels", back_populates="model")
     requests = relationship("AiRequest", back_populates="model")
@@ -1,5 +1,8 @@
+import uuid
+
 import sqlalchemy as sa
-from sqlalchemy import String, ForeignKey, func, DateTime
+from sqlalchemy import String, ForeignKey, func, DateTime, Text
+from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.db.base import Base
 from datetime import datetime
@@ -13,6 +16,9 @@ class Dialog(Base):
     name = mapped_column(String(255), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=func.now())
     is_active: Mapped[bool] = mapped_column(sa.Boolean, nullable=False, default=True)
+    # скользящее краткое содержание старой части диалога и public_id последнего свёрнутого сообщения
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    summary_until: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
 
     user = relationship("User", back_populates="dialogs")
     message = relationship("AiContext", back_populates="dialog")
\ No newline at end of file
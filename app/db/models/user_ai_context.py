@@ -17,6 +17,13 @@ class MessageType(enum.Enum):
 
 class AiContext(Base):
     __tablename__ = "ai_context"
+    __table_args__ = (
+        # хвост диалога и постраничная подгрузка: uuid7 в public_id упорядочен по времени
+        # (created_at = now() одинаков у всех сообщений одного хода, для порядка не годится)
+        sa.Index("ix_ai_context_dialog_public_id",
+                 "dialog_id", "public_id",
+                 postgresql_where=sa.text("is_deleted = false")),
+    )
     id: Mapped[int] = mapped_column(sa.Integer, primary_key=True, autoincrement=True)
 
     public_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True),
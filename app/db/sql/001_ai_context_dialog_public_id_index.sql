@@ -0,0 +1,7 @@
+-- [user-005] хвост диалога по keyset-пагинации (ChatHistoryRepository.load_page)
+-- CONCURRENTLY: не блокирует запись в ai_context на время построения.
+-- Если построение прервалось, останется невалидный индекс, и IF NOT EXISTS его не пересоздаст:
+-- DROP INDEX CONCURRENTLY ix_ai_context_dialog_public_id; и перезапустить.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ai_context_dialog_public_id
+    ON ai_context (dialog_id, public_id)
+    WHERE is_deleted = false;
@@ -0,0 +1,2 @@
+-- [user-006] токен-бюджет контекста модели (ContextBuilder); NULL — DEFAULT_CONTEXT_TOKEN_BUDGET
+ALTER TABLE ai_models ADD COLUMN IF NOT EXISTS context_token_budget INTEGER;
@@ -0,0 +1,3 @@
+-- [user-007] скользящее краткое содержание диалога (DialogSummaryService)
+ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS summary TEXT;
+ALTER TABLE dialogs ADD COLUMN IF NOT EXISTS summary_until UUID;
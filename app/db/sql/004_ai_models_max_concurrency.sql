@@ -0,0 +1,2 @@
+-- [user-010] лимит одновременных запросов к апстриму модели (ProviderRegistry); NULL — default_concurrency
+ALTER TABLE ai_models ADD COLUMN IF NOT EXISTS max_concurrency INTEGER;
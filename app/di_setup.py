@@ -2,12 +2,12 @@ from src.adapters.payments.yookassa_api import YookassaAPI
 from app.config import Settings
 from app.db.base import create_engine_and_session
 from src.adapters.cache.redis_cache import RedisCache
-from faster_whisper import WhisperModel
 
 from config.subs import SubscriptionConfig
 from src.services.ai.prompt_service import PromptService
 from src.services.permission.permission_service import PermissionService
-from src.services.whisper_service import WhisperService
+from src.services.converter import DocumentConverter
+from src.services.whisper_service import WhisperService, WhisperModelSpec, FAST_MODEL, ACCURATE_MODEL
 from src.use_cases.usecases import UseCases
 from src.services.ai.model_selection_service import ModelSelectionService
 from src.adapters.ai_providers.registry import ProviderRegistry
@@ -22,26 +22,54 @@ def setup_di(di, config: Settings):
     di.register("session_factory", lambda: session_factory)
     di.register("engine", lambda: engine)
 
-    #whisper_model = WhisperModel("large", device="cuda", compute_type="float16")
-    whisper_model = WhisperModel("large", device="cpu")
-    whisper = WhisperService(model=whisper_model)
+    # на GPU: whisper_device="cuda", *_compute_type="float16"
+    whisper = WhisperService(models={
+                                 FAST_MODEL: WhisperModelSpec(model_name=config.whisper_fast_model,
+                                                              compute_type=config.whisper_fast_compute_type,
+                                                              workers=config.whisper_fast_workers),
+                                 ACCURATE_MODEL: WhisperModelSpec(model_name=config.whisper_accurate_model,
+                                                                  compute_type=config.whisper_accurate_compute_type,
+                                                                  workers=config.whisper_accurate_workers),
+                             },
+                             device=config.whisper_device,
+                             cpu_threads=config.whisper_cpu_threads,
+                             short_clip_seconds=config.whisper_short_clip_seconds,
+                             chunk_seconds=config.whisper_chunk_seconds,
+                             max_queue=config.whisper_max_queue,
+                             redis=redis)
 
-    di.register("whisper_service", lambda: WhisperService(whisper_model))
+    di.register("whisper_service", lambda: whisper)
+
+    converter = DocumentConverter(workers=config.converter_workers,
+                                  max_queue=config.converter_max_queue,
+                                  max_input_bytes=config.converter_max_input_mb * 1024 * 1024,
+                                  max_pages=config.converter_max_pages,
+                                  max_rows=config.converter_max_rows,
+                                  text_max_tokens=config.converter_text_max_tokens,
+                                  timeout=config.converter_timeout)
+    di.register("converter", lambda: converter)
 
     permission_service = PermissionService(redis=redis,
                                            subs_config=SubscriptionConfig())
 
+    tokens = {'openai': config.openai_key}
+    ai_providers = ProviderRegistry(tokens=tokens,
+                                    max_connections=config.provider_max_connections,
+                                    max_keepalive_connections=config.provider_max_keepalive_connections,
+                                    connect_timeout=config.provider_connect_timeout,
+                                    read_timeout=config.provider_read_timeout,
+                                    default_concurrency=config.provider_default_concurrency,
+                                    max_queue=config.provider_max_queue,
+                                    queue_timeout=config.provider_queue_timeout)
+    di.register("ai_providers", lambda: ai_providers)
+
     model_selection_service = ModelSelectionService(config=config,
-                                                    ai_providers=ProviderRegistry,
+                                                    ai_providers=ai_providers,
                                                     redis=redis,
                                                     permission_service=permission_service)
 
     di.register("model_selection_service", lambda: model_selection_service)
 
-    tokens = {'openai': config.openai_key}
-    ai_providers = ProviderRegistry(tokens=tokens)
-    di.register("ai_providers", lambda: ProviderRegistry(tokens=tokens))
-
     prompt_service = PromptService()
 
     yookassa = YookassaAPI(shop_id=config.yookassa_shop_id,
@@ -54,6 +82,8 @@ def setup_di(di, config: Settings):
                         model_selection_service=model_selection_service,
                         permission_service=permission_service,
                         whisper=whisper,
-                        yookassa=yookassa)
+                        converter=converter,
+                        yookassa=yookassa,
+                        session_factory=session_factory)
 
     di.register("usecases", lambda: usecases)
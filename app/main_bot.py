@@ -5,13 +5,17 @@ from app.config import Settings
 from app.di_setup import setup_di
 from app.di import di
 from app.db.base import Base
+from app.db.migrate import apply_migrations
 from bot.bot_loader import register_handlers
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.types import BotCommand, BotCommandScopeAllPrivateChats
 from fastapi import Depends, Request
 from typing import AsyncGenerator
 from seed_data import seed_data
+from src.adapters.db.model_repository import ModelRepository
+from app.workers.update_queue import UpdateQueue, RedisUpdateDeduplicator
+import asyncio
 
 def get_bot(request: Request) -> Bot:
     return request.app.bot
@@ -31,6 +35,8 @@ async def get_session(di = Depends(get_di)) -> AsyncGenerator[AsyncSession, None
 async def init_models(engine):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    # новые колонки и индексы существующих таблиц create_all не добавляет
+    await apply_migrations(engine)
 
 
 async def set_private_commands_i18n(bot: Bot):
@@ -96,26 +102,59 @@ def create_app() -> FastAPI:
     dp["whisper_service"] = di.get("whisper_service")
     dp["model_selection_service"] = di.get("model_selection_service")
 
+    async def feed_update(update: dict):
+        await dp.feed_update(bot, Update.model_validate(update))
+
+    update_queue = UpdateQueue(handler=feed_update,
+                               workers=config.update_workers,
+                               max_size=config.update_queue_size,
+                               deduplicator=RedisUpdateDeduplicator(di.get("redis")))
+
     engine = di.get("engine")
     app = FastAPI()
     app.state.di = di
+    app.state.update_queue = update_queue
 
     @app.on_event("startup")
     async def on_startup():
         await init_models(engine)
         await set_private_commands_i18n(bot)
+        app.state.models_listener = asyncio.create_task(ModelRepository.listen_invalidations(di.get("redis")))
+        await update_queue.start()
+        di.get("whisper_service").start()
+        # словари токенайзера — в фоне: до загрузки ContextBuilder считает по символам
+        app.state.tokenizer_warm_up = asyncio.create_task(di.get("usecases").context_builder.warm_up())
         #async with session_factory() as session:
-         #   await seed_data(session=session)
-        
+         #   await seed_data(session=session, redis=di.get("redis"))
+
+    @app.on_event("shutdown")
+    async def on_shutdown():
+        await update_queue.stop()
+        app.state.models_listener.cancel()
+        await di.get("usecases").turn_scheduler.wait()
+        await di.get("usecases").chat_history.wait_background()
+        await di.get("usecases").s3.close()
+        di.get("whisper_service").shutdown()
+        di.get("converter").shutdown()
+
     @app.post("/webhook")
     async def telegram_webhook(update: dict):
-        #todo: remove try
-        try:
-            await dp.feed_update(bot, Update.model_validate(update))
-        except Exception as e:
-            print(e)
-            return 200
-
+        # обработка идёт в воркерах очереди — Telegram получает ответ сразу
+        if not await update_queue.put(update):
+            # очередь переполнена: Telegram повторит доставку позже
+            return Response(status_code=503)
+        return {"ok": True}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {
+            "updates": update_queue.metrics(),
+            "turns": {"started": di.get("usecases").turn_scheduler.turns,
+                      "coalesced": di.get("usecases").turn_scheduler.coalesced},
+            "providers": di.get("ai_providers").metrics(),
+            "whisper": di.get("whisper_service").metrics(),
+            "converter": di.get("converter").executor.metrics(),
+        }
 
     @app.post("/payconfirm")
     async def pay_confirm(request: Request,
@@ -0,0 +1,211 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from src.adapters.cache.local_cache import LocalTTLCache
+from src.adapters.cache.redis_cache import RedisCache
+
+UPDATE_DEDUP_TTL = 60 * 60
+
+
+class UpdateDeduplicator(ABC):
+    """Отсекает повторную доставку одного update_id (ретраи вебхука Telegram)"""
+
+    @abstractmethod
+    async def claim(self, update_id: int) -> bool:
+        """True — update новый и закреплён за нами, False — уже был"""
+        ...
+
+    @abstractmethod
+    async def release(self, update_id: int):
+        """Снять отметку, если update не удалось обработать: повторная доставка его не потеряет"""
+        ...
+
+
+class LocalUpdateDeduplicator(UpdateDeduplicator):
+    """В памяти процесса — для одного инстанса и тестов"""
+
+    def __init__(self, ttl: int = UPDATE_DEDUP_TTL, maxsize: int = 100_000):
+        self._seen = LocalTTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def claim(self, update_id: int) -> bool:
+        if self._seen.get(update_id):
+            return False
+        self._seen.set(update_id, True)
+        return True
+
+    async def release(self, update_id: int):
+        self._seen.delete(update_id)
+
+
+class RedisUpdateDeduplicator(UpdateDeduplicator):
+    """SET NX в Redis — общий для всех инстансов за балансировщиком"""
+
+    def __init__(self, redis: RedisCache, ttl: int = UPDATE_DEDUP_TTL):
+        self.redis = redis
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(update_id: int) -> str:
+        return f"tg:update:{update_id}"
+
+    async def claim(self, update_id: int) -> bool:
+        return await self.redis.set_if_not_exists(self._key(update_id), "1", ttl=self.ttl)
+
+    async def release(self, update_id: int):
+        await self.redis.delete(self._key(update_id))
+
+
+@dataclass
+class _QueuedUpdate:
+    update: dict
+    user_key: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def get_update_user_key(update: dict) -> int:
+    """Ключ упорядочивания: id отправителя (или чата), иначе сам update_id"""
+    for key, value in update.items():
+        if key == "update_id" or not isinstance(value, dict):
+            continue
+        sender = value.get("from") or value.get("user") or value.get("chat")
+        if isinstance(sender, dict) and "id" in sender:
+            return sender["id"]
+        message = value.get("message")
+        if isinstance(message, dict) and isinstance(message.get("chat"), dict):
+            return message["chat"]["id"]
+    return update.get("update_id", 0)
+
+
+class UpdateQueue:
+    """
+    Очередь апдейтов за вебхуком: вебхук отвечает сразу, обработку делают воркеры.
+
+    - ограниченный размер (принятые, но не начатые апдейты) — сверх него put() возвращает False;
+    - апдейты одного пользователя выполняются строго по очереди, разные пользователи — параллельно
+      (апдейты занятого пользователя откладываются в его личную очередь, воркер не блокируется);
+    - дедупликация по update_id;
+    - метрики: глубина очереди, время ожидания, отказы, дубликаты.
+    """
+
+    def __init__(self,
+                 handler: Callable[[dict], Awaitable],
+                 workers: int = 16,
+                 max_size: int = 1000,
+                 deduplicator: Optional[UpdateDeduplicator] = None):
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.deduplicator = deduplicator or LocalUpdateDeduplicator()
+
+        self._queue: asyncio.Queue[_QueuedUpdate] = asyncio.Queue()
+        # пользователь -> отложенные апдейты, пока его предыдущий апдейт в работе
+        self._active: dict[int, deque[_QueuedUpdate]] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._size = 0
+
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._size
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 30):
+        """Дать воркерам дообработать принятое, затем остановить"""
+        try:
+            await asyncio.wait_for(self._drained(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"update queue stopped with {self._size} pending updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _drained(self):
+        while self._size or self._active:
+            await asyncio.sleep(0.05)
+
+    async def put(self, update: dict) -> bool:
+        """
+        False — очередь переполнена (вебхук должен ответить ошибкой, Telegram повторит позже).
+        Дубликат считается принятым: повторно его обрабатывать не нужно.
+        """
+        update_id = update.get("update_id")
+        if self._size >= self.max_size:
+            self.rejected += 1
+            return False
+
+        if update_id is not None and not await self.deduplicator.claim(update_id):
+            self.duplicates += 1
+            return True
+
+        self._size += 1
+        self._queue.put_nowait(_QueuedUpdate(update=update, user_key=get_update_user_key(update)))
+        return True
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            pending = self._active.get(item.user_key)
+            if pending is not None:
+                # пользователь уже обрабатывается другим воркером — встаём за ним
+                pending.append(item)
+                continue
+
+            user_key = item.user_key
+            pending = self._active[user_key] = deque()
+            try:
+                while True:
+                    await self._process(item)
+                    if not pending:
+                        break
+                    item = pending.popleft()
+            finally:
+                self._active.pop(user_key, None)
+
+    async def _process(self, item: _QueuedUpdate):
+        waited = time.monotonic() - item.enqueued_at
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        try:
+            await self.handler(item.update)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            update_id = item.update.get("update_id")
+            print(f"update {update_id} failed: {e!r}")
+            if update_id is not None:
+                await self._release(update_id)
+        finally:
+            self._size -= 1
+            self.processed += 1
+
+    async def _release(self, update_id: int):
+        try:
+            await self.deduplicator.release(update_id)
+        except Exception as e:
+            print(f"update {update_id} release failed: {e!r}")
+
+    def metrics(self) -> dict:
+        return {
+            "depth": self._size,
+            "max_size": self.max_size,
+            "active_users": len(self._active),
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "duplicates": self.duplicates,
+            "avg_wait": round(self.total_wait / self.processed, 4) if self.processed else 0.0,
+            "max_wait": round(self.max_wait, 4),
+        }
@@ -0,0 +1,106 @@
+"""
+Санитайзер Telegram HTML на больших ответах: как было против инкрементального.
+
+    python -m benchmarks.bench_html_sanitizer [--sizes 4000 16000 32000] [--delta 20]
+
+one-shot — один вызов на весь ответ: прежний санитайзер (список + регулярка по склеенному
+выводу) против текущего sanitize_to_telegram_html (нормализация переносов на лету);
+stream    — ответ приходит дельтами по --delta символов, после каждой нужен актуальный HTML:
+прежний путь санитизирует весь накопленный текст заново (O(n²)), инкрементальный —
+feed(delta) + snapshot().
+"""
+import argparse
+import random
+import re
+import time
+
+from src.services.html_sanitizer import TelegramHTMLSanitizer, sanitize_to_telegram_html
+
+
+class LegacyTelegramHTMLSanitizer(TelegramHTMLSanitizer):
+    """Прежний вывод: всё в список, пустые строки схлопываются регуляркой в get_sanitized"""
+
+    def _push(self, s):
+        self.out.append(s)
+
+    def get_sanitized(self):
+        while self.stack:
+            self._push(f"</{self.stack.pop()}>")
+        text = "".join(self.out)
+        return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def legacy_sanitize(s: str) -> str:
+    p = LegacyTelegramHTMLSanitizer()
+    p.feed(s)
+    p.close()
+    return p.get_sanitized()
+
+
+BLOCKS = [
+    "<h2>Заголовок раздела</h2>\n",
+    "<p>Обычный абзац с <b>жирным</b>, <i>курсивом</i> и <a href=\"https://example.com/doc\">ссылкой</a>.</p>\n",
+    "<ul><li>пункт списка</li><li>ещё пункт с <code>inline_code()</code></li></ul>\n",
+    "<pre><code class=\"language-python\">def f(x):\n    return x &lt; 10 and x &gt; 0\n</code></pre>\n\n\n",
+    "**markdown без конвертации** и символы < > & в тексте 😀\n\n",
+    "<blockquote>цитата <span class=\"tg-spoiler\">спойлер</span></blockquote>\n",
+]
+
+
+def make_answer(size: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    parts, total = [], 0
+    while total < size:
+        block = rnd.choice(BLOCKS)
+        parts.append(block)
+        total += len(block)
+    return "".join(parts)[:size]
+
+
+def legacy_stream(text: str, delta: int) -> str:
+    rendered = ""
+    for end in range(delta, len(text) + delta, delta):
+        raw = re.sub(r"<[^<>]*$", "", text[:end])
+        rendered = legacy_sanitize(raw)
+    return rendered
+
+
+def incremental_stream(text: str, delta: int) -> str:
+    sanitizer = TelegramHTMLSanitizer()
+    rendered = ""
+    for start in range(0, len(text), delta):
+        sanitizer.feed(text[start:start + delta])
+        rendered = sanitizer.snapshot().text
+    return rendered
+
+
+def timed(fn, *args, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(*args)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4000, 16000, 32000])
+    parser.add_argument("--delta", type=int, default=20, help="размер дельты стрима, символов")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        text = make_answer(size)
+        assert sanitize_to_telegram_html(text) == legacy_sanitize(text)
+        print(f"size={size} deltas={-(-size // args.delta)}")
+
+        legacy = timed(legacy_sanitize, text, repeat=20)
+        current = timed(sanitize_to_telegram_html, text, repeat=20)
+        print(f"  one-shot  legacy={legacy * 1000:.2f}ms current={current * 1000:.2f}ms")
+
+        legacy = timed(legacy_stream, text, args.delta)
+        current = timed(incremental_stream, text, args.delta)
+        print(f"  stream    legacy={legacy * 1000:.0f}ms incremental={current * 1000:.0f}ms"
+              f" x{legacy / current:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Бенчмарк локального роутера авто-модели против решений LLM-классификатора.
+
+    python -m benchmarks.bench_router --jsonl routes.jsonl [--weights router_weights.json] [--threshold 0.7]
+
+routes.jsonl — строки {"text": "...", "model_id": N}, где model_id выбран LLM-классификатором
+(выгрузка из ai_requests, см. scripts/train_router.py). Печатает:
+  - coverage — доля запросов, решённых локально (без LLM);
+  - agreement — совпадение с LLM среди решённых локально;
+  - p50/p99 задержку маршрутизации.
+"""
+import argparse
+import statistics
+import time
+
+from scripts.train_router import load_jsonl
+from src.services.ai.model_router import build_router
+from src.services.ai.model_selection_service import AVAILABLE_MODELS
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jsonl", required=True)
+    parser.add_argument("--weights")
+    parser.add_argument("--threshold", type=float, default=0.7)
+    args = parser.parse_args()
+
+    samples = load_jsonl(args.jsonl)
+    router = build_router(weights_path=args.weights, threshold=args.threshold)
+    allowed = list(AVAILABLE_MODELS)
+
+    latencies = []
+    decided = agreed = 0
+    by_source: dict[str, int] = {}
+
+    for text, llm_model_id in samples:
+        start = time.perf_counter()
+        decision = router.route(text, allowed)
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+        if decision.model_id is None:
+            continue
+        decided += 1
+        by_source[decision.source] = by_source.get(decision.source, 0) + 1
+        agreed += decision.model_id == llm_model_id
+
+    total = len(samples)
+    print(f"samples:    {total}")
+    print(f"coverage:   {decided / total:.1%} ({decided}) {by_source}")
+    print(f"agreement:  {agreed / decided:.1%}" if decided else "agreement:  n/a")
+    print(f"latency us: p50={percentile(latencies, 50):.1f} p99={percentile(latencies, 99):.1f} "
+          f"mean={statistics.fmean(latencies):.1f}")
+
+
+if __name__ == "__main__":
+    main()
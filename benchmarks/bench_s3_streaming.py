@@ -0,0 +1,123 @@
+"""
+Пик памяти при загрузке/скачивании больших объектов S3: целиком в памяти (как было) против потоков.
+
+    python -m benchmarks.bench_s3_streaming [--sizes 32 128] [--part-size 8]
+
+Поднимает локальный S3 (moto_server в отдельном процессе, pip install "moto[server]"),
+чтобы хранилище moto не попадало в tracemalloc-пик процесса бенчмарка.
+legacy    — файл читается в bytes и уходит одним put_object; скачивание — body.read() целиком;
+streaming — S3Client.upload_stream (multipart частями part_size) и S3Client.get_file (iter_file).
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+
+from src.adapters.s3.s3_client import S3Client, DOWNLOAD_CHUNK_SIZE
+
+BUCKET = "bench"
+PORT = 5055
+READ_CHUNK = 1024 * 1024
+
+
+def wait_for_server(timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{PORT}/moto-api/", timeout=1)
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def make_file(path: str, size_mib: int):
+    block = os.urandom(READ_CHUNK)
+    with open(path, "wb") as f:
+        for _ in range(size_mib):
+            f.write(block)
+
+
+async def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(READ_CHUNK):
+            yield chunk
+
+
+async def legacy_upload(s3: S3Client, path: str, key: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    async with s3.get_client() as client:
+        await client.put_object(Bucket=BUCKET, Key=key, Body=data)
+
+
+async def legacy_download(s3: S3Client, key: str, destination: str):
+    async with s3.get_client() as client:
+        response = await client.get_object(Bucket=BUCKET, Key=key)
+        data = await response["Body"].read()
+    with open(destination, "wb") as f:
+        f.write(data)
+
+
+async def measure(coro) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    await coro
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+async def run(sizes: list[int], part_size: int):
+    s3 = S3Client(access_key="bench", secret_key="bench", endpoint_url=f"http://127.0.0.1:{PORT}",
+                  region_name="us-east-1", bucket_name=BUCKET, domain_name="http://bench")
+    async with s3.get_client() as client:
+        await client.create_bucket(Bucket=BUCKET)
+
+    with tempfile.TemporaryDirectory() as td:
+        for size in sizes:
+            path = os.path.join(td, f"{size}.bin")
+            make_file(path, size)
+            print(f"size={size}MiB part={part_size / 2 ** 20:.0f}MiB chunk={DOWNLOAD_CHUNK_SIZE / 2 ** 20:.0f}MiB")
+
+            for name, upload, download in (
+                    ("legacy",
+                     lambda key: legacy_upload(s3, path, key),
+                     lambda key, dst: legacy_download(s3, key, dst)),
+                    ("streaming",
+                     lambda key: s3.upload_stream(read_chunks(path), key, part_size=part_size),
+                     lambda key, dst: s3.get_file(key, dst)),
+            ):
+                key = f"{name}/{size}.bin"
+                up_time, up_peak = await measure(upload(key))
+                down_time, down_peak = await measure(download(key, os.path.join(td, f"{name}.out")))
+                print(f"  {name:10} upload time={up_time:.1f}s peak={up_peak / 2 ** 20:.1f}MiB"
+                      f"  download time={down_time:.1f}s peak={down_peak / 2 ** 20:.1f}MiB")
+    await s3.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 128], help="размеры объектов, МиБ")
+    parser.add_argument("--part-size", type=int, default=8, help="размер части multipart, МиБ")
+    args = parser.parse_args()
+
+    server = subprocess.Popen([sys.executable, "-m", "moto.server", "-p", str(PORT)],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_server()
+        asyncio.run(run(args.sizes, args.part_size * 2 ** 20))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
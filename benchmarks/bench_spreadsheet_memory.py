@@ -0,0 +1,89 @@
+"""
+Пик памяти при вёрстке больших CSV в PDF: весь DataFrame (как было) против потоковой вёрстки.
+
+    python -m benchmarks.bench_spreadsheet_memory [--rows 20000 50000] [--cols 8] [--max-rows N]
+
+Генерирует CSV нужного размера и меряет tracemalloc-пик и время SimpleFileToPDF.
+legacy    — pd.read_csv целиком + df.astype(str).values.tolist(), как было до потоковой вёрстки;
+streaming — текущий SimpleFileToPDF (чанки pandas, одна таблица reportlab в памяти).
+С --max-rows пик streaming не растёт с размером файла; без бюджета растёт только
+на содержимое страниц reportlab, которое держится до save() (его ограничивает max_pages).
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from reportlab.lib.pagesizes import landscape
+from reportlab.pdfgen import canvas
+
+from src.services.converter import SimpleFileToPDF, ROWS_PER_TABLE
+
+
+class LegacySimpleFileToPDF(SimpleFileToPDF):
+    """Прежний путь для CSV: весь файл в DataFrame и его строковая копия"""
+
+    def _csv_to_pdf(self, path: str) -> bytes:
+        df = pd.read_csv(path)
+        data = [[str(col) for col in df.columns]] + df.astype(str).values.tolist()
+
+        buf = io.BytesIO()
+        pagesize = landscape(self.page_size)
+        c = canvas.Canvas(buf, pagesize=pagesize)
+        width, height = pagesize
+        y = height - self.margin
+        for start in range(0, len(data), ROWS_PER_TABLE):
+            table = self._make_table(data[start:start + ROWS_PER_TABLE], max_width=width - 2 * self.margin)
+            w, h = table.wrapOn(c, width, height)
+            if y - h < self.margin:
+                c.showPage()
+                y = height - self.margin
+            table.drawOn(c, self.margin, y - h)
+            y -= h + 10
+        c.save()
+        return buf.getvalue()
+
+
+def make_csv(path: str, rows: int, cols: int):
+    with open(path, "w") as f:
+        f.write(",".join(f"col{i}" for i in range(cols)) + "\n")
+        for r in range(rows):
+            f.write(",".join(f"value-{r}-{i}" for i in range(cols)) + "\n")
+
+
+def measure(converter: SimpleFileToPDF, data: bytes) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    pdf = converter.convert(data, filename="bench.csv")
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(pdf)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20000, 50000])
+    parser.add_argument("--cols", type=int, default=8)
+    parser.add_argument("--max-rows", type=int, default=None, help="бюджет строк для streaming")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as td:
+        for rows in args.rows:
+            path = os.path.join(td, f"{rows}.csv")
+            make_csv(path, rows, args.cols)
+            with open(path, "rb") as f:
+                data = f.read()
+            print(f"rows={rows} csv={len(data) / 2 ** 20:.1f}MiB")
+
+            for name, converter in (("legacy", LegacySimpleFileToPDF()),
+                                    ("streaming", SimpleFileToPDF(max_rows=args.max_rows))):
+                elapsed, peak, size = measure(converter, data)
+                print(f"  {name:10} time={elapsed:.1f}s peak={peak / 2 ** 20:.1f}MiB pdf={size / 2 ** 20:.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Бенчмарк декодирования голосового: старый путь против декодирования в памяти.
+
+    python -m benchmarks.bench_voice_decode --ogg voice.ogg [--runs 20]
+
+legacy    — pydub (ffmpeg) -> WAV -> временный файл -> decode_audio(путь), как было в WhisperService;
+in-memory — decode_audio(BytesIO(ogg)) сразу в 16 кГц float32, без временных файлов.
+Распознавание в обоих случаях одинаковое, поэтому меряется только подготовка аудио:
+время (p50/mean) и пик памяти Python-аллокаций (tracemalloc).
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+from faster_whisper.audio import decode_audio
+
+from src.services.whisper_service import SAMPLE_RATE, decode_voice
+
+
+def decode_legacy(ogg: bytes):
+    from pydub import AudioSegment
+
+    audio = AudioSegment.from_file(BytesIO(ogg), format="ogg")
+    wav_bytes = BytesIO()
+    audio.export(wav_bytes, format="wav")
+    wav_bytes.seek(0)
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
+        tmp.write(wav_bytes.read())
+        tmp_path = tmp.name
+    try:
+        return decode_audio(tmp_path, sampling_rate=SAMPLE_RATE)
+    finally:
+        os.remove(tmp_path)
+
+
+def measure(fn, ogg: bytes, runs: int) -> tuple[list[float], int]:
+    fn(ogg)  # прогрев
+    timings = []
+    tracemalloc.start()
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(ogg)
+        timings.append((time.perf_counter() - start) * 1000)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ogg", required=True)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.ogg, "rb") as f:
+        ogg = f.read()
+
+    duration = len(decode_voice(ogg)) / SAMPLE_RATE
+    print(f"file: {args.ogg} ({len(ogg) / 1024:.0f} KiB, {duration:.1f}s audio)")
+
+    for name, fn in (("legacy", decode_legacy), ("in-memory", decode_voice)):
+        timings, peak = measure(fn, ogg, args.runs)
+        print(f"{name:10} p50={statistics.median(timings):.1f}ms mean={statistics.fmean(timings):.1f}ms "
+              f"peak={peak / 2 ** 20:.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
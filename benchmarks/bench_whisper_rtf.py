@@ -0,0 +1,62 @@
+"""
+Real-time factor моделей Whisper на примерах голосовых.
+
+    python -m benchmarks.bench_whisper_rtf --audio samples/ --models small:int8 large-v3:int8 [--cpu-threads 4]
+
+--audio — файл или каталог с .ogg; --models — model_name:compute_type.
+RTF = время распознавания / длительность аудио (меньше 1 — быстрее реального времени).
+Печатает время загрузки модели, суммарный и худший RTF по каждой модели.
+"""
+import argparse
+import time
+from pathlib import Path
+
+from faster_whisper import WhisperModel
+
+from src.services.whisper_service import SAMPLE_RATE, decode_voice
+
+
+def load_samples(path: str) -> list[tuple[str, object]]:
+    root = Path(path)
+    files = sorted(root.glob("*.ogg")) if root.is_dir() else [root]
+    return [(file.name, decode_voice(file.read_bytes())) for file in files]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True)
+    parser.add_argument("--models", nargs="+", default=["small:int8", "large-v3:int8"])
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--cpu-threads", type=int, default=4)
+    parser.add_argument("--language", default="ru")
+    args = parser.parse_args()
+
+    samples = load_samples(args.audio)
+    total_audio = sum(len(audio) for _, audio in samples) / SAMPLE_RATE
+    print(f"samples: {len(samples)}, audio: {total_audio:.1f}s")
+
+    for spec in args.models:
+        model_name, _, compute_type = spec.partition(":")
+        start = time.perf_counter()
+        model = WhisperModel(model_name, device=args.device,
+                             compute_type=compute_type or "int8", cpu_threads=args.cpu_threads)
+        load_time = time.perf_counter() - start
+
+        total_time = 0.0
+        worst_rtf = 0.0
+        for name, audio in samples:
+            start = time.perf_counter()
+            segments, _ = model.transcribe(audio=audio, language=args.language, beam_size=1, vad_filter=True)
+            text = "".join(segment.text for segment in segments).strip()
+            elapsed = time.perf_counter() - start
+
+            duration = len(audio) / SAMPLE_RATE
+            total_time += elapsed
+            worst_rtf = max(worst_rtf, elapsed / duration)
+            print(f"  {spec:18} {name:24} {duration:6.1f}s rtf={elapsed / duration:.3f} {text[:60]!r}")
+
+        print(f"{spec:20} load={load_time:.1f}s rtf={total_time / total_audio:.3f} worst={worst_rtf:.3f}")
+
+
+if __name__ == "__main__":
+    main()
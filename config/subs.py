@@ -4,6 +4,8 @@ from dataclasses import dataclass
 class SubscriptionTierConfig:
     can_send_voice: bool
     voice_limit_seconds: int
+    voice_transcribe_timeout: int
+    voice_model: str
     can_send_images: bool
     can_send_files: bool
     can_use_roles: bool
@@ -18,6 +20,8 @@ class SubscriptionConfig:
         0: SubscriptionTierConfig(
             can_send_voice=True,
             voice_limit_seconds=15,
+            voice_transcribe_timeout=30,
+            voice_model="fast",
             can_send_images=True,
             can_use_roles=False,
             can_send_files=False,
@@ -29,6 +33,8 @@ class SubscriptionConfig:
         1: SubscriptionTierConfig(
             can_send_voice=True,
             voice_limit_seconds=300,
+            voice_transcribe_timeout=180,
+            voice_model="accurate",
             can_send_images=True,
             can_use_roles=True,
             can_send_files=True,
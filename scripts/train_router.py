@@ -0,0 +1,109 @@
+"""
+Офлайн-обучение HashedLinearRouter (локальный выбор авто-модели).
+
+    python -m scripts.train_router --out router_weights.json
+    python -m scripts.train_router --jsonl routes.jsonl --out router_weights.json
+
+Источник по умолчанию — таблица ai_requests: текст запроса из request_payload->>'text',
+метка — model_id. JSONL — строки вида {"text": "...", "model_id": 3}.
+Полученный файл указывается в Settings.router_weights_path.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+
+import sqlalchemy as sa
+
+from src.services.ai.model_router import HASH_DIM, extract_features
+
+
+def load_jsonl(path: str) -> list[tuple[str, int]]:
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                samples.append((row["text"], int(row["model_id"])))
+    return samples
+
+
+async def load_from_db(limit: int) -> list[tuple[str, int]]:
+    from app.config import Settings
+    from app.db.base import create_engine_and_session
+    from app.db.models import AiRequest
+
+    engine, session_factory = create_engine_and_session(Settings())
+    text_column = AiRequest.request_payload["text"].astext
+    query = (
+        sa.select(text_column, AiRequest.model_id)
+        .where(AiRequest.request_type == "text", AiRequest.status == "success", text_column.isnot(None))
+        .order_by(AiRequest.id.desc())
+        .limit(limit)
+    )
+    async with session_factory() as session:
+        rows = (await session.execute(query)).all()
+    await engine.dispose()
+    return [(text, model_id) for text, model_id in rows]
+
+
+def train(samples: list[tuple[str, int]], epochs: int, lr: float, l2: float, dim: int = HASH_DIM) -> dict:
+    """Мультиклассовая логистическая регрессия, SGD по разреженным признакам"""
+    classes = sorted({model_id for _, model_id in samples})
+    weights = {model_id: {} for model_id in classes}
+    bias = {model_id: 0.0 for model_id in classes}
+    featurized = [(extract_features(text, dim), model_id) for text, model_id in samples]
+
+    for epoch in range(epochs):
+        random.shuffle(featurized)
+        loss = 0.0
+        for features, label in featurized:
+            logits = {c: bias[c] + sum(weights[c].get(b, 0.0) * v for b, v in features.items()) for c in classes}
+            top = max(logits.values())
+            exp = {c: math.exp(logit - top) for c, logit in logits.items()}
+            total = sum(exp.values())
+
+            for c in classes:
+                grad = exp[c] / total - (1.0 if c == label else 0.0)
+                bias[c] -= lr * grad
+                w = weights[c]
+                for b, v in features.items():
+                    w[b] = w.get(b, 0.0) * (1 - lr * l2) - lr * grad * v
+            loss -= math.log(max(exp[label] / total, 1e-12))
+        print(f"epoch {epoch + 1}: loss {loss / max(len(featurized), 1):.4f}")
+
+    return {
+        "dim": dim,
+        "classes": {
+            str(c): {
+                "bias": bias[c],
+                # почти нулевые веса не сохраняем — файл и память роутера меньше
+                "weights": {str(b): round(w, 5) for b, w in weights[c].items() if abs(w) > 1e-4},
+            }
+            for c in classes
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jsonl", help="датасет вместо ai_requests")
+    parser.add_argument("--limit", type=int, default=50000, help="сколько последних строк ai_requests взять")
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--lr", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-5)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    samples = load_jsonl(args.jsonl) if args.jsonl else asyncio.run(load_from_db(args.limit))
+    print(f"samples: {len(samples)}")
+    model = train(samples, epochs=args.epochs, lr=args.lr, l2=args.l2)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(model, f)
+    print(f"saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,11 @@ from app.db.models import (AiModels,
                            PacketType, 
                            Packet)
 from app.db.models.ai_models import AiModelsType
+from src.adapters.cache.redis_cache import RedisCache
+from src.adapters.db.model_repository import ModelRepository
 
 
-async def seed_data(session: AsyncSession):
+async def seed_data(session: AsyncSession, redis: RedisCache | None = None):
     session.add_all([
         AiRoles(id=1,
                 user_id=1,
@@ -240,6 +242,8 @@ async def seed_data(session: AsyncSession):
     ])
  
     await session.commit()
+    if redis is not None:
+        await ModelRepository.invalidate_cache(redis)
 
     session.add_all([
         Subs(id=2, name="Недельная", subtype_id=1, kind='BASE', base_sub_id=None, period=7, price=2, stars_price=2,
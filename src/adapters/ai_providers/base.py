@@ -1,8 +1,16 @@
 from abc import ABC, abstractmethod
-from typing import Iterable
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterable, Optional
 from openai.types.chat import ChatCompletionMessageParam
 
 
+@dataclass
+class ChatStreamChunk:
+    """Кусок потокового ответа: либо дельта текста, либо финальная запись об использовании токенов"""
+    delta: str = ""
+    total_tokens: Optional[int] = None
+
+
 class ChatProvider(ABC):
     name: str  # для выбора по имени
 
@@ -10,3 +18,20 @@ class ChatProvider(ABC):
     async def get_answer(self, prompt: str, messages: Iterable[ChatCompletionMessageParam], model: str, base_url: str) -> str:
         """Асинхронный генератор чанков текста"""
         ...
+
+    async def stream_answer(self,
+                            prompt: str,
+                            messages: Iterable[ChatCompletionMessageParam],
+                            model: str,
+                            base_url: Optional[str] = None) -> AsyncIterator[ChatStreamChunk]:
+        """
+        Потоковый ответ: отдаёт дельты текста, последним чанком — total_tokens.
+        По умолчанию провайдер без стриминга отдаёт весь ответ одним чанком.
+        """
+        text, total_tokens = await self.get_answer(prompt=prompt,
+                                                   messages=messages,
+                                                   model=model,
+                                                   base_url=base_url)
+        if text:
+            yield ChatStreamChunk(delta=text)
+        yield ChatStreamChunk(total_tokens=total_tokens)
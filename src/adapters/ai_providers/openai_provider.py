@@ -1,21 +1,27 @@
 # adapters/ai_providers/openai_provider.py
 
-from typing import Dict, Iterable, Optional, Tuple
-from openai import AsyncOpenAI
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI, NOT_GIVEN
 from openai.types.chat import ChatCompletionMessageParam
-from src.adapters.ai_providers.base import ChatProvider
+from src.adapters.ai_providers.base import ChatProvider, ChatStreamChunk
 
 
 class OpenAIProvider(ChatProvider):
     name = "openai"
 
-    def __init__(self, api_key: str, default_base_url: Optional[str] = None):
+    def __init__(self,
+                 api_key: str,
+                 default_base_url: Optional[str] = None,
+                 http_client_factory: Optional[Callable[[], httpx.AsyncClient]] = None):
         """
         api_key — обязательно.
         default_base_url — будет использован, если base_url не передан в chat().
+        http_client_factory — пул соединений с лимитами и таймаутами (на каждый base_url свой).
         """
         self.api_key = api_key
         self.default_base_url = default_base_url
+        self.http_client_factory = http_client_factory
         # Простой кэш клиентов по base_url, чтобы сохранять пула соединений httpx
         self._clients: Dict[Optional[str], AsyncOpenAI] = {}
 
@@ -26,7 +32,8 @@ class OpenAIProvider(ChatProvider):
         """
         key = base_url or self.default_base_url
         if key not in self._clients:
-            self._clients[key] = AsyncOpenAI(api_key=self.api_key, base_url=key)
+            http_client = self.http_client_factory() if self.http_client_factory else None
+            self._clients[key] = AsyncOpenAI(api_key=self.api_key, base_url=key, http_client=http_client)
         return self._clients[key]
 
     async def get_answer(
@@ -53,9 +60,51 @@ class OpenAIProvider(ChatProvider):
             messages=full_messages,
             temperature=temperature,
             max_tokens=max_tokens,
-            timeout=timeout,  # пробрасывается в httpx под капотом
+            # None здесь отключил бы таймаут клиента — передаём только явный
+            timeout=timeout if timeout is not None else NOT_GIVEN,
         )
 
         text = resp.choices[0].message.content or ""
         total_tokens = resp.usage.total_tokens if resp.usage else None
         return text, total_tokens
+
+
+    async def stream_answer(
+        self,
+        *,
+        prompt: str,
+        messages: Iterable[ChatCompletionMessageParam],
+        model: str,
+        base_url: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[ChatStreamChunk]:
+        """
+        То же, что get_answer, но отдаёт дельты по мере генерации.
+        Последним чанком приходит total_tokens (stream_options.include_usage).
+        """
+        full_messages = [{"role": "system", "content": prompt}] + list(messages)
+
+        client = self._get_client(base_url)
+
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=full_messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout if timeout is not None else NOT_GIVEN,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        total_tokens = None
+        async for chunk in stream:
+            if chunk.choices:
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield ChatStreamChunk(delta=delta)
+            if chunk.usage:
+                total_tokens = chunk.usage.total_tokens
+
+        yield ChatStreamChunk(total_tokens=total_tokens)
@@ -1,13 +1,52 @@
-from typing import Dict
+from typing import Dict, Optional
+
+import httpx
+
 from src.adapters.ai_providers.base import ChatProvider
 from src.adapters.ai_providers.openai_provider import OpenAIProvider
+from src.adapters.ai_providers.upstream import UpstreamLimiter
+
 
 class ProviderRegistry:
-    def __init__(self, tokens: dict):
+    def __init__(self,
+                 tokens: dict,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 60,
+                 connect_timeout: float = 10,
+                 read_timeout: float = 300,
+                 default_concurrency: int = 32,
+                 max_queue: int = 64,
+                 queue_timeout: float = 15):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.default_concurrency = default_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._limiters: Dict[str, UpstreamLimiter] = {}
+        # апстрим -> наибольший max_concurrency среди его моделей, обращавшихся к нему
+        self._configured_limits: Dict[str, int] = {}
         self._providers: Dict[str, ChatProvider] = {
-            'openai': OpenAIProvider(api_key=tokens['openai']),
+            'openai': OpenAIProvider(api_key=tokens['openai'], http_client_factory=self.create_http_client),
         }
 
+    def create_http_client(self) -> httpx.AsyncClient:
+        """Пул соединений для одного апстрима: провайдеры создают по клиенту на base_url"""
+        return httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_keepalive_connections,
+                                keepalive_expiry=self.keepalive_expiry),
+            # read — пауза между чанками стрима, а не время всего ответа
+            timeout=httpx.Timeout(connect=self.connect_timeout,
+                                  read=self.read_timeout,
+                                  write=30,
+                                  pool=self.queue_timeout),
+        )
+
     def register(self, name: str, provider: ChatProvider):
         self._providers[name] = provider
 
@@ -16,3 +55,24 @@ class ProviderRegistry:
             return self._providers[name]
         except KeyError:
             raise ValueError(f"Provider '{name}' is not registered.")
+
+    def limiter(self, provider: str, base_url: Optional[str], max_concurrency: Optional[int] = None) -> UpstreamLimiter:
+        """
+        Лимитер апстрима provider + base_url. Лимит — наибольший AiModels.max_concurrency среди
+        моделей этого апстрима (не зависит от того, какая обратилась первой); пока ни у одной
+        модели лимит не задан — default_concurrency.
+        """
+        key = f"{provider}:{base_url or ''}"
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            limiter = self._limiters[key] = UpstreamLimiter(name=key,
+                                                            max_concurrency=self.default_concurrency,
+                                                            max_queue=self.max_queue,
+                                                            queue_timeout=self.queue_timeout)
+        if max_concurrency and max_concurrency > self._configured_limits.get(key, 0):
+            self._configured_limits[key] = max_concurrency
+            limiter.resize(max_concurrency)
+        return limiter
+
+    def metrics(self) -> dict:
+        return {key: limiter.as_dict() for key, limiter in self._limiters.items()}
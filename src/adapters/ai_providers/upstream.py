@@ -0,0 +1,106 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+
+class ProviderBusyError(Exception):
+    """Апстрим перегружен: очередь ожидания переполнена или слот не освободился вовремя"""
+
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f"upstream '{upstream}' is busy: {reason}")
+        self.upstream = upstream
+        self.reason = reason
+
+
+class UpstreamLimiter:
+    """
+    Ограничение одновременных запросов к одному апстриму (base_url провайдера).
+
+    Не больше max_concurrency запросов в полёте, не больше max_queue ожидающих;
+    сверх очереди или после queue_timeout ожидания — быстрый отказ ProviderBusyError,
+    чтобы один медленный провайдер не держал всех пользователей.
+    Лимит можно менять на ходу (resize): слоты выдаются ожидающим по очереди.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._waiters: deque[asyncio.Future] = deque()
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def resize(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self._wake()
+
+    def _wake(self):
+        # слот переходит ожидающему сразу (in_flight растёт здесь), чтобы его не перехватил новый запрос
+        while self._waiters and self.in_flight < self.max_concurrency:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    async def _acquire(self):
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            return
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise ProviderBusyError(self.name, "queue is full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except BaseException as e:
+            if waiter.done():
+                # слот выдан в момент таймаута/отмены — возвращаем его
+                self._release()
+            else:
+                waiter.cancel()
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise ProviderBusyError(self.name, "queue timeout")
+            raise
+        finally:
+            self.waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        started = time.monotonic()
+        await self._acquire()
+
+        waited = time.monotonic() - started
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        try:
+            yield
+        finally:
+            self.completed += 1
+            self._release()
+
+    def as_dict(self) -> dict:
+        started = self.completed + self.in_flight
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_wait": round(self.total_wait / started, 4) if started else 0.0,
+            "max_wait": round(self.max_wait, 4),
+        }
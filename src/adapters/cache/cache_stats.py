@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class CacheStats:
+    """Счётчики попаданий/промахов кэша (в пределах процесса)"""
+    hits: int = 0
+    misses: int = 0
+
+    def hit(self):
+        self.hits += 1
+
+    def miss(self):
+        self.misses += 1
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def as_dict(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": round(self.hit_rate, 4)}
@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from src.adapters.cache.cache_stats import CacheStats
+
+_MISSING = object()
+
+
+class LocalTTLCache:
+    """
+    In-process LRU-кэш с TTL. Первый уровень перед Redis для редко меняющихся данных.
+    Не потокобезопасен — рассчитан на один event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.stats.miss()
+            return default
+
+        expires_at, value = item
+        if expires_at <= self.clock():
+            del self._data[key]
+            self.stats.miss()
+            return default
+
+        self._data.move_to_end(key)
+        self.stats.hit()
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None):
+        self._data[key] = (self.clock() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,4 +1,5 @@
 import redis.asyncio as redis
+from typing import AsyncIterator
 
 class RedisCache:
     def __init__(self, url: str):
@@ -18,6 +19,23 @@ class RedisCache:
             return newval
             """
         )
+        # Lua script: append to a capped list only if it is already cached (write-through без частичных списков)
+        self._push_if_exists_script = self.client.register_script(
+            """
+            local key = KEYS[1]
+            if redis.call('EXISTS', key) == 0 then
+              return 0
+            end
+            local max_len = tonumber(ARGV[1])
+            local ttl = tonumber(ARGV[2])
+            for i = 3, #ARGV do
+              redis.call('LPUSH', key, ARGV[i])
+            end
+            redis.call('LTRIM', key, 0, max_len - 1)
+            redis.call('EXPIRE', key, ttl)
+            return 1
+            """
+        )
 
     async def set(self, key: str, value: str, ttl: int = None):
         print(value)
@@ -27,6 +45,10 @@ class RedisCache:
         print(key)
         return await self.client.get(key)
 
+    async def set_if_not_exists(self, key: str, value: str, ttl: int) -> bool:
+        """SET NX EX — простая распределённая блокировка"""
+        return bool(await self.client.set(key, value, ex=ttl, nx=True))
+
     async def delete(self, key: str):
         await self.client.delete(key)
 
@@ -35,7 +57,6 @@ class RedisCache:
 
     async def lpush(self, key: str, value: str):
         await self.client.lpush(key, value)
-        await self.client.ltrim(key, 0, 9)  # оставляем только 10 последних
 
     async def lrange(self, key: str, start=0, stop=9):
         return await self.client.lrange(key, start, stop)
@@ -46,6 +67,44 @@ class RedisCache:
     async def ltrim(self, key: str, start: int, stop: int):
         await self.client.ltrim(key, start, stop)
 
+    async def delete_pattern(self, pattern: str):
+        """Удаляет все ключи по маске (SCAN, без блокирующего KEYS)"""
+        keys = [key async for key in self.client.scan_iter(match=pattern, count=500)]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(channel, message)
+
+    async def listen(self, channel: str) -> AsyncIterator[str]:
+        """Подписка на канал: отдаёт payload каждого сообщения"""
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    yield message["data"]
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+
+    async def push_if_exists(self, key: str, values: list[str], max_len: int, ttl: int) -> bool:
+        """LPUSH values (в порядке списка) + LTRIM + EXPIRE одним запросом, если ключ уже есть.
+        Returns False, если ключа нет (ничего не записано).
+        """
+        if not values:
+            return False
+        return bool(await self._push_if_exists_script(keys=[key], args=[max_len, ttl, *values]))
+
+    async def replace_list(self, key: str, values: list[str], ttl: int):
+        """Атомарно заменяет список целиком (MULTI: DEL + RPUSH + EXPIRE)"""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if values:
+                pipe.rpush(key, *values)
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
     async def incr_if_enough(self, key: str, limit: int, cost: int) -> int:
         """Atomically increment key by cost only if it does not exceed limit.
         Returns new value, or -1 if not enough remaining.
@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import AiContext
 from app.db.models.user_ai_context import MessageType
-from src.services.ai.data_classes import MessageDTO
+from src.services.ai.data_classes import MessageDTO, HistoryPage
 import sqlalchemy as sa
+import uuid
+from uuid6 import uuid7
 
 
 class ChatHistoryRepository:
@@ -22,22 +24,108 @@ class ChatHistoryRepository:
         return result.scalar_one()  # id вставленной записи
 
 
+    @staticmethod
+    async def save_messages(session: AsyncSession, dialog_id: int, messages: list[MessageDTO]) -> list[uuid.UUID]:
+        """
+        Вставляет весь ход диалога одним INSERT ... VALUES (...), (...) RETURNING.
+        public_id генерируем здесь, чтобы порядок uuid7 совпадал с порядком сообщений.
+        """
+        if not messages:
+            return []
+
+        stmt = (
+            sa.insert(AiContext)
+            .values([
+                {
+                    "public_id": uuid7(),
+                    "dialog_id": dialog_id,
+                    "author_id": message.author_id,
+                    "text": message.text,
+                    "message_type": message.message_type,
+                }
+                for message in messages
+            ])
+            .returning(AiContext.public_id)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
     @staticmethod
     async def load_history(session: AsyncSession, dialog_id: int, limit: int = 10) -> list[MessageDTO]:
+        """
+        Последние limit сообщений диалога в хронологическом порядке.
+        """
+        page = await ChatHistoryRepository.load_page(session=session, dialog_id=dialog_id, limit=limit)
+        return page.messages
+
+    @staticmethod
+    async def load_page(session: AsyncSession,
+                        dialog_id: int,
+                        before: uuid.UUID | None = None,
+                        limit: int = 20) -> HistoryPage:
+        """
+        Keyset-пагинация от новых к старым: страница из limit сообщений старше before
+        (или самых новых, если before не задан). Стоимость O(limit) независимо от длины диалога.
+        """
+        conditions = [AiContext.dialog_id == dialog_id, AiContext.is_deleted == False]
+        if before is not None:
+            conditions.append(AiContext.public_id < before)
+
         query = (
-            sa.select(AiContext.text, AiContext.author_id, AiContext.message_type)
-            .where(AiContext.dialog_id == dialog_id, AiContext.is_deleted == False)
-            .order_by(AiContext.created_at)
+            sa.select(AiContext.public_id, AiContext.text, AiContext.author_id, AiContext.message_type)
+            .where(*conditions)
+            .order_by(AiContext.public_id.desc())
             .limit(limit)
         )
         result = await session.execute(query)
         rows = result.all()
 
+        messages = [
+            MessageDTO(
+                text=text,
+                author_id=author_id,
+                message_type=message_type,
+                public_id=public_id,
+            )
+            for (public_id, text, author_id, message_type) in reversed(rows)
+        ]
+        next_cursor = rows[-1].public_id if len(rows) == limit else None
+        return HistoryPage(messages=messages, next_cursor=next_cursor)
+
+    @staticmethod
+    async def count_after(session: AsyncSession, dialog_id: int, after: uuid.UUID | None) -> int:
+        conditions = [AiContext.dialog_id == dialog_id, AiContext.is_deleted == False]
+        if after is not None:
+            conditions.append(AiContext.public_id > after)
+
+        query = sa.select(sa.func.count()).select_from(AiContext).where(*conditions)
+        result = await session.execute(query)
+        return result.scalar_one()
+
+    @staticmethod
+    async def load_after(session: AsyncSession,
+                         dialog_id: int,
+                         after: uuid.UUID | None,
+                         limit: int) -> list[MessageDTO]:
+        """Первые limit сообщений новее after в хронологическом порядке"""
+        conditions = [AiContext.dialog_id == dialog_id, AiContext.is_deleted == False]
+        if after is not None:
+            conditions.append(AiContext.public_id > after)
+
+        query = (
+            sa.select(AiContext.public_id, AiContext.text, AiContext.author_id, AiContext.message_type)
+            .where(*conditions)
+            .order_by(AiContext.public_id)
+            .limit(limit)
+        )
+        result = await session.execute(query)
+
         return [
             MessageDTO(
                 text=text,
                 author_id=author_id,
                 message_type=message_type,
+                public_id=public_id,
             )
-            for (text, author_id, message_type) in rows
-        ]
\ No newline at end of file
+            for (public_id, text, author_id, message_type) in result.all()
+        ]
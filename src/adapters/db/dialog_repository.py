@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 import sqlalchemy as sa
+import uuid
 from app.db.models import Dialog
 
 class DialogRepository:
@@ -24,3 +25,12 @@ class DialogRepository:
         stmt = sa.update(Dialog).values(is_active=False).where(Dialog.user_id == user_id,
                                                                Dialog.id == dialog_id)
         await session.execute(stmt)
+
+    @staticmethod
+    async def get(dialog_id: int, session: AsyncSession) -> Dialog | None:
+        return await session.get(Dialog, dialog_id)
+
+    @staticmethod
+    async def update_summary(dialog_id: int, summary: str, summary_until: uuid.UUID, session: AsyncSession):
+        stmt = sa.update(Dialog).values(summary=summary, summary_until=summary_until).where(Dialog.id == dialog_id)
+        await session.execute(stmt)
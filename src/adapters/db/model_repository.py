@@ -7,32 +7,89 @@ from src.services.i18n_service import I18nService
 from app.db.models.ai_models import AiModelsType, AiModels
 from aiogram.types import User
 
+from src.adapters.cache.local_cache import LocalTTLCache
+
+import asyncio
 import json
-from typing import Optional
+from typing import Any, Awaitable, Callable, Optional
+
+# таблица ai_models меняется несколько раз в месяц, инвалидация — явная через MODELS_CHANGED_CHANNEL
+CACHE_TTL = 60 * 60 * 24
+LOCAL_CACHE_TTL = 60 * 10
+MODELS_CHANGED_CHANNEL = "models:changed"
 
-CACHE_TTL = 1
+# первый уровень: in-process, второй — Redis
+_local_cache = LocalTTLCache(maxsize=512, ttl=LOCAL_CACHE_TTL)
 
 
 class ModelRepository:
     @staticmethod
-    async def get_all_text_models(session: AsyncSession, redis: RedisCache) -> list[tuple[int, str, int]]:
+    async def _get_cached(cache_key: str,
+                          redis: Optional[RedisCache],
+                          load: Callable[[], Awaitable[Any]]) -> Any:
         """
-        Возвращает список всех моделей с полями: (id, name)
+        Read-through: память процесса -> Redis -> БД.
+        В кэше лежат JSON-совместимые значения, None не кэшируется.
         """
-        cache_key = "models:all"
-        cached = await redis.get(cache_key)
-        if cached:
-            pass
-            #return json.loads(cached)
+        value = _local_cache.get(cache_key)
+        if value is not None:
+            return value
+
+        if redis is not None:
+            cached = await redis.get(cache_key)
+            if cached:
+                value = json.loads(cached)
+                _local_cache.set(cache_key, value)
+                return value
+
+        value = await load()
+        if value is None:
+            return None
 
-        query = sa.select(AiModels.id, AiModels.name).order_by(AiModels.id).where(AiModels.type == AiModelsType.TEXT)
-        result = await session.execute(query)
-        models = result.fetchall()
+        _local_cache.set(cache_key, value)
+        if redis is not None:
+            await redis.set(cache_key, json.dumps(value), ttl=CACHE_TTL)
+        return value
 
-        models_list = [tuple(row) for row in models]
+    @staticmethod
+    async def invalidate_cache(redis: RedisCache):
+        """
+        Сбрасывает кэш моделей во всех процессах. Вызывать после любых изменений ai_models.
+        """
+        _local_cache.clear()
+        await redis.delete_pattern("model:*")
+        await redis.delete_pattern("models:*")
+        await redis.publish(MODELS_CHANGED_CHANNEL, "1")
 
-        await redis.set(cache_key, json.dumps(models_list), ttl=CACHE_TTL)
-        return models_list
+    @staticmethod
+    async def listen_invalidations(redis: RedisCache):
+        """
+        Фоновая задача: чистит локальный кэш по сообщению из MODELS_CHANGED_CHANNEL.
+        """
+        while True:
+            try:
+                async for _ in redis.listen(MODELS_CHANGED_CHANNEL):
+                    _local_cache.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"models invalidation listener error: {e}")
+                # пока подписки нет, сообщения могли потеряться
+                _local_cache.clear()
+                await asyncio.sleep(5)
+
+    @staticmethod
+    async def get_all_text_models(session: AsyncSession, redis: RedisCache) -> list[tuple[int, str, int]]:
+        """
+        Возвращает список всех моделей с полями: (id, name)
+        """
+        async def load():
+            query = sa.select(AiModels.id, AiModels.name).order_by(AiModels.id).where(AiModels.type == AiModelsType.TEXT)
+            result = await session.execute(query)
+            return [list(row) for row in result.fetchall()]
+
+        models = await ModelRepository._get_cached("models:all", redis, load)
+        return [tuple(row) for row in models]
 
     @staticmethod
     async def get_all_text_models_localized(session: AsyncSession, redis: RedisCache, user: User) -> list[tuple[int, str, int]]:
@@ -59,17 +116,12 @@ class ModelRepository:
         """
         Возвращает список моделей с полями: (id, name)
         """
-        cache_key = "models:names"
-        cached = await redis.get(cache_key)
-        if cached:
-            return json.loads(cached)
-
-        query = sa.select(AiModels.id)
-        result = await session.execute(query)
-        ids = result.fetchall()
+        async def load():
+            query = sa.select(AiModels.id)
+            result = await session.execute(query)
+            return [list(row) for row in result.fetchall()]
 
-        await redis.set(cache_key, json.dumps(ids), ttl=CACHE_TTL)
-        return ids
+        return await ModelRepository._get_cached("models:names", redis, load)
 
 
     @staticmethod
@@ -77,43 +129,29 @@ class ModelRepository:
         """
         Возвращает имя модели по её ID. Использует кэш.
         """
-        cache_key = f"model:name:{model_id}"
-        cached = await redis.get(cache_key)
-        if cached:
-            return cached  # имя — это просто строка
+        async def load():
+            query = sa.select(AiModels.name).where(AiModels.id == model_id)
+            result = await session.execute(query)
+            return result.scalar_one_or_none()
 
-        query = sa.select(AiModels.name).where(AiModels.id == model_id)
-        result = await session.execute(query)
-        name_row = result.scalar_one_or_none()
-
-        if name_row:
-            await redis.set(cache_key, name_row, ttl=CACHE_TTL)
-
-        return name_row
+        return await ModelRepository._get_cached(f"model:name:{model_id}", redis, load)
 
 
     @staticmethod
     async def get_model_info(model_id: int, session: AsyncSession, redis: RedisCache) -> ModelInfo | None:
-        cache_key = f"model:{model_id}:info"
-
-        cached = await redis.get(cache_key)
-        if cached:
-            data = json.loads(cached)  # bytes/str -> dict
-            return ModelInfo(**data)
+        async def load():
+            stmt = sa.select(
+                AiModels.name,
+                AiModels.description,
+            ).where(AiModels.id == model_id)
 
-        stmt = sa.select(
-            AiModels.name,
-            AiModels.description,
-        ).where(AiModels.id == model_id)
+            result = await session.execute(stmt)
+            mapping = result.mappings().one_or_none()
+            return dict(mapping) if mapping is not None else None
 
-        result = await session.execute(stmt)
-        mapping = result.mappings().one_or_none()
-        if mapping is None:
+        payload = await ModelRepository._get_cached(f"model:{model_id}:info", redis, load)
+        if payload is None:
             return None
-
-        payload = dict(mapping)  # dict -> JSON for cache
-        await redis.set(cache_key, json.dumps(payload), ttl=CACHE_TTL)
-
         return ModelInfo(**payload)  # return dot-access object
 
     @staticmethod
@@ -138,25 +176,27 @@ class ModelRepository:
 
 
     @staticmethod
-    async def get_model_config(model_id: int, session: AsyncSession) -> ModelConfig | None:
-        stmt = (
-            sa.select(
-                AiModels.id,
-                AiModels.name,
-                AiModels.api_name,
-                AiModels.api_provider,
-                AiModels.api_link
+    async def get_model_config(model_id: int,
+                               session: AsyncSession,
+                               redis: Optional[RedisCache] = None) -> ModelConfig | None:
+        async def load():
+            stmt = (
+                sa.select(
+                    AiModels.id,
+                    AiModels.name,
+                    AiModels.api_name,
+                    AiModels.api_provider,
+                    AiModels.api_link,
+                    AiModels.context_token_budget,
+                    AiModels.max_concurrency,
+                )
+                .where(AiModels.id == model_id)
             )
-            .where(AiModels.id == model_id)
-        )
-        result = await session.execute(stmt)
-        row = result.one_or_none()
-        if row is None:
+            result = await session.execute(stmt)
+            mapping = result.mappings().one_or_none()
+            return dict(mapping) if mapping is not None else None
+
+        payload = await ModelRepository._get_cached(f"model:{model_id}:config", redis, load)
+        if payload is None:
             return None
-        return ModelConfig(
-            id=row.id,
-            name=row.name,
-            api_name=row.api_name, 
-            api_provider=row.api_provider,
-            api_link=row.api_link
-        )
+        return ModelConfig(**payload)
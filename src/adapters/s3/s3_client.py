@@ -1,8 +1,19 @@
-from contextlib import asynccontextmanager
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import AsyncIterator, Optional
 
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
 
+from src.adapters.cache.redis_cache import RedisCache
+
+EXISTS_CACHE_TTL = 60 * 60 * 24 * 30
+# S3 требует части multipart не меньше 5 МиБ (кроме последней); меньше порога — обычный PUT
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 class S3Client:
     def __init__(
@@ -13,67 +24,169 @@ class S3Client:
             region_name: str,
             bucket_name: str,
             domain_name: str,
+            redis: Optional[RedisCache] = None,
+            max_pool_connections: int = 50,
     ):
         self.config = {
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
             "endpoint_url": endpoint_url,
             "region_name": region_name,
+            "config": AioConfig(max_pool_connections=max_pool_connections),
         }
         self.bucket_name = bucket_name
         self.domain_name = domain_name
         self.session = get_session()
+        # кэш «объект уже в бакете» вместо HEAD на каждую загрузку
+        self.redis = redis
+        # один долгоживущий клиент с пулом соединений на весь процесс
+        self._client = None
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._client_lock = asyncio.Lock()
+
+    async def _get_shared_client(self):
+        if self._client is None:
+            async with self._client_lock:
+                if self._client is None:
+                    self._exit_stack = AsyncExitStack()
+                    self._client = await self._exit_stack.enter_async_context(
+                        self.session.create_client("s3", **self.config))
+        return self._client
 
     @asynccontextmanager
     async def get_client(self):
-        async with self.session.create_client("s3", **self.config) as client:
-            yield client
+        yield await self._get_shared_client()
 
-    async def upload_file(
-            self,
-            file_obj: bin,
-            file_key: str
-    ):
-        if await self.file_exists(file_key):
-            print(f"File {file_key} already exists in {self.bucket_name}")
-            return f"{self.domain_name}/{file_key}"
+    async def close(self):
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._client = None
+        self._exit_stack = None
+
+    def url(self, file_key: str) -> str:
+        return f"{self.domain_name}/{file_key}"
+
+    @staticmethod
+    def content_key(data: bytes, ext: str, prefix: str = "uploads") -> str:
+        """Ключ по sha256 содержимого: одно и то же фото от разных пользователей — один объект"""
+        digest = hashlib.sha256(data).hexdigest()
+        return f"{prefix}/{digest[:2]}/{digest}{ext}"
+
+    @staticmethod
+    def _exists_cache_key(file_key: str) -> str:
+        return f"s3:exists:{file_key}"
+
+    async def upload_content(self, data: bytes, ext: str, content_type: Optional[str] = None) -> Optional[str]:
+        """
+        Загрузка по контентному ключу: известный по Redis объект не загружается повторно,
+        а PUT условный (If-None-Match: *) — гонка двух загрузок одного файла безопасна.
+        """
+        file_key = self.content_key(data, ext)
+        if self.redis and await self.redis.exists(self._exists_cache_key(file_key)):
+            return self.url(file_key)
+
+        params = {"Bucket": self.bucket_name, "Key": file_key, "Body": data, "IfNoneMatch": "*"}
+        if content_type:
+            params["ContentType"] = content_type
         try:
             async with self.get_client() as client:
-                await client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=file_key,
-                    Body=file_obj,
-                )
-                print(f"File {file_key} uploaded to {self.bucket_name}")
-                return self.domain_name + '/' + file_key
+                await client.put_object(**params)
+            print(f"File {file_key} uploaded to {self.bucket_name}")
         except ClientError as e:
-            print(f"Error uploading file: {e}")
+            # 412 — объект уже есть (загрузил другой запрос), это успех
+            if e.response['Error']['Code'] not in ('PreconditionFailed', '412'):
+                print(f"Error uploading file: {e}")
+                return None
+
+        if self.redis:
+            await self.redis.set(self._exists_cache_key(file_key), "1", ttl=EXISTS_CACHE_TTL)
+        return self.url(file_key)
+
+    async def upload_stream(self,
+                            chunks: AsyncIterator[bytes],
+                            file_key: str,
+                            content_type: Optional[str] = None,
+                            part_size: int = MULTIPART_PART_SIZE) -> Optional[str]:
+        """
+        Загрузка из асинхронного итератора: в памяти не больше одной части (part_size).
+        Поток короче part_size уходит одним PUT, длиннее — multipart upload;
+        при ошибке multipart отменяется, чтобы не копить брошенные части в бакете.
+        """
+        extra = {"ContentType": content_type} if content_type else {}
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+
+        try:
+            async with self.get_client() as client:
+                async for chunk in chunks:
+                    buffer += chunk
+                    while len(buffer) >= part_size:
+                        if upload_id is None:
+                            response = await client.create_multipart_upload(Bucket=self.bucket_name,
+                                                                            Key=file_key, **extra)
+                            upload_id = response["UploadId"]
+                        # хвост переносится в новый буфер, сама часть уходит без копирования
+                        part, buffer = buffer, buffer[part_size:]
+                        del part[part_size:]
+                        response = await client.upload_part(Bucket=self.bucket_name, Key=file_key,
+                                                            UploadId=upload_id, PartNumber=len(parts) + 1,
+                                                            Body=part)
+                        parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+
+                if upload_id is None:
+                    await client.put_object(Bucket=self.bucket_name, Key=file_key, Body=bytes(buffer), **extra)
+                else:
+                    if buffer:
+                        response = await client.upload_part(Bucket=self.bucket_name, Key=file_key,
+                                                            UploadId=upload_id, PartNumber=len(parts) + 1,
+                                                            Body=buffer)
+                        parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+                    await client.complete_multipart_upload(Bucket=self.bucket_name, Key=file_key,
+                                                           UploadId=upload_id,
+                                                           MultipartUpload={"Parts": parts})
+            print(f"File {file_key} uploaded to {self.bucket_name} ({len(parts) or 1} parts)")
+            return self.url(file_key)
+        except BaseException as e:
+            # и при отмене задачи (CancelledError): иначе части остаются в бакете
+            if not isinstance(e, asyncio.CancelledError):
+                print(f"Error uploading file: {e}")
+            if upload_id is not None:
+                await asyncio.shield(self._abort_multipart(file_key, upload_id))
+            if not isinstance(e, ClientError):
+                raise
+            return None
+
+    async def _abort_multipart(self, file_key: str, upload_id: str):
+        try:
+            async with self.get_client() as client:
+                await client.abort_multipart_upload(Bucket=self.bucket_name, Key=file_key, UploadId=upload_id)
+        except Exception as e:
+            print(f"Error aborting multipart upload {file_key}: {e}")
+
+    async def iter_file(self, object_name: str, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Содержимое объекта кусками по chunk_size, без чтения целиком в память"""
+        async with self.get_client() as client:
+            response = await client.get_object(Bucket=self.bucket_name, Key=object_name)
+            async with response["Body"] as body:
+                while chunk := await body.read(chunk_size):
+                    yield chunk
 
     async def delete_file(self, object_name: str):
         try:
             async with self.get_client() as client:
                 await client.delete_object(Bucket=self.bucket_name, Key=object_name)
                 print(f"File {object_name} deleted from {self.bucket_name}")
+            if self.redis:
+                await self.redis.delete(self._exists_cache_key(object_name))
         except ClientError as e:
             print(f"Error deleting file: {e}")
 
     async def get_file(self, object_name: str, destination_path: str):
         try:
-            async with self.get_client() as client:
-                response = await client.get_object(Bucket=self.bucket_name, Key=object_name)
-                data = await response["Body"].read()
-                with open(destination_path, "wb") as file:
-                    file.write(data)
-                print(f"File {object_name} downloaded to {destination_path}")
+            with open(destination_path, "wb") as file:
+                async for chunk in self.iter_file(object_name):
+                    file.write(chunk)
+            print(f"File {object_name} downloaded to {destination_path}")
         except ClientError as e:
             print(f"Error downloading file: {e}")
-
-    async def file_exists(self, file_key: str) -> bool:
-        try:
-            async with self.get_client() as client:
-                await client.head_object(Bucket=self.bucket_name, Key=file_key)
-            return True
-        except ClientError as e:
-            if e.response['Error']['Code'] == '404':
-                return False
-            raise
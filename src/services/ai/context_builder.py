@@ -0,0 +1,192 @@
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from openai.types.chat import ChatCompletionMessageParam
+
+from src.services.ai.data_classes import ModelConfig
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+DEFAULT_CONTEXT_TOKEN_BUDGET = 8000
+# служебные токены на каждое сообщение (роль, разделители)
+MESSAGE_OVERHEAD_TOKENS = 4
+# картинки/файлы не токенизируем — берём оценку сверху
+IMAGE_PART_TOKENS = 765
+FILE_PART_TOKENS = 2000
+MAX_IMAGE_PARTS = 2
+MAX_FILE_PARTS = 1
+# запасной вариант без токенайзера: ~3 символа на токен (с поправкой на кириллицу)
+CHARS_PER_TOKEN = 3
+# словари, которые грузим при старте; модели без своего словаря считаются по o200k_base
+DEFAULT_ENCODING = "o200k_base"
+WARM_UP_ENCODINGS = ("o200k_base", "cl100k_base")
+WARM_UP_TIMEOUT_SECONDS = 15
+
+
+@dataclass
+class ContextWindow:
+    messages: list[ChatCompletionMessageParam]
+    input_tokens: int
+    trimmed_tokens: int
+    trimmed_messages: int
+
+
+class ContextBuilder:
+    """
+    Собирает окно контекста под токен-бюджет модели.
+
+    Новые сообщения хода и system-сообщения в начале истории (краткое содержание диалога)
+    попадают всегда, остальная история добавляется от новых к старым, пока влезает в бюджет.
+    Картинки и файлы ограничены по количеству, как раньше в истории.
+
+    Словарь tiktoken при первом использовании скачивается (синхронно и без таймаута),
+    поэтому в боте словари грузит warm_up() при старте, вне event loop; пока словаря нет,
+    токены оцениваются по символам. load_on_demand=True — грузить прямо при подсчёте
+    (для процессов-воркеров, где блокировка никому не мешает).
+    """
+
+    def __init__(self, default_budget: int = DEFAULT_CONTEXT_TOKEN_BUDGET, load_on_demand: bool = False):
+        self.default_budget = default_budget
+        self.load_on_demand = load_on_demand
+        # имя словаря -> токенайзер, None — загрузить не удалось, считаем по символам
+        self._encodings: dict[str, Any] = {}
+
+    @staticmethod
+    def _encoding_name(api_name: str) -> str:
+        try:
+            return tiktoken.encoding_name_for_model(api_name)
+        except KeyError:
+            return DEFAULT_ENCODING
+
+    def _load_encoding(self, name: str):
+        try:
+            self._encodings[name] = tiktoken.get_encoding(name)
+        except Exception as e:
+            # нет словаря в кэше и нет сети — не валим запрос
+            print(f"tokenizer {name} unavailable: {e}")
+            self._encodings[name] = None
+
+    async def warm_up(self, encodings: tuple[str, ...] = WARM_UP_ENCODINGS,
+                      timeout: float = WARM_UP_TIMEOUT_SECONDS):
+        """
+        Загрузить словари в фоновом потоке. Поток демонический: зависшая загрузка
+        не держит ни event loop, ни остановку процесса; по таймауту просто перестаём ждать.
+        """
+        if tiktoken is None:
+            return
+        loop = asyncio.get_running_loop()
+        for name in encodings:
+            done = loop.create_future()
+
+            def load(name=name, done=done):
+                self._load_encoding(name)
+                loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+            threading.Thread(target=load, name=f"tiktoken-{name}", daemon=True).start()
+            try:
+                await asyncio.wait_for(done, timeout)
+            except asyncio.TimeoutError:
+                print(f"tokenizer {name} is still loading after {timeout}s, counting by characters")
+
+    def _encoder(self, api_name: str):
+        if tiktoken is None:
+            return None
+        name = self._encoding_name(api_name)
+        if name not in self._encodings and self.load_on_demand:
+            self._load_encoding(name)
+        return self._encodings.get(name)
+
+    def count_text_tokens(self, text: str, api_name: str) -> int:
+        encoder = self._encoder(api_name)
+        if encoder is None:
+            return len(text) // CHARS_PER_TOKEN + 1
+        return len(encoder.encode(text, disallowed_special=()))
+
+    def truncate_text_tokens(self, text: str, max_tokens: int, api_name: str) -> str:
+        """Начало text не длиннее max_tokens токенов"""
+        if max_tokens <= 0:
+            return ""
+        encoder = self._encoder(api_name)
+        if encoder is None:
+            return text[:(max_tokens - 1) * CHARS_PER_TOKEN]
+        tokens = encoder.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # разрез может прийтись на середину многобайтного символа — его хвост отбрасываем
+        return encoder.decode_bytes(tokens[:max_tokens]).decode("utf-8", errors="ignore")
+
+    def count_message_tokens(self, message: ChatCompletionMessageParam, api_name: str) -> int:
+        content = message.get("content") or ""
+        if isinstance(content, str):
+            return MESSAGE_OVERHEAD_TOKENS + self.count_text_tokens(content, api_name)
+
+        tokens = MESSAGE_OVERHEAD_TOKENS
+        for part in content:
+            part_type = part.get("type")
+            if part_type == "image_url":
+                tokens += IMAGE_PART_TOKENS
+            elif part_type == "file":
+                tokens += FILE_PART_TOKENS
+            else:
+                tokens += self.count_text_tokens(part.get("text", ""), api_name)
+        return tokens
+
+    @staticmethod
+    def _count_parts(message: ChatCompletionMessageParam, part_type: str) -> int:
+        content = message.get("content")
+        if isinstance(content, str) or not content:
+            return 0
+        return sum(1 for part in content if part.get("type") == part_type)
+
+    def build(self,
+              history: list[ChatCompletionMessageParam],
+              new_messages: list[ChatCompletionMessageParam],
+              model_config: ModelConfig,
+              budget: Optional[int] = None) -> ContextWindow:
+        api_name = model_config.api_name
+        budget = budget or model_config.context_token_budget or self.default_budget
+
+        pinned = []
+        while history and history[0].get("role") == "system":
+            pinned.append(history[0])
+            history = history[1:]
+
+        used = sum(self.count_message_tokens(message, api_name) for message in pinned + new_messages)
+        images = sum(self._count_parts(message, "image_url") for message in new_messages)
+        files = sum(self._count_parts(message, "file") for message in new_messages)
+
+        kept: list[ChatCompletionMessageParam] = []
+        trimmed_tokens = 0
+        trimmed_messages = 0
+        budget_exhausted = False
+
+        for message in reversed(history):
+            tokens = self.count_message_tokens(message, api_name)
+            message_images = self._count_parts(message, "image_url")
+            message_files = self._count_parts(message, "file")
+
+            over_parts = (message_images and images + message_images > MAX_IMAGE_PARTS) or \
+                         (message_files and files + message_files > MAX_FILE_PARTS)
+
+            # после первого невлезшего сообщения старшие уже не берём, чтобы не рвать диалог
+            if budget_exhausted or over_parts or used + tokens > budget:
+                budget_exhausted = budget_exhausted or not over_parts
+                trimmed_tokens += tokens
+                trimmed_messages += 1
+                continue
+
+            kept.append(message)
+            used += tokens
+            images += message_images
+            files += message_files
+
+        kept.reverse()
+        return ContextWindow(messages=pinned + kept + new_messages,
+                             input_tokens=used,
+                             trimmed_tokens=trimmed_tokens,
+                             trimmed_messages=trimmed_messages)
@@ -1,4 +1,7 @@
+import asyncio
 from dataclasses import dataclass
+from typing import Optional
+import uuid
 
 from app.db.models.user_ai_context import MessageType
 
@@ -8,6 +11,15 @@ class MessageDTO:
     text: str
     author_id: int
     message_type: MessageType
+    public_id: Optional[uuid.UUID] = None  # заполняется после сохранения в ai_context
+    history_text: Optional[str] = None  # что сохранить в историю вместо text (ссылка S3 вместо data: URL)
+    history_upload: Optional[asyncio.Task] = None  # фоновая загрузка в S3, её ссылка и станет history_text
+
+@dataclass
+class HistoryPage:
+    messages: list[MessageDTO]  # в хронологическом порядке
+    next_cursor: Optional[uuid.UUID]  # public_id самого старого сообщения страницы, None — старше нет
+
 
 @dataclass
 class Result:
@@ -19,9 +31,11 @@ class ModelConfig:
     id: int
     name: str
     api_name: str
-    ai_class: str
     api_provider: str
     api_link: str
+    ai_class: Optional[str] = None
+    context_token_budget: Optional[int] = None
+    max_concurrency: Optional[int] = None
 
 
 @dataclass
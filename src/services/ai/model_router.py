@@ -0,0 +1,144 @@
+import json
+import math
+import re
+import zlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional
+
+# размерность hashed-признаков; должна совпадать с обучением (scripts/train_router.py)
+HASH_DIM = 2 ** 18
+
+
+@dataclass
+class RouteDecision:
+    model_id: Optional[int]
+    confidence: float
+    source: str
+
+
+class ModelRouter(ABC):
+    name: str
+
+    @abstractmethod
+    def route(self, text: str, allowed_model_ids: list[int]) -> RouteDecision:
+        ...
+
+
+class KeywordRouter(ModelRouter):
+    """
+    Правила на регулярках: каждое совпадение добавляет вес своей модели.
+    Уверенность — доля веса победителя, поэтому спорные запросы уходят дальше по каскаду.
+    """
+    name = "keywords"
+
+    RULES: list[tuple[re.Pattern, int, float]] = [
+        (re.compile(r"```|\b(def|class|import|return|const|let|var|select .* from|traceback|stack ?trace)\b"), 3, 2.0),
+        (re.compile(r"\b(python|javascript|typescript|java|c\+\+|c#|golang|rust|php|sql|regex|html|css|api)\b"), 3, 1.0),
+        (re.compile(r"(код|функци|скрипт|программ|баг|компилир)"), 3, 1.0),
+        (re.compile(r"(архитектур|рефактор|многопоточ|асинхрон|микросервис|алгоритм|сложност[ьи] алгоритм)"), 4, 1.5),
+        (re.compile(r"(найди|поищи|загугли|новост|сегодня|вчера|курс (доллара|евро|валют)|погод|доклад|реферат)"), 5, 1.0),
+        (re.compile(r"(исследовани|научн|обзор литературы|источник|диссертац|метаанализ)"), 6, 1.5),
+        (re.compile(r"(интеграл|производн|уравнени|теорем|докаж|матриц|вероятност|предел|∫|∑)"), 8, 1.5),
+        (re.compile(r"(нарисуй|сгенерируй (картинку|изображение|фото)|создай (картинку|изображение))"), 8, 2.0),
+        (re.compile(r"^(привет|здравствуй|спасибо|как дела|добрый (день|вечер)|hi|hello)\b"), 2, 2.0),
+    ]
+
+    def route(self, text: str, allowed_model_ids: list[int]) -> RouteDecision:
+        text = text.lower()
+        scores: dict[int, float] = {}
+        for pattern, model_id, weight in self.RULES:
+            if model_id in allowed_model_ids and pattern.search(text):
+                scores[model_id] = scores.get(model_id, 0.0) + weight
+
+        if not scores:
+            return RouteDecision(model_id=None, confidence=0.0, source=self.name)
+
+        model_id, best = max(scores.items(), key=lambda item: item[1])
+        # +0.5 — штраф за единичное слабое совпадение
+        return RouteDecision(model_id=model_id, confidence=best / (sum(scores.values()) + 0.5), source=self.name)
+
+
+def extract_features(text: str, dim: int = HASH_DIM) -> dict[int, float]:
+    """Hashed bag of words + биграммы, L2-нормированные. crc32 стабилен между процессами, в отличие от hash()"""
+    tokens = re.findall(r"\w+", text.lower())
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+    features: dict[int, float] = {}
+    for gram in grams:
+        bucket = zlib.crc32(gram.encode()) % dim
+        features[bucket] = features.get(bucket, 0.0) + 1.0
+
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {bucket: value / norm for bucket, value in features.items()}
+
+
+class HashedLinearRouter(ModelRouter):
+    """
+    Линейная модель (softmax) на hashed-признаках, обучается офлайн по логам ai_requests.
+    Формат весов: {"dim": int, "classes": {model_id: {"bias": float, "weights": {bucket: w}}}}
+    """
+    name = "linear"
+
+    def __init__(self, dim: int, classes: dict[int, dict]):
+        self.dim = dim
+        self.bias = {model_id: params["bias"] for model_id, params in classes.items()}
+        self.weights = {model_id: params["weights"] for model_id, params in classes.items()}
+
+    @classmethod
+    def load(cls, path: str) -> "HashedLinearRouter":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        classes = {
+            int(model_id): {
+                "bias": params["bias"],
+                "weights": {int(bucket): w for bucket, w in params["weights"].items()},
+            }
+            for model_id, params in data["classes"].items()
+        }
+        return cls(dim=data["dim"], classes=classes)
+
+    def route(self, text: str, allowed_model_ids: list[int]) -> RouteDecision:
+        candidates = [model_id for model_id in self.weights if model_id in allowed_model_ids]
+        if not candidates:
+            return RouteDecision(model_id=None, confidence=0.0, source=self.name)
+
+        features = extract_features(text, self.dim)
+        logits = {
+            model_id: self.bias[model_id] + sum(self.weights[model_id].get(b, 0.0) * v for b, v in features.items())
+            for model_id in candidates
+        }
+        top = max(logits.values())
+        exp = {model_id: math.exp(logit - top) for model_id, logit in logits.items()}
+        total = sum(exp.values())
+        model_id = max(exp, key=exp.get)
+        return RouteDecision(model_id=model_id, confidence=exp[model_id] / total, source=self.name)
+
+
+class CascadeRouter(ModelRouter):
+    """Первое решение с уверенностью не ниже порога; иначе model_id=None (решает LLM-классификатор)"""
+    name = "cascade"
+
+    def __init__(self, routers: list[ModelRouter], threshold: float):
+        self.routers = routers
+        self.threshold = threshold
+
+    def route(self, text: str, allowed_model_ids: list[int]) -> RouteDecision:
+        best = RouteDecision(model_id=None, confidence=0.0, source=self.name)
+        for router in self.routers:
+            decision = router.route(text, allowed_model_ids)
+            if decision.model_id is not None and decision.confidence >= self.threshold:
+                return decision
+            if decision.confidence > best.confidence:
+                best = decision
+        return RouteDecision(model_id=None, confidence=best.confidence, source=best.source)
+
+
+def build_router(weights_path: Optional[str], threshold: float) -> CascadeRouter:
+    routers: list[ModelRouter] = [KeywordRouter()]
+    if weights_path:
+        try:
+            routers.append(HashedLinearRouter.load(weights_path))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"router weights not loaded ({weights_path}): {e}")
+    return CascadeRouter(routers=routers, threshold=threshold)
@@ -1,14 +1,34 @@
+import hashlib
+import re
 from typing import Optional
 
 from src.adapters.cache.redis_cache import RedisCache
+from src.adapters.cache.cache_stats import CacheStats
 from sqlalchemy.ext.asyncio import AsyncSession
 from openai import OpenAI, AsyncOpenAI
 from src.adapters.db.model_repository import ModelRepository
 from src.adapters.db.user_model_repository import UserModelRepository
 from src.services.permission.permission_service import PermissionService
 from src.adapters.ai_providers.registry import ProviderRegistry
+from src.services.ai.model_router import build_router
 from enum import Enum
 
+# классификатору отдаём только последнее сообщение пользователя, обрезанное до CLASSIFIER_MAX_CHARS
+CLASSIFIER_MAX_CHARS = 2000
+CLASSIFIER_TIMEOUT = 30
+# ключ попадает под model:* и сбрасывается вместе с кэшем моделей
+CLASSIFICATION_CACHE_TTL = 60 * 60 * 24
+
+AVAILABLE_MODELS = {
+    2: "повседневные задачи, простая математика",
+    3: "кодинг",
+    4: "сложный кодинг",
+    5: "интернет-поиск, доклады",
+    6: "научные исследования, поэтапные, много источников",
+    8: "сложная математика, генерация фото"
+}
+
+
 class ModelAccessStatus(Enum):
     OK = "ok"
     NO_MODEL_SELECTED = "no_model_selected"
@@ -38,6 +58,19 @@ class ModelSelectionService:
         self.auto_model_token = config.auto_model_token
         self.auto_model_provider = config.auto_model_provider
 
+        # один клиент на процесс: общий пул keep-alive соединений вместо TLS-рукопожатия на каждый запрос
+        self.classifier_client = AsyncOpenAI(
+            api_key=self.auto_model_token,
+            base_url=self.auto_model_provider,
+            timeout=CLASSIFIER_TIMEOUT,
+            max_retries=1,
+        )
+        self.classification_stats = CacheStats()
+
+        # локальный роутер на CPU; LLM-классификатор — только при низкой уверенности
+        self.router = build_router(weights_path=config.router_weights_path,
+                                   threshold=config.router_confidence_threshold)
+
 
     async def get_model(self, user_id: int, user_subtype: int, messages: Optional[list[dict]], session: AsyncSession):
 
@@ -67,44 +100,75 @@ class ModelSelectionService:
         return ModelAccessResult(status=ModelAccessStatus.LIMIT_EXCEEDED)
 
 
+    @staticmethod
+    def _last_user_text(messages: Optional[list[dict]]) -> str:
+        """Текст последнего сообщения пользователя; картинки и файлы — маркерами"""
+        for message in reversed(messages or []):
+            if message.get("role") != "user":
+                continue
+            content = message.get("content") or ""
+            if isinstance(content, str):
+                return content[:CLASSIFIER_MAX_CHARS]
+
+            parts = []
+            for part in content:
+                if part.get("type") == "text":
+                    parts.append(part.get("text", ""))
+                elif part.get("type") == "image_url":
+                    parts.append("[изображение]")
+                elif part.get("type") == "file":
+                    parts.append("[файл]")
+            return " ".join(parts)[:CLASSIFIER_MAX_CHARS]
+        return ""
+
+    @staticmethod
+    def _classification_cache_key(text: str, model_ids: list[int]) -> str:
+        normalized = re.sub(r"\s+", " ", text.lower()).strip(" .!?")
+        payload = f"{','.join(map(str, sorted(model_ids)))}|{normalized}"
+        return f"model:route:{hashlib.sha256(payload.encode()).hexdigest()}"
+
+    @staticmethod
+    def _parse_classification(reply: str, model_ids: list[int]) -> int | None:
+        for match in re.findall(r"\d+", reply or ""):
+            if int(match) in model_ids:
+                return int(match)
+        return None
+
     async def select_model_based_on_prompt(self, messages: Optional[list[dict]], allowed_model_ids: list[int]):
-        client = AsyncOpenAI(api_key=self.auto_model_token, base_url=self.auto_model_provider)
-
-        available_models = {
-            2: "повседневные задачи, простая математика",
-            3: "кодинг",
-            4: "сложный кодинг",
-            5: "интернет-поиск, доклады",
-            6: "научные исследования, поэтапные, много источников",
-            8: "сложная математика, генерация фото"
-        }
-
-        available_model_descriptions = {key: value for key, value in available_models.items() if
+        available_model_descriptions = {key: value for key, value in AVAILABLE_MODELS.items() if
                                         key in allowed_model_ids}
+        if not available_model_descriptions:
+            return 1
+
+        user_text = self._last_user_text(messages)
+
+        decision = self.router.route(user_text, list(available_model_descriptions))
+        if decision.model_id is not None:
+            return decision.model_id
+
+        cache_key = self._classification_cache_key(user_text, list(available_model_descriptions))
+
+        cached = await self.redis.get(cache_key)
+        if cached:
+            self.classification_stats.hit()
+            return int(cached)
+        self.classification_stats.miss()
+
         prompt_description = "\n".join([f"- {value}: {key}" for key, value in available_model_descriptions.items()])
         full_prompt = f"Ты — классификатор. Выбери айди модели, более подходящей под тип запроса пользователя. Отвечай одной цифрой согласно инструкции:\n{prompt_description}"
 
-        full_messages = [{"role": "system", "content": full_prompt}] + list(messages)
-        print(full_prompt)
-        response = await client.chat.completions.create(
+        response = await self.classifier_client.chat.completions.create(
             model=self.auto_model,
-            messages=full_messages,
-            timeout=30
+            messages=[
+                {"role": "system", "content": full_prompt},
+                {"role": "user", "content": user_text or "[пустое сообщение]"},
+            ],
         )
 
-        model_classification = response.choices[0].message.content
-
-        if "2" in model_classification:
-            return 2
-        elif "3" in model_classification:
-            return 3
-        elif "4" in model_classification:
-            return 4
-        elif "5" in model_classification:
-            return 5
-        elif "6" in model_classification:
-            return 6
-        elif "8" in model_classification:
-            return 8
-
-        return 1
\ No newline at end of file
+        model_id = self._parse_classification(response.choices[0].message.content,
+                                               list(available_model_descriptions))
+        if model_id is None:
+            return 1
+
+        await self.redis.set(cache_key, str(model_id), ttl=CLASSIFICATION_CACHE_TTL)
+        return model_id
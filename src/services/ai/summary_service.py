@@ -0,0 +1,117 @@
+from openai import AsyncOpenAI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models.user_ai_context import MessageType
+from src.adapters.cache.redis_cache import RedisCache
+from src.adapters.db.chat_history_repository import ChatHistoryRepository
+from src.adapters.db.dialog_repository import DialogRepository
+from src.services.ai.data_classes import MessageDTO
+
+# сворачиваем, когда несвёрнутых сообщений больше SUMMARY_TRIGGER_MESSAGES,
+# оставляя SUMMARY_KEEP_RECENT последних как есть
+SUMMARY_TRIGGER_MESSAGES = 30
+SUMMARY_KEEP_RECENT = 10
+SUMMARY_MAX_CHARS = 4000
+SUMMARY_MESSAGE_MAX_CHARS = 2000
+SUMMARY_LOCK_TTL = 120
+# за один запуск сворачиваем не больше стольких старых сообщений (и символов стенограммы):
+# длинный диалог догоняется за несколько ходов, а запрос укладывается в контекст и в SUMMARY_LOCK_TTL
+SUMMARY_FOLD_MAX_MESSAGES = 40
+SUMMARY_FOLD_MAX_CHARS = 24000
+
+SUMMARY_PROMPT = (
+    "Ты сжимаешь историю диалога пользователя с ассистентом. "
+    "Обнови краткое содержание с учётом новых сообщений: сохрани факты о пользователе, "
+    "договорённости, имена, числа, код и открытые вопросы. Пиши сжато, без вступлений, "
+    f"не длиннее {SUMMARY_MAX_CHARS} символов."
+)
+
+
+class DialogSummaryService:
+    """
+    Скользящее краткое содержание длинных диалогов на дешёвой auto_model.
+    Запускается в фоне после сохранения хода, результат хранится в Dialog.summary.
+    """
+
+    def __init__(self,
+                 config,
+                 redis: RedisCache,
+                 session_factory: async_sessionmaker[AsyncSession]):
+        self.redis = redis
+        self.session_factory = session_factory
+        self.model = config.auto_model
+        self.client = AsyncOpenAI(api_key=config.auto_model_token, base_url=config.auto_model_provider)
+
+    @staticmethod
+    def _lock_key(dialog_id: int) -> str:
+        return f"dialog:summary:lock:{dialog_id}"
+
+    async def maybe_summarize(self, dialog_id: int):
+        lock_key = self._lock_key(dialog_id)
+        if not await self.redis.set_if_not_exists(lock_key, "1", ttl=SUMMARY_LOCK_TTL):
+            return  # уже сворачивает другой воркер
+
+        try:
+            async with self.session_factory() as session:
+                await self._summarize(dialog_id=dialog_id, session=session)
+        finally:
+            await self.redis.delete(lock_key)
+
+    async def _summarize(self, dialog_id: int, session: AsyncSession):
+        dialog = await DialogRepository.get(dialog_id=dialog_id, session=session)
+        if dialog is None:
+            return
+
+        pending = await ChatHistoryRepository.count_after(session=session,
+                                                          dialog_id=dialog_id,
+                                                          after=dialog.summary_until)
+        if pending <= SUMMARY_TRIGGER_MESSAGES:
+            return
+
+        to_fold = await ChatHistoryRepository.load_after(session=session,
+                                                         dialog_id=dialog_id,
+                                                         after=dialog.summary_until,
+                                                         limit=min(pending - SUMMARY_KEEP_RECENT,
+                                                                   SUMMARY_FOLD_MAX_MESSAGES))
+        lines = []
+        size = 0
+        for message in to_fold:
+            line = self._format_message(message, dialog.user_id)
+            if lines and size + len(line) > SUMMARY_FOLD_MAX_CHARS:
+                break
+            lines.append(line)
+            size += len(line) + 1
+        to_fold = to_fold[:len(lines)]
+        if not to_fold:
+            return
+
+        transcript = "\n".join(lines)
+        previous = dialog.summary or "(пока пусто)"
+
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Текущее краткое содержание:\n{previous}\n\nНовые сообщения:\n{transcript}"},
+            ],
+            timeout=60,
+        )
+        summary = (response.choices[0].message.content or "").strip()[:SUMMARY_MAX_CHARS]
+        if not summary:
+            return
+
+        await DialogRepository.update_summary(dialog_id=dialog_id,
+                                              summary=summary,
+                                              summary_until=to_fold[-1].public_id,
+                                              session=session)
+        await session.commit()
+        print(f"dialog {dialog_id} summarized: folded {len(to_fold)} messages")
+
+    @staticmethod
+    def _format_message(message: MessageDTO, user_id: int) -> str:
+        author = "Пользователь" if message.author_id == user_id else "Ассистент"
+        if message.message_type == MessageType.IMAGE_URL:
+            return f"{author}: [изображение]"
+        if message.message_type == MessageType.FILE_URL:
+            return f"{author}: [файл {message.text.split('/')[-1]}]"
+        return f"{author}: {message.text[:SUMMARY_MESSAGE_MAX_CHARS]}"
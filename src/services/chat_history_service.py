@@ -1,27 +1,53 @@
+import asyncio
 import json
-from typing import Literal
+import uuid
+from dataclasses import replace
+from typing import Literal, Optional
 
 from src.adapters.cache.redis_cache import RedisCache
-from sqlalchemy.ext.asyncio import AsyncSession
+from src.adapters.cache.cache_stats import CacheStats
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from src.services.ai.data_classes import MessageDTO
 from openai.types.chat import (
     ChatCompletionUserMessageParam,
     ChatCompletionAssistantMessageParam,
+    ChatCompletionSystemMessageParam,
 )
 from src.adapters.db.chat_history_repository import ChatHistoryRepository
 from app.db.models.user_ai_context import MessageType
+from src.services.ai.summary_service import DialogSummaryService
 
 CACHE_TTL_SECONDS = 60 * 60 * 24 * 7
-HISTORY_LIMIT = 10
+# верхняя граница выборки; реальное окно режет ContextBuilder по токен-бюджету модели
+HISTORY_LIMIT = 40
 
 
 class ChatHistoryService:
-    def __init__(self, redis: RedisCache):
+    """
+    История диалога с write-through кэшем в Redis.
+
+    В кэше лежит один список на диалог (новые сообщения в голове) без фильтрации:
+    правила отбора картинок применяются при чтении, поэтому список общий для всех моделей.
+    """
+
+    def __init__(self,
+                 redis: RedisCache,
+                 session_factory: async_sessionmaker[AsyncSession],
+                 summary_service: Optional[DialogSummaryService] = None):
         self.redis = redis
+        self.session_factory = session_factory
+        self.summary_service = summary_service
+        self.stats = CacheStats()
+        # ссылки на фоновые записи, чтобы их не собрал GC и можно было дождаться при остановке
+        self._background_tasks: set[asyncio.Task] = set()
+        # диалог -> последняя фоновая запись хода: записи диалога идут по порядку, чтение их ждёт
+        self._dialog_writes: dict[int, asyncio.Task] = {}
+        # диалог -> счётчик начатых записей: по нему промах кэша понимает, что прочитал устаревшее
+        self._write_versions: dict[int, int] = {}
 
     @staticmethod
-    def _build_cache_key(user_id: int, model_id: int) -> str:
-        return f"chat:history:{user_id}:{model_id}"
+    def _build_cache_key(dialog_id: int) -> str:
+        return f"chat:history:{dialog_id}"
 
     @staticmethod
     def _msg_to_dict(msg: MessageDTO) -> dict:
@@ -32,6 +58,7 @@ class ChatHistoryService:
             "message_type": (
                 msg.message_type.value if isinstance(msg.message_type, MessageType) else str(msg.message_type)
             ),
+            "public_id": str(msg.public_id) if msg.public_id else None,
         }
 
     @staticmethod
@@ -40,8 +67,47 @@ class ChatHistoryService:
         # из строки -> Enum (бросит ValueError, если мусор)
         if isinstance(mt, str):
             mt = MessageType(mt)
-        return MessageDTO(text=d["text"], author_id=d["author_id"], message_type=mt)
+        public_id = d.get("public_id")
+        return MessageDTO(text=d["text"],
+                          author_id=d["author_id"],
+                          message_type=mt,
+                          public_id=uuid.UUID(public_id) if public_id else None)
+
+
+    @staticmethod
+    def _for_history(msg: MessageDTO) -> MessageDTO:
+        if msg.history_text is None:
+            return msg
+        return replace(msg, text=msg.history_text, history_text=None)
+
+    @staticmethod
+    async def _resolve_uploads(messages: list[MessageDTO]) -> list[MessageDTO]:
+        """
+        Дожидается фоновых загрузок картинок: в историю идёт ссылка только на загруженный объект.
+        Картинку, которую загрузить не удалось, в историю не пишем — ссылка на неё была бы битой.
+        """
+        resolved = []
+        for message in messages:
+            if message.history_upload is not None:
+                try:
+                    link = await message.history_upload
+                except Exception as e:
+                    print(f"history image upload failed: {e!r}")
+                    link = None
+                if not link:
+                    continue
+                message.history_text, message.history_upload = link, None
+            resolved.append(message)
+        return resolved
 
+    def _begin_write(self, dialog_id: int):
+        self._write_versions[dialog_id] = self._write_versions.get(dialog_id, 0) + 1
+
+    async def _cache_append(self, dialog_id: int, messages: list[MessageDTO]):
+        key = ChatHistoryService._build_cache_key(dialog_id)
+        values = [json.dumps(ChatHistoryService._msg_to_dict(msg)) for msg in messages]
+        # если списка в кэше нет, его соберёт следующий get_history из БД
+        await self.redis.push_if_exists(key, values, max_len=HISTORY_LIMIT, ttl=CACHE_TTL_SECONDS)
 
     async def save_message(
         self,
@@ -50,8 +116,8 @@ class ChatHistoryService:
         text: str,
         session: AsyncSession,
         message_type: MessageType = MessageType.TEXT,
-        model_id: int = 1
     ):
+        self._begin_write(dialog_id)
         await ChatHistoryRepository.save_message(session=session,
                                                  dialog_id=dialog_id,
                                                  author_id=author_id,
@@ -60,72 +126,128 @@ class ChatHistoryService:
 
         await session.commit()
 
-        key = ChatHistoryService._build_cache_key(dialog_id, model_id)
-        entry = ChatHistoryService._msg_to_dict(MessageDTO(text=text, author_id=author_id, message_type=message_type))
-        await self.redis.lpush(key, json.dumps(entry))
-        await self.redis.ltrim(key, 0, HISTORY_LIMIT - 1)
-        await self.redis.expire(key, CACHE_TTL_SECONDS)
+        await self._cache_append(dialog_id, [MessageDTO(text=text, author_id=author_id, message_type=message_type)])
 
 
     async def save_messages(self,
                             messages: list[MessageDTO],
                             dialog_id: int,
-                            author_id: int,
-                            session: AsyncSession,):
-        for message in messages:
-            public_id = await ChatHistoryRepository.save_message(
-                dialog_id=dialog_id,
-                author_id=author_id,
-                text=message.text,
-                message_type=message.message_type,
-                session=session,
-            )
+                            session: AsyncSession,) -> uuid.UUID | None:
+        """Сохраняет ход диалога одним INSERT и дописывает его в кэш. Возвращает public_id последнего сообщения."""
+        messages = await self._resolve_uploads(messages)
+        self._begin_write(dialog_id)
+        stored = [self._for_history(message) for message in messages]
+        public_ids = await ChatHistoryRepository.save_messages(session=session,
+                                                               dialog_id=dialog_id,
+                                                               messages=stored)
         await session.commit()
-        return public_id
 
+        for message, stored_message, public_id in zip(messages, stored, public_ids):
+            message.public_id = stored_message.public_id = public_id
+
+        await self._cache_append(dialog_id, stored)
+        return public_ids[-1] if public_ids else None
+
+    def save_messages_background(self, messages: list[MessageDTO], dialog_id: int):
+        """
+        Запись хода диалога вне пути ответа: своя сессия, ошибки только логируются.
+        Записи одного диалога выполняются по очереди, а get_history этого диалога дожидается
+        их, поэтому следующий ход видит предыдущий. После записи при необходимости
+        сворачивает старую часть диалога в краткое содержание (отдельной задачей).
+        """
+        previous = self._dialog_writes.get(dialog_id)
+
+        async def write():
+            if previous is not None:
+                await asyncio.wait({previous})
+            async with self.session_factory() as session:
+                await self.save_messages(messages=messages, dialog_id=dialog_id, session=session)
+
+        task = asyncio.create_task(write())
+        self._dialog_writes[dialog_id] = task
+        self._background_tasks.add(task)
+        task.add_done_callback(lambda done: self._on_write_done(dialog_id, done))
+
+    def _on_write_done(self, dialog_id: int, task: asyncio.Task):
+        if self._dialog_writes.get(dialog_id) is task:
+            del self._dialog_writes[dialog_id]
+        self._on_background_done(task)
+        if self.summary_service is not None and not task.cancelled() and not task.exception():
+            summary = asyncio.create_task(self.summary_service.maybe_summarize(dialog_id=dialog_id))
+            self._background_tasks.add(summary)
+            summary.add_done_callback(self._on_background_done)
+
+    def _on_background_done(self, task: asyncio.Task):
+        self._background_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"chat history background write failed: {task.exception()!r}")
+
+    async def wait_dialog_writes(self, dialog_id: int):
+        """Дождаться фоновой записи диалога (без отмены её, если отменят ожидающего)"""
+        task = self._dialog_writes.get(dialog_id)
+        if task is not None:
+            await asyncio.wait({task})
+
+    async def wait_background(self):
+        """Дождаться незавершённых фоновых записей (при остановке приложения)"""
+        # после записи может запуститься свёртка диалога — ждём, пока задачи не кончатся
+        while self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+    @staticmethod
+    def _filter_for_model(messages: list[MessageDTO], model_id: int) -> list[MessageDTO]:
+        """Картинки в истории — только для авто-модели (лимит по количеству — в ContextBuilder)"""
+        if model_id == 1:
+            return messages
+        return [message for message in messages if message.message_type != MessageType.IMAGE_URL]
 
     async def get_history(
         self,
         dialog_id: int,
         bot_id: int,
         model_id: int,
-        session: AsyncSession
-    ) -> list[ChatCompletionUserMessageParam | ChatCompletionAssistantMessageParam]:
-        print('get history')
-
-        key = ChatHistoryService._build_cache_key(dialog_id, model_id)
+        session: AsyncSession,
+        summary: Optional[str] = None,
+        summary_until: Optional[uuid.UUID] = None,
+    ) -> list[ChatCompletionSystemMessageParam | ChatCompletionUserMessageParam | ChatCompletionAssistantMessageParam]:
+        """
+        Хвост диалога для модели. Если у диалога есть краткое содержание, оно идёт первым
+        system-сообщением, а свёрнутые в него сообщения (public_id <= summary_until) пропускаются.
+        """
+        await self.wait_dialog_writes(dialog_id)
+        key = ChatHistoryService._build_cache_key(dialog_id)
 
         cached = await self.redis.lrange(key, 0, HISTORY_LIMIT - 1)
-        cached = False
         if cached:
+            self.stats.hit()
             messages = [ChatHistoryService._dict_to_msg(json.loads(item)) for item in reversed(cached)]
         else:
-            history_messages = await ChatHistoryRepository.load_history(session=session,
-                                                                        dialog_id=dialog_id,
-                                                                        limit=HISTORY_LIMIT)
-
-            messages = []
-            image_count = 0
-
-            for history_message in history_messages:
-                if model_id != 1 and history_message.message_type == MessageType.IMAGE_URL:
-                    continue
-
-                if history_message.message_type == MessageType.IMAGE_URL:
-                    if image_count >= 2:
-                        continue
-                    image_count += 1
+            self.stats.miss()
+            version = self._write_versions.get(dialog_id, 0)
+            messages = await ChatHistoryRepository.load_history(session=session,
+                                                                dialog_id=dialog_id,
+                                                                limit=HISTORY_LIMIT)
 
-                messages.append(history_message)
+            # запись, начатая во время загрузки, могла не попасть в выборку, а её push_if_exists
+            # пропущен (ключа ещё нет) — такой список не кладём, иначе кэш останется без хода до TTL
+            if self._write_versions.get(dialog_id, 0) == version:
+                # в кэше список от новых к старым, как его наращивает LPUSH
+                await self.redis.replace_list(key,
+                                              [json.dumps(self._msg_to_dict(msg)) for msg in reversed(messages)],
+                                              ttl=CACHE_TTL_SECONDS)
 
-            for msg in messages:
-                await self.redis.lpush(key, json.dumps(self._msg_to_dict(msg)))
-            await self.redis.ltrim(key, 0, HISTORY_LIMIT - 1)
-            await self.redis.expire(key, CACHE_TTL_SECONDS)
+        history = []
+        if summary:
+            history.append(ChatCompletionSystemMessageParam(
+                role="system",
+                content=f"Краткое содержание предыдущей части диалога:\n{summary}",
+            ))
+            if summary_until is not None:
+                messages = [msg for msg in messages if msg.public_id is None or msg.public_id > summary_until]
 
-        return [
+        return history + [
             ChatHistoryService.msg_to_completion_param(msg, bot_id)
-            for msg in messages
+            for msg in ChatHistoryService._filter_for_model(messages, model_id)
         ]
 
     @staticmethod
@@ -11,7 +11,9 @@ from reportlab.pdfgen import canvas
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import mm
-from typing import Union, IO
+from typing import Union, IO, Iterator
+
+from src.services.process_executor import ProcessExecutor
 
 try:
     import docx  # python-docx
@@ -19,6 +21,20 @@ except ImportError:
     docx = None
 
 
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# строк в одной таблице reportlab (~страница при шрифте 8)
+ROWS_PER_TABLE = 40
+CSV_CHUNK_ROWS = 1000
+
+
+class ConversionLimitError(ValueError):
+    """Файл слишком большой: по размеру входа или по числу страниц PDF"""
+
+
 class SimpleFileToPDF:
     """
     Лёгкий конвертер без LibreOffice:
@@ -30,12 +46,28 @@ class SimpleFileToPDF:
 
     SUPPORTED = {".docx", ".xlsx", ".xls", ".csv", ".txt"}
 
-    def __init__(self, page_size=A4, table_landscape=True, margin_mm=15):
+    def __init__(self,
+                 page_size=A4,
+                 table_landscape=True,
+                 margin_mm=15,
+                 max_pages: Optional[int] = None,
+                 max_rows: Optional[int] = None):
         self.page_size = page_size
         self.table_landscape = table_landscape
         self.margin = margin_mm * mm
+        self.max_pages = max_pages
+        self.max_rows = max_rows
         self.styles = getSampleStyleSheet()
 
+    def _check_pages(self, pages: int):
+        if self.max_pages is not None and pages > self.max_pages:
+            raise ConversionLimitError(f"Документ длиннее {self.max_pages} страниц")
+
+    def _show_page(self, c: canvas.Canvas):
+        """showPage с проверкой лимита страниц — огромную таблицу обрываем, а не вёрстаем до конца"""
+        c.showPage()
+        self._check_pages(c.getPageNumber())
+
     def _to_input_bytes(self, data: Union[bytes, bytearray, memoryview, IO[bytes]]) -> bytes:
         """Приводит вход к bytes: поддерживает bytes/bytearray/memoryview/файлоподобные (BytesIO)."""
         if isinstance(data, bytes):
@@ -130,12 +162,10 @@ class SimpleFileToPDF:
             elements.append(tbl)
             elements.append(Spacer(1, 10))
 
-        doc_tpl.build(elements)
+        doc_tpl.build(elements, onLaterPages=lambda c, d: self._check_pages(d.page))
         return buf.getvalue()
 
     def _excel_to_pdf(self, path: str) -> bytes:
-        # читаем все листы
-        xls = pd.ExcelFile(path)
         buf = io.BytesIO()
 
         # Для широких таблиц перевернём страницу в альбомную
@@ -144,17 +174,46 @@ class SimpleFileToPDF:
         c = canvas.Canvas(buf, pagesize=pagesize)
         width, height = pagesize
 
-        for i, sheet in enumerate(xls.sheet_names):
-            df = xls.parse(sheet_name=sheet)
-            self._draw_dataframe_as_tables(c, df, page_title=f"{os.path.basename(path)} — {sheet}", width=width, height=height)
-            if i < len(xls.sheet_names) - 1:
-                c.showPage()
+        for i, (sheet, rows) in enumerate(self._iter_excel_sheets(path)):
+            if i > 0:
+                self._show_page(c)
+            self._draw_rows_as_tables(c, rows, page_title=f"{os.path.basename(path)} — {sheet}", width=width, height=height)
         c.save()
         return buf.getvalue()
 
+    def _iter_excel_sheets(self, path: str) -> Iterator[tuple[str, Iterator[list[str]]]]:
+        """Листы как ленивые итераторы строк: .xlsx — openpyxl read_only, строки не держим в памяти"""
+        if path.endswith(".xlsx") and openpyxl is not None:
+            wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            try:
+                for ws in wb.worksheets:
+                    yield ws.title, ([self._cell(v) for v in row] for row in ws.iter_rows(values_only=True))
+            finally:
+                wb.close()
+            return
+
+        # .xls (xlrd) построчно читать нельзя — лист целиком, но без лишних копий
+        xls = pd.ExcelFile(path)
+        for sheet in xls.sheet_names:
+            df = xls.parse(sheet_name=sheet, header=None, dtype=str, keep_default_na=False)
+            yield sheet, (list(row) for row in df.itertuples(index=False, name=None))
+
     def _csv_to_pdf(self, path: str) -> bytes:
-        df = pd.read_csv(path)
-        return self._df_to_pdf(df, title=os.path.basename(path))
+        buf = io.BytesIO()
+        pagesize = landscape(self.page_size) if self.table_landscape else self.page_size
+        c = canvas.Canvas(buf, pagesize=pagesize)
+        width, height = pagesize
+        self._draw_rows_as_tables(c, self._iter_csv_rows(path), page_title=os.path.basename(path),
+                                  width=width, height=height)
+        c.save()
+        return buf.getvalue()
+
+    @staticmethod
+    def _iter_csv_rows(path: str) -> Iterator[list[str]]:
+        """CSV кусками по CSV_CHUNK_ROWS: в памяти только текущий кусок"""
+        reader = pd.read_csv(path, header=None, dtype=str, keep_default_na=False, chunksize=CSV_CHUNK_ROWS)
+        for chunk in reader:
+            yield from (list(row) for row in chunk.itertuples(index=False, name=None))
 
     def _txt_to_pdf(self, path: str) -> bytes:
         with open(path, "r", encoding="utf-8", errors="ignore") as f:
@@ -173,7 +232,7 @@ class SimpleFileToPDF:
             lines = textwrap.wrap(paragraph, width=max_width_chars) or [""]
             for ln in lines:
                 if y < self.margin + line_h:
-                    c.showPage()
+                    self._show_page(c)
                     y = height - self.margin
                 c.drawString(x, y, ln)
                 y -= line_h
@@ -183,16 +242,16 @@ class SimpleFileToPDF:
 
     # ---------- Вспомогательное ----------
 
-    def _df_to_pdf(self, df: pd.DataFrame, title: Optional[str] = None) -> bytes:
-        buf = io.BytesIO()
-        pagesize = landscape(self.page_size) if self.table_landscape else self.page_size
-        c = canvas.Canvas(buf, pagesize=pagesize)
-        width, height = pagesize
-        self._draw_dataframe_as_tables(c, df, page_title=title, width=width, height=height)
-        c.save()
-        return buf.getvalue()
+    @staticmethod
+    def _cell(value) -> str:
+        return "" if value is None else str(value)
 
-    def _draw_dataframe_as_tables(self, c: canvas.Canvas, df: pd.DataFrame, page_title: Optional[str], width, height):
+    def _draw_rows_as_tables(self, c: canvas.Canvas, rows: Iterator[list[str]], page_title: Optional[str], width, height):
+        """
+        Первая строка — заголовок, повторяется в каждой таблице. Строки идут из итератора
+        и рисуются по ROWS_PER_TABLE: в памяти одна таблица, а не весь лист.
+        Сверх max_rows строки только досчитываются, в конце — пометка об обрезке.
+        """
         # поля
         x0 = self.margin
         y = height - self.margin
@@ -203,20 +262,16 @@ class SimpleFileToPDF:
             c.drawString(x0, y, page_title)
             y -= 16
 
-        # конвертируем DataFrame в список списков, с заголовками
-        header = [str(col) for col in df.columns]
-        data_rows = df.astype(str).values.tolist()
-        data = [header] + data_rows
-
-        # Порционируем по ~40 строк на таблицу (зависит от шрифта/полей)
-        rows_per_page = 40
-        start = 0
-        while start < len(data):
-            chunk = data[start:start + rows_per_page]
-            table = self._make_table(chunk, max_width=width - 2 * self.margin)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        def draw(chunk: list[list[str]]):
+            nonlocal y
+            table = self._make_table([header] + chunk, max_width=width - 2 * self.margin)
             w, h = table.wrapOn(c, width, height)
             if y - h < self.margin:
-                c.showPage()
+                self._show_page(c)
                 y = height - self.margin
                 if page_title:
                     c.setFont("Helvetica-Bold", 12)
@@ -224,7 +279,28 @@ class SimpleFileToPDF:
                     y -= 16
             table.drawOn(c, x0, y - h)
             y -= (h + 10)
-            start += rows_per_page
+
+        chunk: list[list[str]] = []
+        rendered = 0
+        skipped = 0
+        for row in rows:
+            if self.max_rows is not None and rendered >= self.max_rows:
+                skipped += 1
+                continue
+            chunk.append(row)
+            rendered += 1
+            if len(chunk) == ROWS_PER_TABLE:
+                draw(chunk)
+                chunk = []
+        if chunk or not rendered:
+            draw(chunk)
+
+        if skipped:
+            if y - 16 < self.margin:
+                self._show_page(c)
+                y = height - self.margin
+            c.setFont("Helvetica-Oblique", 9)
+            c.drawString(x0, y - 12, f"... показаны первые {rendered} из {rendered + skipped} строк")
 
     def _make_table(self, data, max_width=None):
         # ширины колонок по содержимому (грубая оценка)
@@ -254,3 +330,67 @@ class SimpleFileToPDF:
         import mimetypes
         ext = mimetypes.guess_extension(mime or "") or ""
         return ext.lower()
+
+
+def convert_file(file_bytes: bytes,
+                 filename: Optional[str],
+                 mime_type: Optional[str],
+                 max_pages: Optional[int],
+                 max_rows: Optional[int] = None) -> bytes:
+    """Выполняется в процессе-воркере DocumentConverter"""
+    return (SimpleFileToPDF(max_pages=max_pages, max_rows=max_rows)
+            .convert(file_bytes, filename=filename, mime_type=mime_type))
+
+
+class DocumentConverter:
+    """
+    SimpleFileToPDF в пуле процессов: pandas/reportlab на большом XLSX не блокируют бота,
+    а зависшая конвертация убивается по таймауту.
+    """
+
+    def __init__(self,
+                 workers: int = 2,
+                 max_queue: int = 16,
+                 max_input_bytes: int = 20 * 1024 * 1024,
+                 max_pages: int = 200,
+                 max_rows: Optional[int] = 5000,
+                 text_max_tokens: int = 6000,
+                 timeout: float = 60):
+        self.max_input_bytes = max_input_bytes
+        self.max_pages = max_pages
+        self.max_rows = max_rows
+        self.text_max_tokens = text_max_tokens
+        self.timeout = timeout
+        self.executor = ProcessExecutor(name="converter", workers=workers, max_queue=max_queue)
+
+    def check_size(self, size: Optional[int]):
+        if size is not None and size > self.max_input_bytes:
+            raise ConversionLimitError(f"Файл больше {self.max_input_bytes // (1024 * 1024)} МБ")
+
+    async def convert(self, file_bytes, filename: Optional[str] = None, mime_type: Optional[str] = None) -> bytes:
+        file_bytes = file_bytes.getvalue() if isinstance(file_bytes, io.BytesIO) else bytes(file_bytes)
+        self.check_size(len(file_bytes))
+        return await self.executor.run(convert_file, file_bytes, filename, mime_type, self.max_pages, self.max_rows,
+                                       timeout=self.timeout)
+
+    async def extract_text(self,
+                           file_bytes,
+                           api_name: str,
+                           context_token_budget: Optional[int] = None,
+                           filename: Optional[str] = None,
+                           mime_type: Optional[str] = None):
+        """
+        Текст документа (см. DocumentTextExtractor) — в том же пуле. Токены считаются словарём
+        модели api_name, лимит — text_max_tokens, но не больше доли её context_token_budget.
+        """
+        # document_extractor сам импортирует этот модуль
+        from src.services.document_extractor import extract_text, document_token_limit
+
+        file_bytes = file_bytes.getvalue() if isinstance(file_bytes, io.BytesIO) else bytes(file_bytes)
+        self.check_size(len(file_bytes))
+        max_tokens = document_token_limit(self.text_max_tokens, context_token_budget)
+        return await self.executor.run(extract_text, file_bytes, filename, mime_type, max_tokens, api_name,
+                                       timeout=self.timeout)
+
+    def shutdown(self):
+        self.executor.shutdown()
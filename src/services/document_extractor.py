@@ -0,0 +1,149 @@
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from itertools import chain
+from typing import Iterator, Optional
+
+from src.services.ai.context_builder import ContextBuilder
+from src.services.converter import SimpleFileToPDF
+
+try:
+    import docx  # python-docx
+except ImportError:
+    docx = None
+
+# форматы, в которых текст уже есть: их отдаём модели текстом, без PDF
+TEXT_NATIVE = {".txt", ".md", ".csv", ".docx", ".xlsx"}
+
+DEFAULT_TEXT_MAX_TOKENS = 6000
+# модель по умолчанию для подсчёта токенов, если выбранную не удалось найти
+DEFAULT_API_NAME = "gpt-4o"
+# документ занимает не больше этой доли токен-бюджета модели, остальное — история диалога
+DOCUMENT_BUDGET_SHARE = 0.5
+TRUNCATED_NOTE = "\n\n[... документ обрезан: показано начало ...]"
+
+# один на процесс-воркер: токенайзер загружается один раз, блокировка воркера допустима
+_counter = ContextBuilder(load_on_demand=True)
+
+
+@dataclass
+class ExtractedText:
+    text: str
+    tokens: int
+    truncated: bool
+
+
+class DocumentTextExtractor:
+    """
+    Текст документа для модели вместо PDF: абзацы как есть, таблицы — markdown.
+    Строки читаются потоково (те же итераторы, что у SimpleFileToPDF) и добавляются,
+    пока укладываются в max_tokens.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_TEXT_MAX_TOKENS, api_name: str = DEFAULT_API_NAME):
+        self.max_tokens = max_tokens
+        self.api_name = api_name
+        self.counter = _counter
+        self.tables = SimpleFileToPDF()
+
+    @staticmethod
+    def detect_ext(filename: Optional[str], mime_type: Optional[str]) -> str:
+        return SimpleFileToPDF()._detect_ext(filename, mime_type)
+
+    @classmethod
+    def supports(cls, filename: Optional[str], mime_type: Optional[str]) -> bool:
+        return cls.detect_ext(filename, mime_type) in TEXT_NATIVE
+
+    def extract(self, file_bytes: bytes, filename: Optional[str] = None, mime_type: Optional[str] = None) -> ExtractedText:
+        ext = self.detect_ext(filename, mime_type)
+        if ext not in TEXT_NATIVE:
+            raise ValueError(f"Неподдерживаемое расширение для текста: {ext}")
+
+        if ext in (".txt", ".md"):
+            lines = io.StringIO(file_bytes.decode("utf-8", errors="ignore"))
+        elif ext == ".csv":
+            lines = self._csv_lines(file_bytes)
+        elif ext == ".xlsx":
+            lines = self._xlsx_lines(file_bytes)
+        else:
+            lines = self._docx_lines(file_bytes)
+
+        title = f"Файл {filename}:\n\n" if filename else ""
+        return self._take(chain([title], (line.rstrip("\n") + "\n" for line in lines)))
+
+    def _take(self, lines: Iterator[str]) -> ExtractedText:
+        parts = []
+        tokens = 0
+        for line in lines:
+            line_tokens = self.counter.count_text_tokens(line, self.api_name)
+            if tokens + line_tokens > self.max_tokens:
+                # строку, не влезающую целиком (длинный абзац), берём до остатка бюджета
+                head = self.counter.truncate_text_tokens(line, self.max_tokens - tokens, self.api_name)
+                if head.strip():
+                    parts.append(head)
+                    tokens += self.counter.count_text_tokens(head, self.api_name)
+                return ExtractedText(text="".join(parts).rstrip() + TRUNCATED_NOTE, tokens=tokens, truncated=True)
+            parts.append(line)
+            tokens += line_tokens
+        return ExtractedText(text="".join(parts).rstrip(), tokens=tokens, truncated=False)
+
+    @staticmethod
+    def _cell(value: str) -> str:
+        return str(value).replace("|", "\\|").replace("\n", " ").strip()
+
+    def _markdown_table(self, rows: Iterator[list[str]]) -> Iterator[str]:
+        header = next(rows, None)
+        if header is None:
+            return
+        yield "| " + " | ".join(self._cell(v) for v in header) + " |"
+        yield "|" + " --- |" * len(header)
+        for row in rows:
+            yield "| " + " | ".join(self._cell(v) for v in row) + " |"
+
+    def _csv_lines(self, file_bytes: bytes) -> Iterator[str]:
+        return self._markdown_table(self._with_file(file_bytes, ".csv", self.tables._iter_csv_rows))
+
+    def _xlsx_lines(self, file_bytes: bytes) -> Iterator[str]:
+        for sheet, rows in self._with_file(file_bytes, ".xlsx", self.tables._iter_excel_sheets):
+            yield f"## {sheet}"
+            yield from self._markdown_table(rows)
+            yield ""
+
+    def _docx_lines(self, file_bytes: bytes) -> Iterator[str]:
+        if docx is None:
+            raise RuntimeError("Не установлен python-docx: pip install python-docx")
+        doc = docx.Document(io.BytesIO(file_bytes))
+        for para in doc.paragraphs:
+            text = para.text.strip()
+            style_name = (para.style.name or "").lower()
+            yield f"## {text}" if text and "heading" in style_name else text
+        for table in doc.tables:
+            yield ""
+            yield from self._markdown_table([cell.text for cell in row.cells] for row in table.rows)
+
+    @staticmethod
+    def _with_file(file_bytes: bytes, ext: str, iterate) -> Iterator:
+        """Итераторы SimpleFileToPDF читают из файла: временный файл живёт, пока идёт чтение"""
+        with tempfile.TemporaryDirectory() as td:
+            path = os.path.join(td, f"input{ext}")
+            with open(path, "wb") as f:
+                f.write(file_bytes)
+            yield from iterate(path)
+
+
+def document_token_limit(max_tokens: int, context_token_budget: Optional[int]) -> int:
+    """Лимит текста документа: max_tokens, но не больше доли бюджета модели, которая его получит"""
+    if not context_token_budget:
+        return max_tokens
+    return min(max_tokens, int(context_token_budget * DOCUMENT_BUDGET_SHARE))
+
+
+def extract_text(file_bytes: bytes,
+                 filename: Optional[str],
+                 mime_type: Optional[str],
+                 max_tokens: int,
+                 api_name: str) -> ExtractedText:
+    """Выполняется в процессе-воркере DocumentConverter; токены считаются словарём модели api_name"""
+    return (DocumentTextExtractor(max_tokens=max_tokens, api_name=api_name)
+            .extract(file_bytes, filename=filename, mime_type=mime_type))
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from html.parser import HTMLParser
 import html as ihtml
 import re
@@ -5,15 +6,48 @@ import re
 TG_TAGS = {"b","strong","i","em","u","ins","s","strike","del","a","code","pre","blockquote","br","span"}
 BLOCKY = {"p","div","section","article","header","footer","h1","h2","h3","h4","h5","h6","ul","ol","li"}
 SPAN_ALLOWED_CLASSES = {"tg-spoiler"}  # единственный разрешённый класс у <span> в TG
+_MANY_NEWLINES_RE = re.compile(r"\n{3,}")
+
+
+@dataclass
+class SanitizedSnapshot:
+    stable: str     # уже не изменится при следующих feed()
+    tail: str       # закрывающие теги для открытых сейчас (с пробелами перед ними)
+
+    @property
+    def text(self) -> str:
+        return self.stable + self.tail
+
 
 class TelegramHTMLSanitizer(HTMLParser):
+    """
+    Можно кормить дельтами: feed() разбирает только новый кусок (недописанный тег
+    HTMLParser держит до следующего feed), стек тегов сохраняется между вызовами,
+    а snapshot() отдаёт текущий результат без повторного разбора всего текста.
+    """
+
     def __init__(self):
         super().__init__(convert_charrefs=False)
         self.out = []
         self.stack = []
         self.in_pre = False
+        self._pending = ""      # пробелы в конце вывода: отдаём, когда после них придёт не-пробел
+        self._started = False
 
-    def _push(self, s): self.out.append(s)
+    def _push(self, s):
+        # переносы нормализуем на лету, а не регуляркой по всему выводу в get_sanitized
+        if self._pending:
+            s = self._pending + s
+        body = s.rstrip()
+        self._pending = s[len(body):]
+        if not body:
+            return
+        if not self._started:
+            body = body.lstrip()
+            self._started = True
+        if "\n\n\n" in body:
+            body = _MANY_NEWLINES_RE.sub("\n\n", body)
+        self.out.append(body)
 
     def handle_starttag(self, tag, attrs):
         tag = tag.lower()
@@ -113,13 +147,145 @@ class TelegramHTMLSanitizer(HTMLParser):
             if t == "pre":
                 self.in_pre = False
             self._push(f"</{t}>")
-        # нормализуем пустые строки
-        text = "".join(self.out)
-        text = re.sub(r"\n{3,}", "\n\n", text).strip()
-        return text
+        return "".join(self.out)
+
+    def flush(self) -> str:
+        """
+        Конец ввода: то, что HTMLParser ещё держит в rawdata (голый «&» или «<», «&amp» без «;»),
+        выводится как текст, открытые теги закрываются. Возвращает итоговый HTML.
+        """
+        tail, self.rawdata = self.rawdata, ""
+        if tail:
+            self.handle_data(tail)
+        return self.get_sanitized()
+
+    @property
+    def pending(self) -> str:
+        """Пробелы в конце вывода, ещё не попавшие в stable"""
+        return self._pending
+
+    def snapshot(self) -> SanitizedSnapshot:
+        """Результат на текущий момент, без close(): открытые теги закрыты во временном хвосте"""
+        if not self.stack:
+            return SanitizedSnapshot(stable="".join(self.out), tail="")
+        closing = "".join(f"</{t}>" for t in reversed(self.stack))
+        return SanitizedSnapshot(stable="".join(self.out),
+                                 tail=_MANY_NEWLINES_RE.sub("\n\n", self._pending) + closing)
 
 def sanitize_to_telegram_html(s: str) -> str:
     p = TelegramHTMLSanitizer()
     p.feed(s)
     p.close()
     return p.get_sanitized()
+
+
+TELEGRAM_LIMIT = 4096
+
+# атомы уже санитизированного HTML: тег, сущность, слово с пробелами после него, пробелы
+_HTML_ATOM_RE = re.compile(r"<[^<>]*>|&#?\w+;|[^\s<&]+\s*|\s+|[<&]")
+_TAG_NAME_RE = re.compile(r"<(/?)([a-zA-Z0-9-]+)")
+SENTENCE_END = (".", "!", "?", "…")
+
+
+def utf16_len(s: str) -> int:
+    """Длина так, как её считает Telegram: в UTF-16 единицах (эмодзи — две)"""
+    return len(s.encode("utf-16-le")) // 2
+
+
+def _break_rank(atom: str) -> int:
+    """Насколько удачно резать после атома: абзац > строка > предложение > слово; -1 — нельзя"""
+    if "\n\n" in atom:
+        return 3
+    if "\n" in atom:
+        return 2
+    word = atom.rstrip()
+    if word == atom:
+        return -1
+    return 1 if word.endswith(SENTENCE_END) else 0
+
+
+def _closing(stack: list[tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(stack))
+
+
+def _opening(stack: list[tuple[str, str]]) -> str:
+    return "".join(tag for _, tag in stack)
+
+
+def _split_atoms(atoms: list[str], limit: int, keep_last: bool = False) -> list[str]:
+    chunks = []
+    stack: list[tuple[str, str]] = []      # открытые теги: (имя, открывающий тег целиком)
+    start, prefix = 0, ""
+    size = 0
+    breaks = []                             # (ранг, индекс атома после разреза, размер, стек)
+    visible = False                         # в части уже есть текст: резать раньше бессмысленно
+    i = 0
+
+    def emit(end: int, end_stack: list[tuple[str, str]], last: bool = False):
+        chunk = prefix + "".join(atoms[start:end]) + _closing(end_stack)
+        if (last and keep_last) or re.sub(r"<[^>]*>", "", chunk).strip():
+            chunks.append(chunk)
+
+    while i < len(atoms):
+        atom = atoms[i]
+        new_stack = stack
+        match = _TAG_NAME_RE.match(atom) if atom.startswith("<") else None
+        if match:
+            closing, name = match.group(1), match.group(2).lower()
+            if closing and stack and stack[-1][0] == name:
+                new_stack = stack[:-1]
+            elif not closing and name != "br" and not atom.endswith("/>"):
+                new_stack = stack + [(name, atom)]
+
+        atom_size = utf16_len(atom)
+        # в начале части атом, который не режется (тег, один символ), берём как есть
+        unsplittable = i == start and (match is not None or len(atom) == 1)
+        if size + atom_size + utf16_len(_closing(new_stack)) <= limit or unsplittable:
+            stack = new_stack
+            size += atom_size
+            i += 1
+            if match:
+                continue
+            visible = visible or not atom.isspace()
+            rank = _break_rank(atom)
+            if rank >= 0 and visible:
+                breaks.append((rank, i, size, stack))
+            continue
+
+        if i == start:
+            # один атом больше лимита (очень длинное «слово») — режем сам текст
+            room = max(limit - size - utf16_len(_closing(stack)), 1)
+            head = atom[:room]
+            while utf16_len(head) > room and len(head) > 1:
+                head = head[:-1]
+            atoms[i:i + 1] = [head, atom[len(head):]]
+            continue
+
+        # лучший разрез: самый «крупный» во второй половине сообщения, иначе любой, иначе перед атомом
+        late = [b for b in breaks if b[2] > limit // 2] or breaks
+        if late:
+            _, end, _, end_stack = max(late, key=lambda b: (b[0], b[1]))
+        else:
+            end, end_stack = i, stack
+        emit(end, end_stack)
+
+        # следующее сообщение открывает те же теги заново
+        stack = list(end_stack)
+        start, prefix = end, _opening(stack)
+        size = utf16_len(prefix)
+        breaks = []
+        visible = False
+        i = end
+
+    emit(len(atoms), stack, last=True)
+    return chunks
+
+
+def split_telegram_html(html: str, limit: int = TELEGRAM_LIMIT, keep_last: bool = False) -> list[str]:
+    """
+    Делит санитизированный Telegram HTML на сообщения не длиннее limit UTF-16 единиц.
+    Режет по границе абзаца, строки, предложения или слова (не внутри тега и сущности);
+    открытые на разрезе теги закрываются в конце части и открываются заново в следующей.
+    keep_last — последняя часть возвращается, даже если в ней одни теги (её продолжат дописывать).
+    """
+    return _split_atoms(_HTML_ATOM_RE.findall(html), limit, keep_last=keep_last)
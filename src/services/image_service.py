@@ -0,0 +1,56 @@
+import base64
+from dataclasses import dataclass
+from io import BytesIO
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ~1.2 Мп: крупнее провайдер всё равно уменьшит, а токены посчитает
+DEFAULT_MAX_PIXELS = 1280 * 960
+DEFAULT_JPEG_QUALITY = 85
+
+
+@dataclass
+class PreparedImage:
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    resized: bool
+
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode()}"
+
+
+def prepare_image(data: bytes,
+                  max_pixels: int = DEFAULT_MAX_PIXELS,
+                  quality: int = DEFAULT_JPEG_QUALITY) -> PreparedImage:
+    """
+    Уменьшает картинку больше max_pixels (с сохранением пропорций) и пережимает в JPEG.
+    Без Pillow или для нераспознанного формата — отдаёт как есть.
+    """
+    if Image is None:
+        return PreparedImage(data=data, mime_type="image/jpeg", width=0, height=0, resized=False)
+
+    try:
+        image = Image.open(BytesIO(data))
+        width, height = image.size
+    except Exception as e:
+        print(f"image is not recognized: {e}")
+        return PreparedImage(data=data, mime_type="image/jpeg", width=0, height=0, resized=False)
+
+    if width * height <= max_pixels and image.format == "JPEG":
+        return PreparedImage(data=data, mime_type="image/jpeg", width=width, height=height, resized=False)
+
+    scale = min(1.0, (max_pixels / (width * height)) ** 0.5)
+    if scale < 1.0:
+        image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    out = BytesIO()
+    image.save(out, format="JPEG", quality=quality, optimize=True)
+    return PreparedImage(data=out.getvalue(), mime_type="image/jpeg",
+                         width=image.size[0], height=image.size[1], resized=scale < 1.0)
@@ -10,10 +10,14 @@ class VoicePermissionResult:
     def __init__(
         self,
         status: VoicePermissionStatus,
-        limit_seconds: int | None = None
+        limit_seconds: int | None = None,
+        transcribe_timeout: int | None = None,
+        voice_model: str | None = None
     ):
         self.status = status
         self.limit_seconds = limit_seconds
+        self.transcribe_timeout = transcribe_timeout
+        self.voice_model = voice_model
 
 
 class PhotoPermissionStatus(Enum):
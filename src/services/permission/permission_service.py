@@ -47,7 +47,9 @@ class PermissionService:
                 limit_seconds=settings.voice_limit_seconds
             )
 
-        return VoicePermissionResult(status=VoicePermissionStatus.ALLOWED)
+        return VoicePermissionResult(status=VoicePermissionStatus.ALLOWED,
+                                     transcribe_timeout=settings.voice_transcribe_timeout,
+                                     voice_model=settings.voice_model)
 
     async def check_image_send_permission(self, sub_type: int) -> PhotoPermissionStatus:
         settings = self.subs_config.get(sub_type)
@@ -0,0 +1,184 @@
+import asyncio
+import multiprocessing
+import time
+from typing import Any, Callable, Optional
+
+
+class ProcessExecutorBusyError(Exception):
+    """Все воркеры заняты и очередь ожидания переполнена"""
+
+    def __init__(self, name: str):
+        super().__init__(f"process executor '{name}' is busy")
+        self.name = name
+
+
+class ProcessExecutorTimeoutError(Exception):
+    """Задача не уложилась в таймаут — воркер убит и перезапущен"""
+
+    def __init__(self, name: str, timeout: float):
+        super().__init__(f"process executor '{name}' job timed out after {timeout}s")
+        self.name = name
+        self.timeout = timeout
+
+
+def _worker_main(conn, initializer: Optional[Callable], initargs: tuple):
+    """Цикл дочернего процесса: один раз initializer (например, загрузка модели), дальше задачи по одной"""
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            fn, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            result = (True, fn(*args, **kwargs))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # результат или исключение не сериализуются — отдаём хотя бы текст ошибки
+            conn.send((False, RuntimeError(repr(e))))
+
+
+class _Worker:
+    def __init__(self, ctx, initializer: Optional[Callable], initargs: tuple):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main,
+                                   args=(child_conn, initializer, initargs),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class ProcessExecutor:
+    """
+    Пул долгоживущих процессов для CPU-тяжёлых задач (распознавание речи, конвертация файлов).
+
+    Event loop только ждёт результат. Не больше workers задач одновременно и не больше
+    max_queue ожидающих — сверх этого ProcessExecutorBusyError. Задача, превысившая таймаут
+    или отменённая, убивает свой процесс: он перезапускается, остальные задачи не страдают
+    (ProcessPoolExecutor так не умеет — зависшую задачу в нём не остановить).
+
+    fn и аргументы должны сериализоваться pickle: передавайте функции уровня модуля.
+    """
+
+    def __init__(self,
+                 name: str,
+                 workers: int = 1,
+                 max_queue: int = 8,
+                 initializer: Optional[Callable] = None,
+                 initargs: tuple = (),
+                 start_method: str = "spawn"):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.initializer = initializer
+        self.initargs = initargs
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle: Optional[asyncio.Queue[_Worker]] = None
+        self._all: list[_Worker] = []
+        self._respawns: set[asyncio.Task] = set()
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_run = 0.0
+
+    def start(self):
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers):
+            self._idle.put_nowait(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._ctx, self.initializer, self.initargs)
+        self._all.append(worker)
+        return worker
+
+    def _replace(self, worker: _Worker):
+        """Убивает процесс сразу, а join и запуск замены (spawn) идут в потоке — не в event loop"""
+        worker.process.kill()
+        self._all.remove(worker)
+        task = asyncio.create_task(self._respawn(worker))
+        self._respawns.add(task)
+        task.add_done_callback(self._respawns.discard)
+
+    async def _respawn(self, worker: _Worker):
+        await asyncio.to_thread(worker.kill)
+        try:
+            replacement = await asyncio.to_thread(_Worker, self._ctx, self.initializer, self.initargs)
+        except Exception as e:
+            print(f"{self.name} worker respawn failed: {e!r}")
+            return
+        if self._idle is None:
+            # пул успели остановить, пока поднималась замена
+            await asyncio.to_thread(replacement.kill)
+            return
+        self._all.append(replacement)
+        self._idle.put_nowait(replacement)
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        self.start()
+        if self._idle.empty() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise ProcessExecutorBusyError(self.name)
+
+        self.waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            worker.conn.send((fn, args, kwargs))
+            ok, result = await asyncio.wait_for(asyncio.to_thread(worker.conn.recv), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._replace(worker)
+            raise ProcessExecutorTimeoutError(self.name, timeout)
+        except (asyncio.CancelledError, EOFError, OSError):
+            # отмена или упавший процесс: в трубе мог остаться недочитанный ответ — только пересоздание
+            self.failed += 1
+            self._replace(worker)
+            raise
+        finally:
+            self.in_flight -= 1
+            self.total_run += time.monotonic() - started
+
+        self._idle.put_nowait(worker)
+        if not ok:
+            self.failed += 1
+            raise result
+        self.completed += 1
+        return result
+
+    def shutdown(self):
+        for worker in self._all:
+            worker.kill()
+        self._all.clear()
+        self._idle = None
+
+    def metrics(self) -> dict:
+        finished = self.completed + self.failed + self.timeouts
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "avg_run": round(self.total_run / finished, 4) if finished else 0.0,
+        }
@@ -1,39 +1,210 @@
+import asyncio
 import time
-import tempfile
+from dataclasses import dataclass
 from io import BytesIO
-from pydub import AudioSegment
-from faster_whisper import WhisperModel
+from typing import Awaitable, Callable, Optional
+
 from aiogram import Bot
 from aiogram.types import Message
 
+from src.adapters.cache.cache_stats import CacheStats
+from src.adapters.cache.redis_cache import RedisCache
+from src.services.process_executor import ProcessExecutor, ProcessExecutorTimeoutError
+
+SAMPLE_RATE = 16000
+
+FAST_MODEL = "fast"
+ACCURATE_MODEL = "accurate"
+
+TRANSCRIPT_CACHE_TTL = 60 * 60 * 24 * 7
+
+# модель живёт в процессе-воркере: загружается один раз в _load_model
+_model = None
+
+
+def _load_model(model_name: str, device: str, compute_type: str, cpu_threads: int):
+    global _model
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model_name, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def decode_voice(ogg: bytes):
+    """OGG/Opus -> 16 кГц mono float32 numpy за одно декодирование в памяти (PyAV внутри faster-whisper)"""
+    from faster_whisper.audio import decode_audio
+    return decode_audio(BytesIO(ogg), sampling_rate=SAMPLE_RATE)
+
+
+def group_speech(timestamps: list[dict], max_samples: int) -> list[tuple[int, int]]:
+    """
+    Склеить речевые отрезки VAD ({"start", "end"} в сэмплах) в куски не длиннее max_samples.
+    Режем в паузах между отрезками; сплошную речь длиннее max_samples — по границе куска.
+    """
+    spans: list[tuple[int, int]] = []
+    for ts in timestamps:
+        if spans and ts["end"] - spans[-1][0] <= max_samples:
+            spans[-1] = (spans[-1][0], ts["end"])
+        else:
+            spans.append((ts["start"], ts["end"]))
+
+    chunks = []
+    for start, end in spans:
+        while end - start > max_samples:
+            chunks.append((start, start + max_samples))
+            start += max_samples
+        chunks.append((start, end))
+    return chunks
+
+
+def _transcribe_audio(audio, language: str) -> str:
+    """Выполняется в процессе-воркере: распознавание не трогает event loop бота"""
+    segments, _ = _model.transcribe(
+        audio=audio,
+        language=language,
+        beam_size=1,
+        vad_filter=True
+    )
+    return "".join([segment.text for segment in segments]).strip()
+
+
+def _transcribe(ogg: bytes, language: str) -> str:
+    return _transcribe_audio(decode_voice(ogg), language)
+
+
+def _split_voice(ogg: bytes, chunk_seconds: int) -> list:
+    """Выполняется в процессе-воркере: декодирование и нарезка длинного голосового по паузам (Silero VAD)"""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    audio = decode_voice(ogg)
+    timestamps = get_speech_timestamps(audio, VadOptions())
+    return [audio[start:end] for start, end in group_speech(timestamps, chunk_seconds * SAMPLE_RATE)]
+
+
+@dataclass(frozen=True)
+class WhisperModelSpec:
+    model_name: str
+    compute_type: str = "int8"
+    workers: int = 1
+
 
 class WhisperService:
-    def __init__(self, model: WhisperModel):
-        self.model = model
+    """
+    Несколько загруженных моделей, у каждой свой пул процессов: короткие и бесплатные
+    голосовые идут в быструю (small/int8) и не стоят в очереди за длинными в точной.
+    """
+
+    def __init__(self,
+                 models: dict[str, WhisperModelSpec],
+                 device: str = "cpu",
+                 cpu_threads: int = 0,
+                 short_clip_seconds: int = 30,
+                 chunk_seconds: int = 30,
+                 max_queue: int = 8,
+                 redis: Optional[RedisCache] = None):
+        self.short_clip_seconds = short_clip_seconds
+        self.chunk_seconds = chunk_seconds
+        self.models = models
+        # пересланные голосовые и повторы — тот же file_unique_id, распознаём один раз на модель
+        self.redis = redis
+        self.cache_stats = CacheStats()
+        self.executors = {
+            name: ProcessExecutor(name=f"whisper:{name}",
+                                  workers=spec.workers,
+                                  max_queue=max_queue,
+                                  initializer=_load_model,
+                                  initargs=(spec.model_name, device, spec.compute_type, cpu_threads))
+            for name, spec in models.items()
+        }
+
+    def start(self):
+        """Поднять воркеры (загрузка моделей) заранее, а не на первом голосовом"""
+        for executor in self.executors.values():
+            executor.start()
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown()
+
+    def select_model(self, tier_model: str, duration: int) -> str:
+        """Модель тарифа; короткие клипы — всегда в быструю, если она есть"""
+        if duration <= self.short_clip_seconds and FAST_MODEL in self.executors:
+            return FAST_MODEL
+        return tier_model if tier_model in self.executors else next(iter(self.executors))
+
+    def metrics(self) -> dict:
+        metrics = {name: executor.metrics() for name, executor in self.executors.items()}
+        metrics["cache"] = self.cache_stats.as_dict()
+        return metrics
+
+    def _cache_key(self, model: str, file_unique_id: str) -> str:
+        spec = self.models[model]
+        return f"voice:transcript:{spec.model_name}:{spec.compute_type}:{file_unique_id}"
+
+    async def transcribe_voice(self,
+                               message: Message,
+                               bot: Bot,
+                               model: str = FAST_MODEL,
+                               timeout: Optional[float] = None,
+                               on_partial: Optional[Callable[[str], Awaitable]] = None) -> str:
+        """
+        Голосовые длиннее chunk_seconds режутся по паузам и распознаются кусками параллельно;
+        on_partial получает уже готовое начало текста по мере готовности кусков.
+        """
+        duration = message.voice.duration
+        model = self.select_model(tier_model=model, duration=duration)
+
+        cache_key = self._cache_key(model, message.voice.file_unique_id)
+        if self.redis:
+            cached = await self.redis.get(cache_key)
+            if cached is not None:
+                self.cache_stats.hit()
+                return cached
+            self.cache_stats.miss()
 
-    async def transcribe_voice(self, message: Message, bot: Bot) -> tuple[str, float]:
         tg_file = await bot.get_file(message.voice.file_id)
         ogg_bytes = BytesIO()
         await bot.download_file(tg_file.file_path, ogg_bytes)
-        ogg_bytes.seek(0)
-
-        audio = AudioSegment.from_file(ogg_bytes, format="ogg")
-        wav_bytes = BytesIO()
-        audio.export(wav_bytes, format="wav")
-        wav_bytes.seek(0)
-
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-            tmp.write(wav_bytes.read())
-            tmp_path = tmp.name
 
+        executor = self.executors[model]
         start_time = time.time()
-        segments, _ = self.model.transcribe(
-            audio=tmp_path,
-            language="ru",
-            beam_size=1,
-            vad_filter=True
-        )
-        transcription_time = time.time() - start_time
-        text = "".join([segment.text for segment in segments]).strip()
+        if duration > self.chunk_seconds:
+            try:
+                text = await asyncio.wait_for(self._transcribe_chunked(executor, ogg_bytes.getvalue(), on_partial),
+                                              timeout=timeout)
+            except asyncio.TimeoutError:
+                raise ProcessExecutorTimeoutError(executor.name, timeout)
+        else:
+            text = await executor.run(_transcribe, ogg_bytes.getvalue(), "ru", timeout=timeout)
+        print('transcription', model, 'duration', duration, 'time', round(time.time() - start_time, 2))
 
+        if self.redis and text:
+            await self.redis.set(cache_key, text, ttl=TRANSCRIPT_CACHE_TTL)
         return text
+
+    async def _transcribe_chunked(self,
+                                  executor: ProcessExecutor,
+                                  ogg: bytes,
+                                  on_partial: Optional[Callable[[str], Awaitable]]) -> str:
+        chunks = await executor.run(_split_voice, ogg, self.chunk_seconds)
+        texts: list[Optional[str]] = [None] * len(chunks)
+        # не больше кусков в очереди, чем воркеров: одно голосовое не забивает max_queue пула
+        slots = asyncio.Semaphore(executor.workers)
+        reported = 0
+
+        async def transcribe_chunk(index: int):
+            nonlocal reported
+            async with slots:
+                texts[index] = await executor.run(_transcribe_audio, chunks[index], "ru")
+
+            ready = 0
+            while ready < len(texts) and texts[ready] is not None:
+                ready += 1
+            if on_partial and ready > reported and ready < len(texts):
+                reported = ready
+                await on_partial(self._join(texts[:ready]))
+
+        await asyncio.gather(*(transcribe_chunk(i) for i in range(len(chunks))))
+        return self._join(texts)
+
+    @staticmethod
+    def _join(texts: list[Optional[str]]) -> str:
+        return " ".join(text for text in texts if text).strip()
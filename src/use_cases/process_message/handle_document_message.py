@@ -5,24 +5,29 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.user_ai_context import MessageType
 from src.adapters.s3.s3_client import S3Client
 from src.adapters.db.user_model_repository import UserModelRepository
+from src.adapters.db.model_repository import ModelRepository
 from src.adapters.cache.redis_cache import RedisCache
 from src.services.permission.permission_service import PermissionService, PhotoPermissionStatus
 from src.adapters.db.user_subs_repository import UserSubsRepository
-from src.use_cases.process_message.process_message import ProcessMessageUseCase
+from src.use_cases.process_message.turn_scheduler import UserTurnScheduler, PendingTurn
 from src.services.ai.data_classes import MessageDTO
-from src.services.converter import SimpleFileToPDF
+from src.services.converter import DocumentConverter, ConversionLimitError
+from src.services.document_extractor import DocumentTextExtractor, DEFAULT_API_NAME
+from src.services.process_executor import ProcessExecutorBusyError, ProcessExecutorTimeoutError
 
 
 class HandleDocumentMessageUseCase:
     def __init__(self,
                  redis: RedisCache,
                  s3client: S3Client,
+                 converter: DocumentConverter,
                  permission_service: PermissionService,
-                 process_message_usecase: ProcessMessageUseCase,):
+                 turn_scheduler: UserTurnScheduler,):
         self.redis = redis
         self.s3 = s3client
+        self.converter = converter
         self.permission_service = permission_service
-        self.process_message_usecase = process_message_usecase
+        self.turn_scheduler = turn_scheduler
 
 
     async def run(self, message: Message, sended_message: Message, bot: Bot, session: AsyncSession):
@@ -40,9 +45,11 @@ class HandleDocumentMessageUseCase:
             return
 
         await sended_message.edit_text('📂 Открываю документ...')
-        await UserModelRepository.update_selected_model(user_id=message.from_user.id,
-                                                        model_id=default_image_model,
-                                                        session=session)
+
+        try:
+            self.converter.check_size(message.document.file_size)
+        except ConversionLimitError as e:
+            return await sended_message.edit_text(f'Не получилось открыть документ: {e}')
 
         file_id = message.document.file_id
         tg_file = await bot.get_file(file_id)
@@ -50,26 +57,53 @@ class HandleDocumentMessageUseCase:
         filename = getattr(message.document, "file_name", None)
         mime_type = message.document.mime_type
 
-        key = f"uploads/{message.from_user.id}/{file_id}1.pdf"
-
-        conv = SimpleFileToPDF()
-        file_bytes = conv.convert(file_bytes, filename=filename, mime_type=mime_type)
-
-        pdf_link = await self.s3.upload_file(file_obj=file_bytes,
-                                             file_key=key)
+        model_id = None
+        try:
+            if DocumentTextExtractor.supports(filename, mime_type):
+                # текст уже есть — отдаём его любой модели, без PDF, S3 и разбора на стороне провайдера
+                # токены считаем словарём модели, которая получит текст, и в пределах её бюджета
+                selected_model_id = await UserModelRepository.get_selected_model_id(user_id=message.from_user.id,
+                                                                                    session=session)
+                model_config = await ModelRepository.get_model_config(model_id=selected_model_id,
+                                                                     session=session,
+                                                                     redis=self.redis)
+                extracted = await self.converter.extract_text(file_bytes,
+                                                              api_name=model_config.api_name if model_config
+                                                              else DEFAULT_API_NAME,
+                                                              context_token_budget=model_config.context_token_budget
+                                                              if model_config else None,
+                                                              filename=filename,
+                                                              mime_type=mime_type)
+                document_part = MessageDTO(author_id=message.from_user.id, message_type=MessageType.TEXT,
+                                           text=extracted.text)
+            else:
+                # PDF и прочее — файлом для модели, которая умеет их читать
+                model_id = default_image_model
+                await UserModelRepository.update_selected_model(user_id=message.from_user.id,
+                                                                model_id=default_image_model,
+                                                                session=session)
+                pdf_bytes = await self.converter.convert(file_bytes, filename=filename, mime_type=mime_type)
+                pdf_link = await self.s3.upload_content(data=pdf_bytes, ext=".pdf", content_type="application/pdf")
+                document_part = MessageDTO(author_id=message.from_user.id, message_type=MessageType.FILE_URL,
+                                           text=pdf_link)
+        except ConversionLimitError as e:
+            return await sended_message.edit_text(f'Не получилось открыть документ: {e}')
+        except ProcessExecutorBusyError:
+            return await sended_message.edit_text('Сейчас много документов в обработке, попробуйте через минуту')
+        except ProcessExecutorTimeoutError:
+            return await sended_message.edit_text('Документ слишком сложный, не успел его открыть')
+        except ValueError as e:
+            return await sended_message.edit_text(str(e))
 
-        parts: list[MessageDTO] = [
-            MessageDTO(author_id=message.from_user.id, message_type=MessageType.FILE_URL, text=pdf_link)
-        ]
+        parts: list[MessageDTO] = [document_part]
         if message.caption:
             parts.append(
                 MessageDTO(author_id=message.from_user.id, message_type=MessageType.TEXT, text=message.caption))
 
         await sended_message.edit_text('Пожалуйста, подождите немного')
-        await self.process_message_usecase.run(query_messages=parts,
-                                               model_id=default_image_model,
-                                               user_id=message.from_user.id,
-                                               sended_message=sended_message,
-                                               bot_id=bot.id,
-                                               session=session,
-                                               user_subtype=user_subtype)
+        self.turn_scheduler.submit(user_id=message.from_user.id,
+                                   turn=PendingTurn(query_messages=parts,
+                                                    user_subtype=user_subtype,
+                                                    sended_message=sended_message,
+                                                    bot_id=bot.id,
+                                                    model_id=model_id))
@@ -1,3 +1,6 @@
+import asyncio
+import time
+
 from aiogram.types import Message
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,8 +11,9 @@ from src.adapters.db.user_model_repository import UserModelRepository
 from src.adapters.cache.redis_cache import RedisCache
 from src.services.permission.permission_service import PermissionService, PhotoPermissionStatus
 from src.adapters.db.user_subs_repository import UserSubsRepository
-from src.use_cases.process_message.process_message import ProcessMessageUseCase
+from src.use_cases.process_message.turn_scheduler import UserTurnScheduler, PendingTurn
 from src.services.ai.data_classes import MessageDTO
+from src.services.image_service import prepare_image
 
 
 class HandlePhotoMessageUseCase:
@@ -17,11 +21,17 @@ class HandlePhotoMessageUseCase:
                  redis: RedisCache,
                  s3client: S3Client,
                  permission_service: PermissionService,
-                 process_message_usecase: ProcessMessageUseCase,):
+                 turn_scheduler: UserTurnScheduler,
+                 max_pixels: int,
+                 inline_max_bytes: int,):
         self.redis = redis
         self.s3 = s3client
         self.permission_service = permission_service
-        self.process_message_usecase = process_message_usecase
+        self.turn_scheduler = turn_scheduler
+        self.max_pixels = max_pixels
+        # картинки до этого размера уходят провайдеру прямо в запросе (data: URL), S3 — в фоне
+        self.inline_max_bytes = inline_max_bytes
+        self._uploads: set[asyncio.Task] = set()
 
 
     async def run(self, message: Message, sended_message: Message, bot: Bot, session: AsyncSession):
@@ -43,25 +53,46 @@ class HandlePhotoMessageUseCase:
                                                         model_id=default_image_model,
                                                         session=session)
 
+        started = time.monotonic()
         file_id = message.photo[-1].file_id
         tg_file = await bot.get_file(file_id)
         file_bytes = await bot.download_file(tg_file.file_path)
+        downloaded = time.monotonic()
+
+        image = await asyncio.to_thread(prepare_image, file_bytes.getvalue(), self.max_pixels)
+        prepared = time.monotonic()
+
+        if len(image.data) <= self.inline_max_bytes:
+            mode = 'inline'
+            # загрузку не ждём: модели картинка уходит в запросе, а ссылку в историю запишет
+            # ChatHistoryService, когда загрузка завершится успешно
+            upload = asyncio.create_task(self.s3.upload_content(data=image.data, ext=".jpg",
+                                                                content_type=image.mime_type))
+            image_part = MessageDTO(author_id=message.from_user.id, message_type=MessageType.IMAGE_URL,
+                                    text=image.data_url(), history_upload=upload)
+            self._uploads.add(upload)
+            upload.add_done_callback(self._uploads.discard)
+        else:
+            mode = 's3'
+            image_link = await self.s3.upload_content(data=image.data, ext=".jpg", content_type=image.mime_type)
+            image_part = MessageDTO(author_id=message.from_user.id, message_type=MessageType.IMAGE_URL,
+                                    text=image_link)
 
-        key = f"uploads/{message.from_user.id}/{file_id}.jpg"
-        image_link = await self.s3.upload_file(file_obj=file_bytes, file_key=key)
+        print('photo', mode,
+              'download ms', round((downloaded - started) * 1000),
+              'prepare ms', round((prepared - downloaded) * 1000),
+              'ready ms', round((time.monotonic() - started) * 1000),
+              'bytes', len(image.data), 'resized', image.resized)
 
-        parts: list[MessageDTO] = [
-            MessageDTO(author_id=message.from_user.id, message_type=MessageType.IMAGE_URL, text=image_link)
-        ]
+        parts: list[MessageDTO] = [image_part]
         if message.caption:
             parts.append(
                 MessageDTO(author_id=message.from_user.id, message_type=MessageType.TEXT, text=message.caption))
 
         await sended_message.edit_text('Пожалуйста, подождите немного')
-        await self.process_message_usecase.run(query_messages=parts,
-                                               model_id=default_image_model,
-                                               user_id=message.from_user.id,
-                                               sended_message=sended_message,
-                                               bot_id=bot.id,
-                                               session=session,
-                                               user_subtype=user_subtype)
\ No newline at end of file
+        self.turn_scheduler.submit(user_id=message.from_user.id,
+                                   turn=PendingTurn(query_messages=parts,
+                                                    user_subtype=user_subtype,
+                                                    sended_message=sended_message,
+                                                    bot_id=bot.id,
+                                                    model_id=default_image_model))
\ No newline at end of file
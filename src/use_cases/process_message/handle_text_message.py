@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.user_ai_context import MessageType
 from src.adapters.cache.redis_cache import RedisCache
 from src.services.permission.permission_service import PermissionService
-from src.use_cases.process_message.process_message import ProcessMessageUseCase
+from src.use_cases.process_message.turn_scheduler import UserTurnScheduler, PendingTurn
 from src.adapters.db.user_subs_repository import UserSubsRepository
 from src.services.ai.data_classes import MessageDTO
 
@@ -14,10 +14,10 @@ class HandleTextMessageUseCase:
     def __init__(self,
                  redis: RedisCache,
                  permission_service: PermissionService,
-                 process_message_usecase: ProcessMessageUseCase):
+                 turn_scheduler: UserTurnScheduler):
         self.redis = redis
         self.permission_service = permission_service
-        self.process_message_usecase = process_message_usecase
+        self.turn_scheduler = turn_scheduler
 
 
     async def run(self, message: Message, bot: Bot, sended_message: Message, session: AsyncSession):
@@ -30,9 +30,8 @@ class HandleTextMessageUseCase:
 
         current_message = [MessageDTO(author_id=user_id, message_type=MessageType.TEXT, text=text)]
 
-        await self.process_message_usecase.run(query_messages=current_message,
-                                               user_id=message.from_user.id,
-                                               user_subtype=user_subtype,
-                                               sended_message=sended_message,
-                                               bot_id=bot.id,
-                                               session=session,)
+        self.turn_scheduler.submit(user_id=user_id,
+                                   turn=PendingTurn(query_messages=current_message,
+                                                    user_subtype=user_subtype,
+                                                    sended_message=sended_message,
+                                                    bot_id=bot.id))
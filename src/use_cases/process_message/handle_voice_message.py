@@ -1,14 +1,16 @@
 from aiogram.types import Message
 from src.services.ai.data_classes import MessageDTO
-from src.use_cases.process_message.process_message import ProcessMessageUseCase
+from src.use_cases.process_message.turn_scheduler import UserTurnScheduler, PendingTurn
 from aiogram import Bot
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.services.permission.permission_service import PermissionService
 from src.services.whisper_service import WhisperService
+from src.services.process_executor import ProcessExecutorBusyError, ProcessExecutorTimeoutError
 from src.adapters.cache.redis_cache import RedisCache
 from src.adapters.db.user_subs_repository import UserSubsRepository
 from src.services.permission.permission_service import VoicePermissionStatus
 from app.db.models.user_ai_context import MessageType
+from src.use_cases.process_message.stream_editor import TELEGRAM_LIMIT
 
 
 class HandleVoiceMessageUseCase:
@@ -16,11 +18,11 @@ class HandleVoiceMessageUseCase:
                  redis: RedisCache,
                  whisper: WhisperService,
                  permission_service: PermissionService,
-                 process_message_usecase: ProcessMessageUseCase):
+                 turn_scheduler: UserTurnScheduler):
         self.redis = redis
         self.whisper = whisper
         self.permission_serivce = permission_service
-        self.process_message_usecase = process_message_usecase
+        self.turn_scheduler = turn_scheduler
 
     async def run(self, message: Message, sended_message: Message, bot: Bot, session: AsyncSession):
         voice = message.voice
@@ -44,16 +46,30 @@ class HandleVoiceMessageUseCase:
             return
 
         await sended_message.edit_text('🎙 Слушаю голосовое сообщение ...')
-        text = await self.whisper.transcribe_voice(message, bot)
+
+        async def show_partial(partial: str):
+            try:
+                await sended_message.edit_text(f'🎙 {partial[-TELEGRAM_LIMIT + 10:]} ...')
+            except Exception as e:
+                print(e)
+
+        try:
+            text = await self.whisper.transcribe_voice(message, bot,
+                                                       model=result.voice_model,
+                                                       timeout=result.transcribe_timeout,
+                                                       on_partial=show_partial)
+        except ProcessExecutorBusyError:
+            return await sended_message.edit_text('Сейчас много голосовых, попробуйте через минуту')
+        except ProcessExecutorTimeoutError:
+            return await sended_message.edit_text('Не удалось распознать голосовое сообщение, попробуйте короче')
 
         await sended_message.edit_text('Пожалуйста, подождите немного')
 
         user_id = message.from_user.id
         current_message = [MessageDTO(author_id=user_id, message_type=MessageType.TEXT, text=text)]
 
-        await self.process_message_usecase.run(query_messages=current_message,
-                                               user_id=message.from_user.id,
-                                               sended_message=sended_message,
-                                               bot_id=bot.id,
-                                               session=session,
-                                               user_subtype=user_subtype)
\ No newline at end of file
+        self.turn_scheduler.submit(user_id=user_id,
+                                   turn=PendingTurn(query_messages=current_message,
+                                                    user_subtype=user_subtype,
+                                                    sended_message=sended_message,
+                                                    bot_id=bot.id))
\ No newline at end of file
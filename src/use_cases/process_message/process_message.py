@@ -7,12 +7,12 @@ from src.adapters.db.dialog_repository import DialogRepository
 from src.services.chat_history_service import ChatHistoryService
 from src.services.ai.prompt_service import PromptService
 from src.adapters.ai_providers.registry import ProviderRegistry
+from src.adapters.ai_providers.upstream import ProviderBusyError
 from src.adapters.db.model_repository import ModelRepository
 from src.services.ai.data_classes import MessageDTO
-from src.services.html_sanitizer import sanitize_to_telegram_html
-import re
-
-TELEGRAM_LIMIT = 4096
+from src.adapters.cache.redis_cache import RedisCache
+from src.services.ai.context_builder import ContextBuilder
+from src.use_cases.process_message.stream_editor import StreamingMessageEditor
 
 
 class ProcessMessageUseCase:
@@ -20,7 +20,11 @@ class ProcessMessageUseCase:
                  ai_providers: ProviderRegistry,
                  prompt_service: PromptService,
                  chat_history_service: ChatHistoryService,
-                 model_selection_service: ModelSelectionService,):
+                 model_selection_service: ModelSelectionService,
+                 redis: RedisCache,
+                 context_builder: ContextBuilder,):
+        self.redis = redis
+        self.context_builder = context_builder
         self.chat_history = chat_history_service
         self.prompt_service = prompt_service
         self.ai_providers = ai_providers
@@ -48,7 +52,9 @@ class ProcessMessageUseCase:
         chat_history = await self.chat_history.get_history(dialog_id=current_dialog.id,
                                                            bot_id=bot_id,
                                                            model_id=model_id,
-                                                           session=session)
+                                                           session=session,
+                                                           summary=current_dialog.summary,
+                                                           summary_until=current_dialog.summary_until)
 
         new_messages = [self.chat_history.msg_to_completion_param(i, bot_id) for i in query_messages]
 
@@ -67,7 +73,9 @@ class ProcessMessageUseCase:
             model_id = model.model_id
 
 
-        model_config = await ModelRepository.get_model_config(model_id=model_id, session=session)
+        model_config = await ModelRepository.get_model_config(model_id=model_id,
+                                                             session=session,
+                                                             redis=self.redis)
 
         await sended_message.edit_text(f'🔄 [{model_config.name}] обрабатывает запрос, почти готово')
 
@@ -75,47 +83,43 @@ class ProcessMessageUseCase:
         if not ai_provider:
             return await sended_message.edit_text('Ошибка провайдера')
 
-        result_text, tokens_usage =  await ai_provider.get_answer(prompt=prompt,
-                                                                  messages=messages_for_llm,
-                                                                  model=model_config.api_name,
-                                                                  base_url=model_config.api_link)
+        window = self.context_builder.build(history=chat_history,
+                                            new_messages=new_messages,
+                                            model_config=model_config)
+        print('context tokens', window.input_tokens,
+              'trimmed tokens', window.trimmed_tokens,
+              'trimmed messages', window.trimmed_messages)
 
-        safe_text = sanitize_to_telegram_html(result_text)
+        editor = StreamingMessageEditor(sended_message)
+        tokens_usage = None
+
+        limiter = self.ai_providers.limiter(provider=model_config.api_provider,
+                                            base_url=model_config.api_link,
+                                            max_concurrency=model_config.max_concurrency)
+        try:
+            async with limiter.slot():
+                async for chunk in ai_provider.stream_answer(prompt=prompt,
+                                                             messages=window.messages,
+                                                             model=model_config.api_name,
+                                                             base_url=model_config.api_link):
+                    if chunk.delta:
+                        await editor.push(chunk.delta)
+                    if chunk.total_tokens is not None:
+                        tokens_usage = chunk.total_tokens
+        except ProviderBusyError as e:
+            print(e, self.ai_providers.metrics())
+            return await sended_message.edit_text('Нейросеть сейчас перегружена, попробуйте через минуту')
+
+        result_text = editor.full_text
+        print('ttft', editor.time_to_first_token, 'tokens', tokens_usage)
 
         if not result_text:
             return await sended_message.edit_text('Ошибка')
 
-        await self.edit_long_message(sended_message, safe_text, parse_mode='html')
-
-        result_message = [MessageDTO(text=result_text, author_id=user_id, message_type=MessageType.TEXT)]
+        await editor.finish()
 
-        messages_to_save = query_messages + result_message
+        result_message = [MessageDTO(text=result_text, author_id=bot_id, message_type=MessageType.TEXT)]
 
-        last_id = await self.chat_history.save_messages(
-            messages=messages_to_save,
-            dialog_id=current_dialog.id,
-            author_id=user_id,
-            session=session,
-        )
-
-        print(last_id)
-
-        # legacy usage tracking removed; counters handled via UsageCounterService
-
-    async def edit_long_message(self, msg, text, parse_mode=None):
-        # сначала пробуем как есть
-        chunks = [text[i:i + TELEGRAM_LIMIT] for i in range(0, len(text), TELEGRAM_LIMIT)]
-        if len(chunks) == 1:
-            try:
-                await msg.edit_text(text, parse_mode=parse_mode)
-                return
-            except Exception:
-                pass
-        plain = re.sub(r"<[^>]*>", "", text)
-        chunks = [plain[i:i + TELEGRAM_LIMIT] for i in range(0, len(plain), TELEGRAM_LIMIT)]
-        try:
-            await msg.edit_text(chunks[0])
-        except Exception as e:
-            await msg.reply(chunks[0])
-        for ch in chunks[1:]:
-            await msg.reply(ch)
+        # ответ пользователь уже видит — историю пишем в фоне
+        self.chat_history.save_messages_background(messages=query_messages + result_message,
+                                                   dialog_id=current_dialog.id)
@@ -0,0 +1,148 @@
+import asyncio
+import html
+import logging
+import re
+import time
+from typing import Callable, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramRetryAfter
+from aiogram.types import Message
+
+from src.services.html_sanitizer import (TelegramHTMLSanitizer, TELEGRAM_LIMIT,
+                                         split_telegram_html, utf16_len)
+
+# Telegram ограничивает частоту редактирования одного чата (~1 раз в секунду)
+STREAM_EDIT_INTERVAL_SECONDS = 1.0
+STREAM_EDIT_MIN_CHARS = 80
+# курсор в конце сообщения, пока ответ ещё генерируется
+STREAM_CURSOR = " ▌"
+_TRAILING_CLOSE_TAG_RE = re.compile(r"</\w+>$")
+# финальную правку при флуд-контроле повторяем, а не теряем
+FINAL_EDIT_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingMessageEditor:
+    """
+    Прогрессивно редактирует сообщение-заглушку по мере прихода дельт от модели.
+
+    - правки не чаще, чем раз в min_interval секунд и не чаще, чем раз в min_chars символов;
+    - дельты идут в инкрементальный санитайзер: разбирается только новый кусок,
+      незакрытые теги закрываются во временном хвосте, недописанный тег ждёт следующей дельты;
+    - когда текст перестаёт влезать в TELEGRAM_LIMIT, он делится по тегам (split_telegram_html),
+      готовые части фиксируются, а открытые теги переходят в новое сообщение.
+    """
+
+    def __init__(self,
+                 message: Message,
+                 min_interval: float = STREAM_EDIT_INTERVAL_SECONDS,
+                 min_chars: int = STREAM_EDIT_MIN_CHARS,
+                 limit: int = TELEGRAM_LIMIT,
+                 clock: Callable[[], float] = time.monotonic):
+        self.message = message
+        self.messages = [message]
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.limit = limit
+        self.clock = clock
+
+        self.full_text = ""     # весь сырой ответ модели
+        self._sanitizer = TelegramHTMLSanitizer()   # текущее (последнее) сообщение
+        self._segment_chars = 0
+        self._last_edit_at = 0.0
+        self._last_edit_len = 0
+        self._last_rendered: Optional[str] = None
+
+        self.started_at = clock()
+        self.first_token_at: Optional[float] = None
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    async def push(self, delta: str):
+        if not delta:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = self.clock()
+
+        self.full_text += delta
+        self._sanitizer.feed(delta)
+        self._segment_chars += len(delta)
+
+        snapshot = self._sanitizer.snapshot()
+        # запас под курсор, чтобы промежуточная правка тоже влезала
+        if utf16_len(snapshot.text) > self.limit - len(STREAM_CURSOR):
+            await self._rollover(snapshot.text, open_tags=len(self._sanitizer.stack))
+
+        now = self.clock()
+        if (now - self._last_edit_at >= self.min_interval
+                and self._segment_chars - self._last_edit_len >= self.min_chars):
+            await self._edit(self._sanitizer.snapshot().text + STREAM_CURSOR)
+            self._last_edit_at = now
+            self._last_edit_len = self._segment_chars
+
+    async def finish(self):
+        """Финальная правка без курсора. Вызывать после окончания стрима."""
+        rendered = self._sanitizer.flush()
+        if utf16_len(rendered) > self.limit:
+            await self._rollover(rendered, open_tags=0)
+            rendered = self._sanitizer.snapshot().text
+        await self._edit(rendered, final=True)
+
+    async def _rollover(self, rendered: str, open_tags: int):
+        chunks = split_telegram_html(rendered, self.limit - len(STREAM_CURSOR), keep_last=True)
+        if len(chunks) < 2:
+            return
+        for chunk in chunks[:-1]:
+            await self._edit(chunk, final=True)
+            # продолжение пишем в новое сообщение
+            self.message = await self.message.answer(STREAM_CURSOR.strip())
+            self.messages.append(self.message)
+            self._last_rendered = None
+
+        # последняя часть (с заново открытыми тегами, без временных закрывающих) — начало нового сообщения
+        carry = chunks[-1]
+        for _ in range(open_tags):
+            carry = _TRAILING_CLOSE_TAG_RE.sub("", carry)
+        # без открытых тегов snapshot не показывает отложенные пробелы (разрыв абзаца) — переносим
+        # их сами, иначе следующий абзац приклеится к carry; недописанный тег (rawdata) — тоже
+        pending = self._sanitizer.pending if not open_tags else ""
+        incomplete = self._sanitizer.rawdata
+        self._sanitizer = TelegramHTMLSanitizer()
+        self._sanitizer.feed(carry)
+        self._sanitizer.feed(pending + incomplete)
+        self._segment_chars = len(carry)
+        self._last_edit_len = 0
+
+    async def _edit(self, text: str, final: bool = False):
+        """
+        final — текст, который больше не будет перезаписан (конец ответа, зафиксированная часть):
+        при флуд-контроле ждём retry_after и повторяем; промежуточную правку просто пропускаем.
+        """
+        if not re.sub(r"<[^>]*>", "", text).strip() or text == self._last_rendered:
+            return
+        for attempt in range(FINAL_EDIT_ATTEMPTS if final else 1):
+            try:
+                await self.message.edit_text(text, parse_mode='html')
+                break
+            except TelegramRetryAfter as e:
+                if not final or attempt == FINAL_EDIT_ATTEMPTS - 1:
+                    logger.warning("stream edit skipped: retry after %s", e.retry_after)
+                    return
+                await asyncio.sleep(e.retry_after)
+            except TelegramBadRequest as e:
+                if "message is not modified" in str(e):
+                    break
+                # разметку Telegram не принял — показываем без тегов
+                logger.warning("stream edit rejected: %s", e)
+                try:
+                    await self.message.edit_text(html.unescape(re.sub(r"<[^>]*>", "", text)))
+                except (TelegramBadRequest, TelegramRetryAfter) as e:
+                    logger.warning("plain text edit failed: %s", e)
+                    return
+                break
+        self._last_rendered = text
@@ -0,0 +1,110 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.services.ai.data_classes import MessageDTO
+from src.use_cases.process_message.process_message import ProcessMessageUseCase
+
+COALESCED_NOTE = '⤵️ Отвечу на это сообщение вместе со следующими'
+
+
+@dataclass
+class PendingTurn:
+    query_messages: list[MessageDTO]
+    user_subtype: int
+    sended_message: Message
+    bot_id: int
+    model_id: Optional[int] = None
+
+
+class UserTurnScheduler:
+    """
+    Почтовый ящик пользователя перед ProcessMessageUseCase.
+
+    У пользователя одновременно генерируется не больше одного ответа. Сообщения, пришедшие,
+    пока ответ генерируется, копятся и уходят одним следующим ходом — один вызов LLM вместо
+    нескольких и без гонки на DialogRepository.get_last/create.
+    Ход выполняется в фоне со своей сессией, чтобы не держать воркер очереди апдейтов.
+    """
+
+    def __init__(self,
+                 process_message_usecase: ProcessMessageUseCase,
+                 session_factory: async_sessionmaker[AsyncSession]):
+        self.process_message_usecase = process_message_usecase
+        self.session_factory = session_factory
+        # пользователь -> ходы, ожидающие окончания текущего
+        self._mailboxes: dict[int, list[PendingTurn]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.turns = 0
+        self.coalesced = 0
+
+    def is_busy(self, user_id: int) -> bool:
+        return user_id in self._mailboxes
+
+    def submit(self, user_id: int, turn: PendingTurn) -> bool:
+        """True — ход запущен сразу, False — отложен и будет объединён со следующими"""
+        mailbox = self._mailboxes.get(user_id)
+        if mailbox is not None:
+            mailbox.append(turn)
+            return False
+
+        self._mailboxes[user_id] = []
+        task = asyncio.create_task(self._drain(user_id, turn))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _drain(self, user_id: int, turn: PendingTurn):
+        try:
+            while turn is not None:
+                await self._run_turn(user_id, turn)
+                mailbox = self._mailboxes[user_id]
+                pending = mailbox[:]
+                mailbox.clear()
+                turn = await self._merge(pending) if pending else None
+        finally:
+            self._mailboxes.pop(user_id, None)
+
+    async def _merge(self, turns: list[PendingTurn]) -> PendingTurn:
+        """Склеить накопленные ходы в один; отвечаем в плейсхолдер последнего сообщения"""
+        self.coalesced += len(turns) - 1
+        for turn in turns[:-1]:
+            try:
+                await turn.sended_message.edit_text(COALESCED_NOTE)
+            except Exception as e:
+                print(e)
+
+        last = turns[-1]
+        # ход с картинкой требует своей модели — она важнее выбора по умолчанию
+        model_id = next((turn.model_id for turn in turns if turn.model_id), None)
+        return PendingTurn(query_messages=[m for turn in turns for m in turn.query_messages],
+                           user_subtype=last.user_subtype,
+                           sended_message=last.sended_message,
+                           bot_id=last.bot_id,
+                           model_id=model_id)
+
+    async def _run_turn(self, user_id: int, turn: PendingTurn):
+        self.turns += 1
+        try:
+            async with self.session_factory() as session:
+                await self.process_message_usecase.run(query_messages=turn.query_messages,
+                                                       user_id=user_id,
+                                                       user_subtype=turn.user_subtype,
+                                                       sended_message=turn.sended_message,
+                                                       bot_id=turn.bot_id,
+                                                       session=session,
+                                                       model_id=turn.model_id)
+        except Exception as e:
+            print(f"turn for user {user_id} failed: {e!r}")
+            try:
+                await turn.sended_message.edit_text('Ошибка')
+            except Exception:
+                pass
+
+    async def wait(self):
+        """Дождаться текущих ходов (для остановки приложения)"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
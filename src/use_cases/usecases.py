@@ -4,9 +4,12 @@ from src.adapters.payments.yookassa_api import YookassaAPI
 from bot.keyboards.keyboards import Keyboard
 from src.services.ai.model_selection_service import ModelSelectionService
 from src.services.ai.prompt_service import PromptService
+from src.services.ai.context_builder import ContextBuilder
+from src.services.ai.summary_service import DialogSummaryService
 from src.services.chat_history_service import ChatHistoryService
 from src.services.permission.permission_service import PermissionService
 from src.services.whisper_service import WhisperService
+from src.services.converter import DocumentConverter
 from src.use_cases.handle_payment import HandlePaymentUseCase
 from src.use_cases.process_message.handle_document_message import HandleDocumentMessageUseCase
 from src.use_cases.process_message.handle_voice_message import HandleVoiceMessageUseCase
@@ -15,6 +18,7 @@ from src.use_cases.role import RoleUseCase
 from src.use_cases.start_menu import StartMenuUseCase
 from src.use_cases.profile import ProfileUseCase
 from src.use_cases.process_message.process_message import ProcessMessageUseCase
+from src.use_cases.process_message.turn_scheduler import UserTurnScheduler
 from src.use_cases.process_message.handle_text_message import HandleTextMessageUseCase
 from src.use_cases.process_message.handle_photo_message import HandlePhotoMessageUseCase
 from src.use_cases.subscription import SubscriptionUseCase
@@ -22,6 +26,7 @@ from src.use_cases.settings import SettingsUseCase
 from src.use_cases.create_media import CreateMediaUseCase
 from app.config import Settings
 from src.adapters.s3.s3_client import S3Client
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 
 class UseCases:
@@ -33,7 +38,9 @@ class UseCases:
                  model_selection_service: ModelSelectionService,
                  permission_service: PermissionService,
                  whisper: WhisperService,
-                 yookassa: YookassaAPI):
+                 converter: DocumentConverter,
+                 yookassa: YookassaAPI,
+                 session_factory: async_sessionmaker[AsyncSession]):
         keyboard = Keyboard(
             support_link=config.support_link,
             webapp_url=config.webapp_url
@@ -52,40 +59,53 @@ class UseCases:
         self.select_ai = SelectAiModelUseCase(redis=redis, keyboard=keyboard, config=config)
         self.role = RoleUseCase(redis=redis, keyboard=keyboard)
 
-        chat_history_service = ChatHistoryService(redis=redis)
+        summary_service = DialogSummaryService(config=config, redis=redis, session_factory=session_factory)
+        self.chat_history = ChatHistoryService(redis=redis,
+                                               session_factory=session_factory,
+                                               summary_service=summary_service)
 
-        self.process_message = ProcessMessageUseCase(chat_history_service=chat_history_service,
+        self.context_builder = ContextBuilder()
+        self.process_message = ProcessMessageUseCase(chat_history_service=self.chat_history,
                                                      ai_providers=ai_providers,
                                                      prompt_service=prompt_service,
-                                                     model_selection_service=model_selection_service,)
+                                                     model_selection_service=model_selection_service,
+                                                     redis=redis,
+                                                     context_builder=self.context_builder,)
+
+        self.turn_scheduler = UserTurnScheduler(process_message_usecase=self.process_message,
+                                                session_factory=session_factory)
 
         self.handle_text_message = HandleTextMessageUseCase(redis=redis,
                                                             permission_service=permission_service,
-                                                            process_message_usecase=self.process_message)
+                                                            turn_scheduler=self.turn_scheduler)
 
-        s3_client = S3Client(
+        self.s3 = s3_client = S3Client(
             access_key=config.s3_access_key,
             secret_key=config.s3_secret_key,
             endpoint_url=config.s3_endpoint_url,
             bucket_name=config.s3_bucket_name,
             domain_name=config.s3_domain,
-            region_name=config.s3_region
+            region_name=config.s3_region,
+            redis=redis
         )
 
         self.handle_photo_message = HandlePhotoMessageUseCase(redis=redis,
                                                               s3client=s3_client,
                                                               permission_service=permission_service,
-                                                              process_message_usecase=self.process_message)
+                                                              turn_scheduler=self.turn_scheduler,
+                                                              max_pixels=config.photo_max_pixels,
+                                                              inline_max_bytes=config.photo_inline_max_bytes)
 
         self.handle_document_message = HandleDocumentMessageUseCase(redis=redis,
                                                                     s3client=s3_client,
+                                                                    converter=converter,
                                                                     permission_service=permission_service,
-                                                                    process_message_usecase=self.process_message)
+                                                                    turn_scheduler=self.turn_scheduler)
 
         self.handle_voice_message = HandleVoiceMessageUseCase(redis=redis,
                                                               whisper=whisper,
                                                               permission_service=permission_service,
-                                                              process_message_usecase=self.process_message)
+                                                              turn_scheduler=self.turn_scheduler)
 
         self.subscription = SubscriptionUseCase(redis=redis,
                                                 keyboard=keyboard,
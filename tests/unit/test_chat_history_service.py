@@ -0,0 +1,149 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.db.models.user_ai_context import MessageType
+from src.services.ai.data_classes import MessageDTO
+from src.services.chat_history_service import ChatHistoryService
+
+REPO = "src.services.chat_history_service.ChatHistoryRepository"
+
+
+def make_service() -> tuple[ChatHistoryService, Mock]:
+    redis = Mock()
+    redis.lrange = AsyncMock(return_value=[])
+    redis.replace_list = AsyncMock()
+    redis.push_if_exists = AsyncMock()
+    session = AsyncMock()
+    session_cm = AsyncMock()
+    session_cm.__aenter__.return_value = session
+    session_factory = Mock(return_value=session_cm)
+    return ChatHistoryService(redis=redis, session_factory=session_factory), redis
+
+
+def turn(text: str) -> list[MessageDTO]:
+    return [MessageDTO(text=text, author_id=1, message_type=MessageType.TEXT)]
+
+
+class TestChatHistoryOrdering:
+    """Тесты порядка фоновой записи истории и чтения следующего хода"""
+
+    @pytest.mark.asyncio
+    async def test_miss_load_waits_for_background_save(self):
+        """Чтение из БД при промахе кэша ждёт незакоммиченную запись предыдущего хода"""
+        service, redis = make_service()
+        committed = []
+        release = asyncio.Event()
+
+        async def save_messages(session, dialog_id, messages):
+            await release.wait()
+            committed.extend(messages)
+            return [None] * len(messages)
+
+        async def load_history(session, dialog_id, limit):
+            return list(committed)
+
+        with patch(f"{REPO}.save_messages", side_effect=save_messages), \
+                patch(f"{REPO}.load_history", side_effect=load_history):
+            service.save_messages_background(turn("прошлый ответ"), dialog_id=7)
+            reader = asyncio.create_task(service.get_history(dialog_id=7, bot_id=2, model_id=1, session=Mock()))
+            await asyncio.sleep(0)
+            assert not reader.done()
+
+            release.set()
+            history = await reader
+
+        assert [m["content"] for m in history] == ["прошлый ответ"]
+        redis.replace_list.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_writes_of_one_dialog_are_ordered(self):
+        """Записи одного диалога идут в порядке ходов"""
+        service, _ = make_service()
+        order = []
+
+        async def save_messages(session, dialog_id, messages):
+            await asyncio.sleep(0.01 if messages[0].text == "1" else 0)
+            order.append(messages[0].text)
+            return [None]
+
+        with patch(f"{REPO}.save_messages", side_effect=save_messages):
+            service.save_messages_background(turn("1"), dialog_id=7)
+            service.save_messages_background(turn("2"), dialog_id=7)
+            await service.wait_background()
+
+        assert order == ["1", "2"]
+
+    @pytest.mark.asyncio
+    async def test_write_during_miss_load_does_not_cache_stale_list(self):
+        """Запись, закоммиченная во время загрузки из БД, не оставляет в кэше список без неё"""
+        service, redis = make_service()
+
+        async def load_history(session, dialog_id, limit):
+            # пока читаем, другой путь сохраняет сообщение; ключа в кэше нет — дописать некуда
+            await service.save_messages(turn("новое"), dialog_id=dialog_id, session=AsyncMock())
+            return []
+
+        with patch(f"{REPO}.save_messages", AsyncMock(return_value=[None])), \
+                patch(f"{REPO}.load_history", side_effect=load_history):
+            await service.get_history(dialog_id=7, bot_id=2, model_id=1, session=Mock())
+
+        redis.push_if_exists.assert_awaited_once()
+        redis.replace_list.assert_not_awaited()
+
+
+class TestHistoryImageUploads:
+    """Ссылка на картинку попадает в историю только после успешной загрузки в S3"""
+
+    @staticmethod
+    def image_turn(upload: asyncio.Task) -> list[MessageDTO]:
+        return [MessageDTO(text="data:image/jpeg;base64,AAAA", author_id=1,
+                           message_type=MessageType.IMAGE_URL, history_upload=upload),
+                MessageDTO(text="что на фото?", author_id=1, message_type=MessageType.TEXT)]
+
+    @pytest.mark.asyncio
+    async def test_link_is_saved_after_upload(self):
+        """Запись хода ждёт загрузку и сохраняет её ссылку вместо data: URL"""
+        service, _ = make_service()
+        release = asyncio.Event()
+
+        async def upload():
+            await release.wait()
+            return "https://cdn/uploads/a.jpg"
+
+        saved = []
+
+        async def save_messages(session, dialog_id, messages):
+            saved.extend(messages)
+            return [None] * len(messages)
+
+        with patch(f"{REPO}.save_messages", side_effect=save_messages):
+            service.save_messages_background(self.image_turn(asyncio.create_task(upload())), dialog_id=7)
+            await asyncio.sleep(0.01)
+            assert saved == []
+
+            release.set()
+            await service.wait_background()
+
+        assert [m.text for m in saved] == ["https://cdn/uploads/a.jpg", "что на фото?"]
+
+    @pytest.mark.asyncio
+    async def test_failed_upload_is_not_saved(self):
+        """Картинка, которую не удалось загрузить, в историю не попадает"""
+        service, _ = make_service()
+
+        async def upload():
+            return None
+
+        saved = []
+
+        async def save_messages(session, dialog_id, messages):
+            saved.extend(messages)
+            return [None] * len(messages)
+
+        with patch(f"{REPO}.save_messages", side_effect=save_messages):
+            service.save_messages_background(self.image_turn(asyncio.create_task(upload())), dialog_id=7)
+            await service.wait_background()
+
+        assert [m.text for m in saved] == ["что на фото?"]
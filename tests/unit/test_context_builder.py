@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import Mock, patch
+from src.services.ai.context_builder import ContextBuilder, MESSAGE_OVERHEAD_TOKENS
+from src.services.ai.data_classes import ModelConfig
+
+
+def make_config(budget=None):
+    return ModelConfig(id=2, name="GPT", api_name="gpt-4o-mini", api_provider="openai", api_link="",
+                       context_token_budget=budget)
+
+
+def text(role, content):
+    return {"role": role, "content": content}
+
+
+def image(url):
+    return {"role": "user", "content": [{"type": "image_url", "image_url": {"url": url}}]}
+
+
+@patch('src.services.ai.context_builder.tiktoken', None)
+class TestContextBuilder:
+    """Тесты сборки окна контекста под токен-бюджет"""
+
+    def test_keeps_newest_history_within_budget(self):
+        """Берутся самые новые сообщения истории, старые отрезаются и учитываются в trimmed"""
+        builder = ContextBuilder()
+        history = [text("user", "a" * 300), text("assistant", "b" * 30), text("user", "c" * 30)]
+        new = [text("user", "d" * 30)]
+        per_short = MESSAGE_OVERHEAD_TOKENS + 11
+
+        window = builder.build(history, new, make_config(budget=per_short * 3))
+
+        assert window.messages == history[1:] + new
+        assert window.input_tokens == per_short * 3
+        assert window.trimmed_messages == 1
+        assert window.trimmed_tokens == MESSAGE_OVERHEAD_TOKENS + 101
+
+    def test_new_messages_always_included(self):
+        """Текущий запрос отправляется, даже если сам по себе превышает бюджет"""
+        builder = ContextBuilder()
+        new = [text("user", "x" * 1000)]
+
+        window = builder.build([text("user", "old")], new, make_config(budget=10))
+
+        assert window.messages == new
+        assert window.trimmed_messages == 1
+
+    def test_image_parts_are_capped(self):
+        """В окно попадает не больше двух картинок, самые новые"""
+        builder = ContextBuilder()
+        history = [image("1"), image("2"), image("3")]
+
+        window = builder.build(history, [text("user", "что на фото?")], make_config())
+
+        assert window.messages[:2] == [image("2"), image("3")]
+        assert window.trimmed_messages == 1
+
+
+class TestTokenizerLoading:
+    """Тесты загрузки словаря токенайзера вне пути запроса"""
+
+    def test_count_does_not_load_encoding(self):
+        """Без warm_up подсчёт не качает словарь, а считает по символам"""
+        with patch('src.services.ai.context_builder.tiktoken') as tiktoken:
+            tiktoken.encoding_name_for_model.return_value = "o200k_base"
+            assert ContextBuilder().count_text_tokens("a" * 30, "gpt-4o") == 11
+            tiktoken.get_encoding.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_loads_and_survives_failure(self):
+        """warm_up грузит словари в фоне; неудачная загрузка не ломает подсчёт"""
+        encoder = Mock()
+        encoder.encode.return_value = [1, 2]
+
+        def get_encoding(name):
+            if name == "cl100k_base":
+                raise OSError("no network")
+            return encoder
+
+        with patch('src.services.ai.context_builder.tiktoken') as tiktoken:
+            tiktoken.get_encoding.side_effect = get_encoding
+            tiktoken.encoding_name_for_model.side_effect = lambda api: "o200k_base" if api == "gpt-4o" else "cl100k_base"
+            builder = ContextBuilder()
+            await builder.warm_up(timeout=5)
+
+            assert builder.count_text_tokens("текст", "gpt-4o") == 2
+            assert builder.count_text_tokens("a" * 30, "gpt-4") == 11
@@ -0,0 +1,57 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from src.services.converter import SimpleFileToPDF, DocumentConverter, ConversionLimitError
+
+
+class TestConversionLimits:
+    """Тесты лимитов конвертации документов"""
+
+    def test_page_limit_stops_runaway_document(self):
+        """Документ длиннее max_pages обрывается ошибкой, а не вёрстается до конца"""
+        text = ("строка\n" * 5000).encode()
+        with pytest.raises(ConversionLimitError):
+            SimpleFileToPDF(max_pages=3).convert(text, filename="big.txt")
+
+    def test_small_document_converts(self):
+        """Документ в пределах лимита конвертируется в PDF"""
+        pdf = SimpleFileToPDF(max_pages=3).convert(b"hello", filename="small.txt")
+        assert pdf.startswith(b"%PDF")
+
+    @pytest.mark.asyncio
+    async def test_input_size_checked_before_worker(self):
+        """Слишком большой вход отклоняется до отправки в пул процессов"""
+        converter = DocumentConverter(max_input_bytes=10)
+        with pytest.raises(ConversionLimitError):
+            await converter.convert(b"x" * 11, filename="a.txt")
+        assert converter.executor.metrics()["completed"] == 0
+
+
+class TestStreamingSpreadsheets:
+    """Тесты потоковой вёрстки таблиц"""
+
+    def test_row_budget_truncates_with_note(self, tmp_path):
+        """Строки сверх max_rows не рисуются, но досчитываются для пометки"""
+        rows = "a,b\n" + "".join(f"{i},{i * 2}\n" for i in range(500))
+        converter = SimpleFileToPDF(max_rows=100)
+        drawn = []
+        converter._make_table = lambda data, max_width=None: drawn.append(data) or SimpleFileToPDF._make_table(converter, data, max_width)
+
+        pdf = converter.convert(rows.encode(), filename="data.csv")
+
+        assert pdf.startswith(b"%PDF")
+        assert sum(len(table) - 1 for table in drawn) == 100
+        assert all(table[0] == ["a", "b"] for table in drawn)
+
+    @pytest.mark.asyncio
+    async def test_text_budget_follows_model(self):
+        """Текст документа считается словарём выбранной модели и не занимает больше доли её бюджета"""
+        converter = DocumentConverter(text_max_tokens=6000)
+        converter.executor.run = AsyncMock()
+
+        await converter.extract_text(b"text", api_name="gpt-4.1-mini", context_token_budget=4000, filename="a.txt")
+        await converter.extract_text(b"text", api_name="o3", filename="a.txt")
+
+        first, second = converter.executor.run.await_args_list
+        assert first.args[-2:] == (2000, "gpt-4.1-mini")
+        assert second.args[-2:] == (6000, "o3")
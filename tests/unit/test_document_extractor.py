@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+from src.services.document_extractor import DocumentTextExtractor, TRUNCATED_NOTE
+
+
+@patch("src.services.ai.context_builder.tiktoken", None)
+class TestDocumentTextExtractor:
+    """Тесты извлечения текста документов вместо PDF"""
+
+    def test_csv_becomes_markdown_table(self):
+        """CSV отдаётся markdown-таблицей с заголовком и экранированными разделителями"""
+        extracted = DocumentTextExtractor(max_tokens=1000).extract(b"name,note\nBob,a|b\n", filename="t.csv")
+
+        assert extracted.text == "Файл t.csv:\n\n| name | note |\n| --- | --- |\n| Bob | a\\|b |"
+        assert not extracted.truncated
+
+    def test_text_is_cut_to_token_budget(self):
+        """Длинный документ обрезается по бюджету токенов с пометкой"""
+        text = "".join(f"строка номер {i}\n" for i in range(10000)).encode()
+        extracted = DocumentTextExtractor(max_tokens=200).extract(text, filename="long.txt")
+
+        assert extracted.truncated
+        assert extracted.tokens <= 200
+        assert extracted.text.endswith(TRUNCATED_NOTE)
+        assert extracted.text.startswith("Файл long.txt:\n\nстрока номер 0\n")
+
+    def test_pdf_is_not_text_native(self):
+        """PDF по-прежнему идёт файлом"""
+        assert DocumentTextExtractor.supports("a.docx", None)
+        assert not DocumentTextExtractor.supports("a.pdf", "application/pdf")
+
+    def test_long_paragraph_is_cut_inside(self):
+        """Один абзац длиннее бюджета режется внутри, а не выбрасывается целиком"""
+        text = ("слово " * 5000).encode()
+        extracted = DocumentTextExtractor(max_tokens=200).extract(text, filename="one.txt")
+
+        assert extracted.truncated
+        assert extracted.tokens <= 200
+        body = extracted.text[len("Файл one.txt:\n\n"):-len(TRUNCATED_NOTE)]
+        assert len(body) > 300
+        assert body.startswith("слово слово")
@@ -0,0 +1,76 @@
+import re
+
+from src.services.html_sanitizer import (TelegramHTMLSanitizer, sanitize_to_telegram_html,
+                                         split_telegram_html, utf16_len)
+
+
+def open_tags(chunk: str) -> list[str]:
+    stack = []
+    for closing, name in re.findall(r"<(/?)(\w+)[^>]*>", chunk):
+        if closing:
+            assert stack.pop() == name
+        else:
+            stack.append(name)
+    return stack
+
+
+class TestIncrementalSanitizer:
+    """Тесты санитайзера, который кормят дельтами"""
+
+    def test_deltas_give_same_result_as_whole_text(self):
+        """Результат по дельтам совпадает с разбором всего текста, включая схлопывание пустых строк"""
+        text = "\n<p>Абзац</p>\n\n\n<b>жир & <a href=\"https://x.y\">ссылка</a></b>\n\n\n\n<pre>код</pre>  "
+        sanitizer = TelegramHTMLSanitizer()
+        for i in range(0, len(text), 3):
+            sanitizer.feed(text[i:i + 3])
+        sanitizer.close()
+
+        assert sanitizer.get_sanitized() == sanitize_to_telegram_html(text)
+
+    def test_snapshot_has_stable_prefix_and_provisional_tail(self):
+        """Открытые теги закрываются во временном хвосте, недописанный тег ждёт следующей дельты"""
+        sanitizer = TelegramHTMLSanitizer()
+        sanitizer.feed("<b>жирный <i>курсив</i> <a hr")
+
+        snapshot = sanitizer.snapshot()
+        assert snapshot.stable == "<b>жирный <i>курсив</i>"
+        assert snapshot.tail == " </b>"
+
+        sanitizer.feed('ef="https://x.y">ссылка')
+        assert sanitizer.snapshot().stable.startswith(snapshot.stable)
+        assert sanitizer.snapshot().text == '<b>жирный <i>курсив</i> <a href="https://x.y">ссылка</a></b>'
+
+
+class TestSplitTelegramHtml:
+    """Тесты деления длинного HTML на сообщения Telegram"""
+
+    def test_prefers_paragraph_boundary(self):
+        """Режем по абзацу, а не посреди предложения"""
+        html = "Первый абзац. Ещё предложение.\n\nВторой абзац тут"
+        assert split_telegram_html(html, limit=40) == ["Первый абзац. Ещё предложение.\n\n", "Второй абзац тут"]
+
+    def test_reopens_tags_across_chunks(self):
+        """Тег, открытый на разрезе, закрывается и открывается заново с теми же атрибутами"""
+        html = '<a href="https://example.com"><b>' + "слово " * 30 + "</b></a>"
+        chunks = split_telegram_html(html, limit=80)
+
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk.startswith('<a href="https://example.com"><b>')
+            assert chunk.endswith("</b></a>")
+            assert open_tags(chunk) == []
+            assert utf16_len(chunk) <= 80
+
+    def test_counts_utf16_units(self):
+        """Эмодзи занимают две единицы UTF-16, и лимит считается в них"""
+        chunks = split_telegram_html("😀 " * 100, limit=50)
+        assert all(utf16_len(chunk) <= 50 for chunk in chunks)
+        assert max(len(chunk) for chunk in chunks) < 50
+
+    def test_does_not_cut_entities(self):
+        """Сущность (&amp;) не разрезается"""
+        chunks = split_telegram_html("a&amp;" * 20, limit=13)
+        assert all(utf16_len(chunk) <= 13 for chunk in chunks)
+        assert "".join(chunks) == "a&amp;" * 20
+        assert all(re.fullmatch(r"(a|&amp;)+", chunk) for chunk in chunks)
+
@@ -0,0 +1,32 @@
+from io import BytesIO
+
+from PIL import Image
+
+from src.services.image_service import prepare_image
+
+
+def make_image(width: int, height: int, fmt: str = "PNG") -> bytes:
+    buf = BytesIO()
+    Image.new("RGB", (width, height), color=(200, 100, 50)).save(buf, format=fmt)
+    return buf.getvalue()
+
+
+class TestPrepareImage:
+    """Тесты подготовки фото к отправке провайдеру"""
+
+    def test_large_image_is_resized_to_pixel_budget(self):
+        """Картинка больше бюджета уменьшается с сохранением пропорций и пережимается в JPEG"""
+        image = prepare_image(make_image(4000, 3000), max_pixels=1200 * 900)
+
+        assert image.resized
+        assert image.width * image.height <= 1200 * 900
+        assert abs(image.width / image.height - 4 / 3) < 0.01
+        assert image.data_url().startswith("data:image/jpeg;base64,")
+
+    def test_small_jpeg_is_passed_through(self):
+        """Маленький JPEG отдаётся как есть"""
+        data = make_image(640, 480, fmt="JPEG")
+        image = prepare_image(data, max_pixels=1200 * 900)
+
+        assert not image.resized
+        assert image.data == data
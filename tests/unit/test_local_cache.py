@@ -0,0 +1,47 @@
+from src.adapters.cache.local_cache import LocalTTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLocalTTLCache:
+    """Тесты in-process кэша моделей"""
+
+    def test_ttl_expiry(self):
+        """Значение живёт ровно ttl секунд"""
+        clock = FakeClock()
+        cache = LocalTTLCache(maxsize=10, ttl=5, clock=clock)
+        cache.set("model:1:config", {"id": 1})
+
+        clock.now = 4.9
+        assert cache.get("model:1:config") == {"id": 1}
+
+        clock.now = 5.0
+        assert cache.get("model:1:config") is None
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняется давно не использованный ключ"""
+        cache = LocalTTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_clear(self):
+        """clear() сбрасывает всё — так работает инвалидация по pub/sub"""
+        cache = LocalTTLCache()
+        cache.set("models:all", [[1, "Авто"]])
+        cache.clear()
+        assert cache.get("models:all") is None
+        assert len(cache) == 0
@@ -0,0 +1,22 @@
+from app.db.migrate import load_statements
+
+
+class TestMigrations:
+    """Тесты DDL для развёрнутых баз"""
+
+    def test_statements_are_idempotent(self):
+        """Каждый оператор можно выполнять на каждом старте: только IF NOT EXISTS"""
+        statements = load_statements()
+        assert statements
+        for name, statement in statements:
+            assert "--" not in statement, name
+            assert "IF NOT EXISTS" in statement.upper(), name
+
+    def test_split_and_comments(self, tmp_path):
+        """Комментарии убираются, операторы делятся по `;`, файлы идут по порядку имён"""
+        (tmp_path / "002_b.sql").write_text("-- второй\nALTER TABLE t ADD COLUMN IF NOT EXISTS b int;\n")
+        (tmp_path / "001_a.sql").write_text("CREATE INDEX IF NOT EXISTS a ON t (a);\n"
+                                            "CREATE INDEX IF NOT EXISTS c ON t (c);")
+
+        assert [name for name, _ in load_statements(tmp_path)] == ["001_a.sql", "001_a.sql", "002_b.sql"]
+        assert load_statements(tmp_path)[2][1] == "ALTER TABLE t ADD COLUMN IF NOT EXISTS b int"
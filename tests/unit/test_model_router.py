@@ -0,0 +1,35 @@
+import json
+from src.services.ai.model_router import KeywordRouter, HashedLinearRouter, CascadeRouter
+from scripts.train_router import train
+
+ALLOWED = [2, 3, 4, 5, 6, 8]
+
+
+class TestModelRouter:
+    """Тесты локального выбора авто-модели"""
+
+    def test_keyword_router_picks_coding_model(self):
+        """Запрос с кодом уходит в модель для кодинга с высокой уверенностью"""
+        decision = KeywordRouter().route("Почему падает python скрипт: Traceback ...", ALLOWED)
+        assert decision.model_id == 3
+        assert decision.confidence >= 0.7
+
+    def test_keyword_router_respects_allowed_models(self):
+        """Недоступная по тарифу модель не выбирается"""
+        decision = KeywordRouter().route("напиши функцию на python", [2, 5])
+        assert decision.model_id is None
+
+    def test_linear_router_roundtrip(self, tmp_path):
+        """Веса после обучения сохраняются в JSON и дают те же ответы"""
+        samples = [("напиши функцию сортировки", 3), ("что приготовить на ужин", 2)] * 20
+        path = tmp_path / "weights.json"
+        path.write_text(json.dumps(train(samples, epochs=3, lr=0.5, l2=0.0)))
+
+        router = HashedLinearRouter.load(str(path))
+        assert router.route("функцию сортировки", ALLOWED).model_id == 3
+        assert router.route("ужин", ALLOWED).model_id == 2
+
+    def test_cascade_defers_low_confidence(self):
+        """Без уверенного решения каскад отдаёт выбор LLM-классификатору"""
+        cascade = CascadeRouter(routers=[KeywordRouter()], threshold=0.99)
+        assert cascade.route("напиши функцию на python", ALLOWED).model_id is None
@@ -0,0 +1,51 @@
+import operator
+import time
+
+import pytest
+
+from src.services.process_executor import (
+    ProcessExecutor,
+    ProcessExecutorBusyError,
+    ProcessExecutorTimeoutError,
+)
+
+
+class TestProcessExecutor:
+    """Тесты пула процессов для CPU-тяжёлых задач"""
+
+    @pytest.mark.asyncio
+    async def test_returns_result_and_reraises_errors(self):
+        """Результат и исключения задачи доходят до вызывающего"""
+        executor = ProcessExecutor(name="test", workers=1, start_method="fork")
+        try:
+            assert await executor.run(operator.add, 2, 3) == 5
+            with pytest.raises(ValueError):
+                await executor.run(int, "not a number")
+            assert executor.metrics()["completed"] == 1
+            assert executor.metrics()["failed"] == 1
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_worker_and_pool_recovers(self):
+        """Зависшая задача убивается по таймауту, следующая выполняется на новом процессе"""
+        executor = ProcessExecutor(name="test", workers=1, start_method="fork")
+        try:
+            with pytest.raises(ProcessExecutorTimeoutError):
+                await executor.run(time.sleep, 10, timeout=0.2)
+            assert await executor.run(operator.mul, 6, 7) == 42
+            assert executor.metrics()["timeouts"] == 1
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        """Все воркеры заняты и очередь полна — быстрый отказ"""
+        executor = ProcessExecutor(name="test", workers=1, max_queue=0, start_method="fork")
+        executor.start()
+        executor._idle.get_nowait()
+        try:
+            with pytest.raises(ProcessExecutorBusyError):
+                await executor.run(operator.add, 1, 1)
+        finally:
+            executor.shutdown()
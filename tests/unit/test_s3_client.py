@@ -0,0 +1,124 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from src.adapters.s3.s3_client import S3Client
+
+
+def make_client(redis=None) -> tuple[S3Client, Mock]:
+    s3 = S3Client(access_key="a", secret_key="s", endpoint_url="http://s3", region_name="ru",
+                  bucket_name="bucket", domain_name="https://cdn", redis=redis)
+    client = Mock()
+    client.put_object = AsyncMock()
+    s3._client = client
+    return s3, client
+
+
+class TestS3ContentUpload:
+    """Тесты загрузки по контентному ключу"""
+
+    @pytest.mark.asyncio
+    async def test_same_content_same_key(self):
+        """Одинаковое содержимое — один ключ, PUT условный"""
+        s3, client = make_client()
+        first = await s3.upload_content(b"photo", ext=".jpg")
+        second = await s3.upload_content(b"photo", ext=".jpg")
+
+        assert first == second == f"https://cdn/{S3Client.content_key(b'photo', '.jpg')}"
+        assert client.put_object.await_args.kwargs["IfNoneMatch"] == "*"
+
+    @pytest.mark.asyncio
+    async def test_known_object_skips_put(self):
+        """Объект, известный по Redis, не загружается повторно"""
+        redis = Mock()
+        redis.exists = AsyncMock(return_value=True)
+        s3, client = make_client(redis)
+
+        await s3.upload_content(b"photo", ext=".jpg")
+
+        client.put_object.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_precondition_failed_means_uploaded(self):
+        """412 на условном PUT — объект уже есть, возвращаем ссылку и кэшируем"""
+        redis = Mock()
+        redis.exists = AsyncMock(return_value=False)
+        redis.set = AsyncMock()
+        s3, client = make_client(redis)
+        client.put_object.side_effect = ClientError({"Error": {"Code": "PreconditionFailed"}}, "PutObject")
+
+        link = await s3.upload_content(b"doc", ext=".pdf")
+
+        assert link.endswith(".pdf")
+        redis.set.assert_awaited_once()
+
+
+async def chunks_of(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestS3StreamUpload:
+    """Тесты потоковой загрузки"""
+
+    @pytest.mark.asyncio
+    async def test_small_stream_is_single_put(self):
+        """Поток меньше части — обычный PUT без multipart"""
+        s3, client = make_client()
+        client.create_multipart_upload = AsyncMock()
+
+        link = await s3.upload_stream(chunks_of(b"ab", b"cd"), "docs/a.bin", part_size=10)
+
+        assert link == "https://cdn/docs/a.bin"
+        client.create_multipart_upload.assert_not_awaited()
+        assert bytes(client.put_object.await_args.kwargs["Body"]) == b"abcd"
+
+    @pytest.mark.asyncio
+    async def test_large_stream_uploads_parts(self):
+        """Поток больше части — multipart: полные части по part_size и хвост"""
+        s3, client = make_client()
+        client.create_multipart_upload = AsyncMock(return_value={"UploadId": "u1"})
+        client.upload_part = AsyncMock(side_effect=lambda **kw: {"ETag": f"e{kw['PartNumber']}"})
+        client.complete_multipart_upload = AsyncMock()
+
+        await s3.upload_stream(chunks_of(b"abcdef", b"ghijk"), "docs/b.bin", part_size=4)
+
+        bodies = [bytes(call.kwargs["Body"]) for call in client.upload_part.await_args_list]
+        assert bodies == [b"abcd", b"efgh", b"ijk"]
+        parts = client.complete_multipart_upload.await_args.kwargs["MultipartUpload"]["Parts"]
+        assert parts == [{"PartNumber": i, "ETag": f"e{i}"} for i in (1, 2, 3)]
+        client.put_object.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_failed_part_aborts_upload(self):
+        """Ошибка при загрузке части — multipart отменяется"""
+        s3, client = make_client()
+        client.create_multipart_upload = AsyncMock(return_value={"UploadId": "u1"})
+        client.upload_part = AsyncMock(side_effect=ClientError({"Error": {"Code": "500"}}, "UploadPart"))
+        client.abort_multipart_upload = AsyncMock()
+
+        assert await s3.upload_stream(chunks_of(b"abcdefgh"), "docs/c.bin", part_size=4) is None
+        client.abort_multipart_upload.assert_awaited_once_with(Bucket="bucket", Key="docs/c.bin", UploadId="u1")
+
+    @pytest.mark.asyncio
+    async def test_cancelled_upload_aborts_multipart(self):
+        """Отмена задачи посреди multipart — части тоже отменяются"""
+        s3, client = make_client()
+        started = asyncio.Event()
+
+        async def slow_part(**kwargs):
+            started.set()
+            await asyncio.sleep(10)
+
+        client.create_multipart_upload = AsyncMock(return_value={"UploadId": "u1"})
+        client.upload_part = AsyncMock(side_effect=slow_part)
+        client.abort_multipart_upload = AsyncMock()
+
+        task = asyncio.create_task(s3.upload_stream(chunks_of(b"abcdefgh"), "docs/d.bin", part_size=4))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        client.abort_multipart_upload.assert_awaited_once_with(Bucket="bucket", Key="docs/d.bin", UploadId="u1")
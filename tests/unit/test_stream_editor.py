@@ -0,0 +1,128 @@
+import pytest
+from unittest.mock import Mock, AsyncMock
+from src.use_cases.process_message.stream_editor import StreamingMessageEditor, STREAM_CURSOR
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_message():
+    message = Mock()
+    message.edit_text = AsyncMock()
+    message.answer = AsyncMock(side_effect=lambda text: make_message())
+    return message
+
+
+class TestStreamingMessageEditor:
+    """Тесты прогрессивного редактирования сообщения при стриминге ответа"""
+
+    @pytest.mark.asyncio
+    async def test_edits_are_throttled(self):
+        """Правки не чаще интервала, финальная правка без курсора"""
+        clock = FakeClock()
+        message = make_message()
+        editor = StreamingMessageEditor(message, min_interval=1.0, min_chars=1, clock=clock)
+
+        clock.now = 0.5
+        await editor.push("При")
+        await editor.push("вет")
+        assert message.edit_text.await_count == 0
+
+        clock.now = 1.5
+        await editor.push(", мир")
+        message.edit_text.assert_awaited_with("Привет, мир" + STREAM_CURSOR, parse_mode='html')
+
+        await editor.finish()
+        message.edit_text.assert_awaited_with("Привет, мир", parse_mode='html')
+        assert editor.time_to_first_token == 0.5
+
+    @pytest.mark.asyncio
+    async def test_incomplete_tag_is_hidden(self):
+        """Недописанный тег в хвосте не попадает в правку, незакрытые теги закрываются"""
+        clock = FakeClock()
+        message = make_message()
+        editor = StreamingMessageEditor(message, min_interval=0, min_chars=1, clock=clock)
+
+        await editor.push("<b>жирный</b> <i>курсив <a hr")
+        message.edit_text.assert_awaited_with("<b>жирный</b> <i>курсив </i>" + STREAM_CURSOR, parse_mode='html')
+
+    @pytest.mark.asyncio
+    async def test_rollover_to_new_message(self):
+        """Текст длиннее лимита продолжается в новом сообщении, разрывы абзацев на переносе не теряются"""
+        clock = FakeClock()
+        message = make_message()
+        editor = StreamingMessageEditor(message, min_interval=0, min_chars=1, limit=50, clock=clock)
+
+        for i in range(1, 9):
+            for word in ["Sentence ", f"{i} ", "is ", "here.\n\n"]:
+                await editor.push(word)
+        await editor.finish()
+
+        assert len(editor.messages) > 1
+        for sent in editor.messages:
+            for call in sent.edit_text.await_args_list:
+                assert len(call.args[0]) <= 50
+        rendered = [sent.edit_text.await_args.args[0] for sent in editor.messages]
+        assert rendered == [f"Sentence {i} is here.\n\nSentence {i + 1} is here.\n\n" for i in (1, 3, 5)] + \
+               ["Sentence 7 is here.\n\nSentence 8 is here."]
+
+    @pytest.mark.asyncio
+    async def test_rollover_keeps_open_tags(self):
+        """Открытый на переносе тег закрывается в старом сообщении и продолжается в новом"""
+        clock = FakeClock()
+        message = make_message()
+        editor = StreamingMessageEditor(message, min_interval=0, min_chars=1, limit=60, clock=clock)
+
+        await editor.push("<pre>")
+        for i in range(12):
+            await editor.push(f"line {i}\n")
+        await editor.push("</pre> конец")
+        await editor.finish()
+
+        assert len(editor.messages) > 1
+        for sent in editor.messages:
+            last = sent.edit_text.await_args.args[0]
+            assert last.startswith("<pre>") and last.count("<pre>") == last.count("</pre>") == 1
+        assert editor.messages[-1].edit_text.await_args.args[0].endswith("</pre> конец")
+
+    @pytest.mark.asyncio
+    async def test_final_edit_waits_for_flood_control(self):
+        """Финальная правка при флуд-контроле повторяется после retry_after, а не теряется"""
+        from aiogram.exceptions import TelegramRetryAfter
+
+        clock = FakeClock()
+        message = make_message()
+        editor = StreamingMessageEditor(message, min_interval=0, min_chars=1, clock=clock)
+        await editor.push("Ответ")
+
+        retry = TelegramRetryAfter(method=Mock(), message="flood", retry_after=0)
+        message.edit_text.side_effect = [retry, None]
+        await editor.push(" целиком")
+        assert message.edit_text.await_count == 2   # промежуточная правка пропущена
+
+        message.edit_text.side_effect = [retry, None]
+        await editor.finish()
+        message.edit_text.assert_awaited_with("Ответ целиком", parse_mode='html')
+        assert message.edit_text.await_count == 4
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("deltas, expected", [
+        (["Компания AT", "&", "T"], "Компания AT&amp;T"),
+        (["<b>x ", "<"], "<b>x &lt;</b>"),
+        (["см. ", "&amp"], "см. &amp;amp"),
+    ])
+    async def test_finish_keeps_unparsed_tail(self, deltas, expected):
+        """Хвост, который HTMLParser не успел разобрать (голые & и <), попадает в финальную правку текстом"""
+        message = make_message()
+        editor = StreamingMessageEditor(message, min_interval=0, min_chars=1, clock=FakeClock())
+
+        for delta in deltas:
+            await editor.push(delta)
+        await editor.finish()
+
+        message.edit_text.assert_awaited_with(expected, parse_mode='html')
@@ -0,0 +1,71 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from app.db.models.user_ai_context import MessageType
+from src.services.ai.data_classes import MessageDTO
+from src.services.ai.summary_service import (DialogSummaryService, SUMMARY_FOLD_MAX_MESSAGES,
+                                             SUMMARY_FOLD_MAX_CHARS, SUMMARY_KEEP_RECENT)
+
+HISTORY = "src.services.ai.summary_service.ChatHistoryRepository"
+DIALOGS = "src.services.ai.summary_service.DialogRepository"
+
+
+def make_service() -> tuple[DialogSummaryService, Mock]:
+    config = SimpleNamespace(auto_model="auto", auto_model_token="token", auto_model_provider="http://llm")
+    service = DialogSummaryService(config=config, redis=Mock(), session_factory=Mock())
+    completion = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="сводка"))])
+    service.client = Mock()
+    service.client.chat.completions.create = AsyncMock(return_value=completion)
+    return service, service.client.chat.completions.create
+
+
+def messages(count: int, text: str = "сообщение") -> list[MessageDTO]:
+    return [MessageDTO(text=text, author_id=1, message_type=MessageType.TEXT, public_id=uuid.uuid4())
+            for _ in range(count)]
+
+
+class TestDialogSummaryCatchUp:
+    """Свёртка длинного диалога идёт порциями, а не одним огромным запросом"""
+
+    @pytest.mark.asyncio
+    async def test_fold_is_capped_by_messages(self):
+        """Несвёрнутых больше лимита — сворачиваются самые старые, summary_until сдвигается до них"""
+        service, create = make_service()
+        pending = messages(500)
+        dialog = SimpleNamespace(user_id=1, summary=None, summary_until=None)
+
+        async def load_after(session, dialog_id, after, limit):
+            return pending[:limit]
+
+        with patch(f"{DIALOGS}.get", AsyncMock(return_value=dialog)), \
+                patch(f"{DIALOGS}.update_summary", AsyncMock()) as update_summary, \
+                patch(f"{HISTORY}.count_after", AsyncMock(return_value=len(pending))), \
+                patch(f"{HISTORY}.load_after", side_effect=load_after) as load:
+            await service._summarize(dialog_id=7, session=AsyncMock())
+
+        assert load.await_args.kwargs["limit"] == SUMMARY_FOLD_MAX_MESSAGES < len(pending) - SUMMARY_KEEP_RECENT
+        transcript = create.await_args.kwargs["messages"][1]["content"]
+        assert transcript.count("Пользователь:") == SUMMARY_FOLD_MAX_MESSAGES
+        assert update_summary.await_args.kwargs["summary_until"] == pending[SUMMARY_FOLD_MAX_MESSAGES - 1].public_id
+
+    @pytest.mark.asyncio
+    async def test_fold_is_capped_by_chars(self):
+        """Длинные сообщения ограничивают порцию по размеру стенограммы"""
+        service, create = make_service()
+        pending = messages(100, text="x" * 2000)
+        dialog = SimpleNamespace(user_id=1, summary=None, summary_until=None)
+
+        with patch(f"{DIALOGS}.get", AsyncMock(return_value=dialog)), \
+                patch(f"{DIALOGS}.update_summary", AsyncMock()) as update_summary, \
+                patch(f"{HISTORY}.count_after", AsyncMock(return_value=len(pending))), \
+                patch(f"{HISTORY}.load_after", AsyncMock(return_value=pending[:SUMMARY_FOLD_MAX_MESSAGES])):
+            await service._summarize(dialog_id=7, session=AsyncMock())
+
+        transcript = create.await_args.kwargs["messages"][1]["content"]
+        folded = transcript.count("Пользователь:")
+        assert 0 < folded < SUMMARY_FOLD_MAX_MESSAGES
+        assert len(transcript) < SUMMARY_FOLD_MAX_CHARS + 1000
+        assert update_summary.await_args.kwargs["summary_until"] == pending[folded - 1].public_id
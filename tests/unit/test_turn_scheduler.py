@@ -0,0 +1,65 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.use_cases.process_message.turn_scheduler import UserTurnScheduler, PendingTurn, COALESCED_NOTE
+
+
+@asynccontextmanager
+async def fake_session():
+    yield Mock()
+
+
+def make_turn(text: str, model_id=None) -> PendingTurn:
+    return PendingTurn(query_messages=[text], user_subtype=0, sended_message=AsyncMock(), bot_id=1, model_id=model_id)
+
+
+class TestUserTurnScheduler:
+    """Тесты почтового ящика пользователя"""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_messages_sent_during_generation(self):
+        """Сообщения, пришедшие во время генерации, уходят одним следующим ходом"""
+        release = asyncio.Event()
+        calls = []
+
+        async def run(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                await release.wait()
+
+        process_message = Mock()
+        process_message.run = AsyncMock(side_effect=run)
+        scheduler = UserTurnScheduler(process_message_usecase=process_message, session_factory=fake_session)
+
+        first, second, third = make_turn("a"), make_turn("b", model_id=5), make_turn("c")
+        assert scheduler.submit(user_id=1, turn=first)
+        await asyncio.sleep(0)
+        assert not scheduler.submit(user_id=1, turn=second)
+        assert not scheduler.submit(user_id=1, turn=third)
+
+        release.set()
+        await scheduler.wait()
+
+        assert len(calls) == 2
+        assert calls[1]["query_messages"] == ["b", "c"]
+        assert calls[1]["sended_message"] is third.sended_message
+        assert calls[1]["model_id"] == 5
+        second.sended_message.edit_text.assert_awaited_once_with(COALESCED_NOTE)
+        assert scheduler.coalesced == 1
+        assert not scheduler.is_busy(1)
+
+    @pytest.mark.asyncio
+    async def test_users_do_not_wait_for_each_other(self):
+        """Ходы разных пользователей выполняются независимо"""
+        process_message = Mock()
+        process_message.run = AsyncMock()
+        scheduler = UserTurnScheduler(process_message_usecase=process_message, session_factory=fake_session)
+
+        assert scheduler.submit(user_id=1, turn=make_turn("a"))
+        assert scheduler.submit(user_id=2, turn=make_turn("b"))
+        await scheduler.wait()
+
+        assert process_message.run.await_count == 2
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from app.workers.update_queue import UpdateQueue
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {"update_id": update_id, "message": {"from": {"id": user_id}, "text": str(update_id)}}
+
+
+class TestUpdateQueue:
+    """Тесты очереди апдейтов за вебхуком"""
+
+    @pytest.mark.asyncio
+    async def test_keeps_order_per_user_and_runs_users_in_parallel(self):
+        """Апдейты одного пользователя — по порядку, медленный пользователь не держит остальных"""
+        handled = []
+        release = asyncio.Event()
+
+        async def handler(update):
+            user_id = update["message"]["from"]["id"]
+            if update["update_id"] == 1:
+                await release.wait()
+            handled.append((user_id, update["update_id"]))
+
+        queue = UpdateQueue(handler=handler, workers=2, max_size=10)
+        await queue.start()
+        try:
+            for update_id, user_id in [(1, 100), (2, 100), (3, 200), (4, 100)]:
+                assert await queue.put(make_update(update_id, user_id))
+            await asyncio.sleep(0.05)
+            assert handled == [(200, 3)]
+
+            release.set()
+            await asyncio.sleep(0.05)
+            assert handled == [(200, 3), (100, 1), (100, 2), (100, 4)]
+        finally:
+            release.set()
+            await queue.stop(timeout=1)
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_full_and_skips_duplicates(self):
+        """Сверх max_size — отказ, повтор update_id не обрабатывается дважды"""
+        handler_calls = []
+
+        async def handler(update):
+            handler_calls.append(update["update_id"])
+
+        queue = UpdateQueue(handler=handler, workers=1, max_size=2)
+        assert await queue.put(make_update(1, 100))
+        assert await queue.put(make_update(1, 100))
+        assert await queue.put(make_update(2, 100))
+        assert not await queue.put(make_update(3, 100))
+
+        await queue.start()
+        await queue.stop(timeout=1)
+
+        assert handler_calls == [1, 2]
+        metrics = queue.metrics()
+        assert metrics["duplicates"] == 1
+        assert metrics["rejected"] == 1
+        assert metrics["processed"] == 2
+        assert metrics["depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_update_can_be_redelivered(self):
+        """Апдейт, на котором упал обработчик, не остаётся в дедупликации — повтор обрабатывается"""
+        handler_calls = []
+
+        async def handler(update):
+            handler_calls.append(update["update_id"])
+            if len(handler_calls) == 1:
+                raise RuntimeError("boom")
+
+        queue = UpdateQueue(handler=handler, workers=1, max_size=10)
+        await queue.start()
+        try:
+            assert await queue.put(make_update(1, 100))
+            await asyncio.sleep(0.05)
+            assert await queue.put(make_update(1, 100))
+            await asyncio.sleep(0.05)
+        finally:
+            await queue.stop(timeout=1)
+
+        assert handler_calls == [1, 1]
+        assert queue.metrics()["failed"] == 1
+        assert queue.metrics()["duplicates"] == 0
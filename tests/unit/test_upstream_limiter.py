@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from src.adapters.ai_providers.upstream import UpstreamLimiter, ProviderBusyError
+from src.adapters.ai_providers.registry import ProviderRegistry
+
+
+class TestUpstreamLimiter:
+    """Тесты ограничения одновременных запросов к апстриму"""
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        """Сверх лимита и очереди — быстрый отказ, метрики считают отказы"""
+        limiter = UpstreamLimiter(name="openai:", max_concurrency=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        first = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(hold())
+        await asyncio.sleep(0.01)
+
+        try:
+            assert limiter.in_flight == 1
+            assert limiter.waiting == 1
+
+            with pytest.raises(ProviderBusyError):
+                async with limiter.slot():
+                    pass
+        finally:
+            release.set()
+            await asyncio.gather(first, queued)
+        assert limiter.as_dict()["rejected"] == 1
+        assert limiter.as_dict()["completed"] == 2
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Слот не освободился за queue_timeout — отказ вместо бесконечного ожидания"""
+        limiter = UpstreamLimiter(name="perplexity:", max_concurrency=1, max_queue=10, queue_timeout=0.01)
+
+        async with limiter.slot():
+            with pytest.raises(ProviderBusyError):
+                async with limiter.slot():
+                    pass
+        assert limiter.waiting == 0
+
+    @pytest.mark.asyncio
+    async def test_resize_wakes_waiters(self):
+        """Увеличение лимита сразу пускает ожидающих в очереди"""
+        limiter = UpstreamLimiter(name="openai:", max_concurrency=1, max_queue=10, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        tasks = [asyncio.create_task(hold()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 1
+        assert limiter.waiting == 2
+
+        limiter.resize(3)
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 3
+        assert limiter.waiting == 0
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert limiter.in_flight == 0
+
+
+class TestProviderRegistryLimits:
+    """Лимит апстрима в реестре провайдеров"""
+
+    def test_limit_is_max_across_models(self):
+        """Лимит — наибольший среди моделей апстрима, независимо от порядка обращений"""
+        registry = ProviderRegistry(tokens={"openai": "test"}, default_concurrency=32)
+
+        limiter = registry.limiter("openai", None, max_concurrency=4)
+        assert limiter.max_concurrency == 4
+        assert registry.limiter("openai", None, max_concurrency=10) is limiter
+        assert limiter.max_concurrency == 10
+        registry.limiter("openai", None, max_concurrency=2)
+        registry.limiter("openai", None)
+        assert limiter.max_concurrency == 10
+
+        assert registry.limiter("openai", "https://proxy.example/v1").max_concurrency == 32
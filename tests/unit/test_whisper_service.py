@@ -0,0 +1,88 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.services.whisper_service import (
+    WhisperService,
+    WhisperModelSpec,
+    FAST_MODEL,
+    ACCURATE_MODEL,
+    group_speech,
+    _split_voice,
+)
+
+
+class TestWhisperModelSelection:
+    """Тесты выбора модели распознавания по тарифу и длительности"""
+
+    def setup_method(self):
+        self.service = WhisperService(models={FAST_MODEL: WhisperModelSpec("small"),
+                                              ACCURATE_MODEL: WhisperModelSpec("large-v3")},
+                                      short_clip_seconds=30)
+
+    def test_short_clip_goes_to_fast_model(self):
+        """Короткое голосовое подписчика распознаёт быстрая модель"""
+        assert self.service.select_model(tier_model=ACCURATE_MODEL, duration=20) == FAST_MODEL
+
+    def test_long_clip_uses_tier_model(self):
+        """Длинное голосовое — модель тарифа"""
+        assert self.service.select_model(tier_model=ACCURATE_MODEL, duration=120) == ACCURATE_MODEL
+        assert self.service.select_model(tier_model=FAST_MODEL, duration=120) == FAST_MODEL
+
+    def test_unknown_tier_model_falls_back(self):
+        """Модель тарифа не сконфигурирована — берётся первая доступная"""
+        service = WhisperService(models={ACCURATE_MODEL: WhisperModelSpec("large-v3")})
+        assert service.select_model(tier_model=FAST_MODEL, duration=10) == ACCURATE_MODEL
+
+
+class TestChunkedTranscription:
+    """Тесты нарезки длинных голосовых и потоковой выдачи частичного текста"""
+
+    def test_group_speech_cuts_only_in_pauses(self):
+        """Отрезки склеиваются до лимита, сплошная речь длиннее лимита режется"""
+        timestamps = [{"start": 0, "end": 40}, {"start": 50, "end": 90}, {"start": 120, "end": 150},
+                      {"start": 200, "end": 430}]
+        assert group_speech(timestamps, max_samples=100) == [(0, 90), (120, 150), (200, 300), (300, 400), (400, 430)]
+
+    @pytest.mark.asyncio
+    async def test_partials_follow_chunk_order(self):
+        """Частичный текст — только готовое начало, итог склеен по порядку кусков"""
+        service = WhisperService(models={FAST_MODEL: WhisperModelSpec("small")}, chunk_seconds=30)
+        executor = Mock(workers=3)
+
+        async def run(fn, *args, **kwargs):
+            if fn is _split_voice:
+                return ["a", "b", "c"]
+            return {"a": "раз", "b": "два", "c": "три"}[args[0]]
+
+        executor.run = AsyncMock(side_effect=run)
+        on_partial = AsyncMock()
+
+        text = await service._transcribe_chunked(executor, b"ogg", on_partial)
+
+        assert text == "раз два три"
+        for call in on_partial.await_args_list:
+            assert "раз два три".startswith(call.args[0])
+
+
+class TestTranscriptCache:
+    """Тесты кэша распознанного текста по file_unique_id"""
+
+    @pytest.mark.asyncio
+    async def test_cached_transcript_skips_download_and_workers(self):
+        """Повтор того же голосового берётся из Redis без скачивания и распознавания"""
+        redis = Mock()
+        redis.get = AsyncMock(return_value="привет")
+        service = WhisperService(models={FAST_MODEL: WhisperModelSpec("small")}, redis=redis)
+        message = Mock()
+        message.voice.duration = 5
+        message.voice.file_unique_id = "AgADxyz"
+        bot = Mock()
+        bot.get_file = AsyncMock()
+
+        text = await service.transcribe_voice(message, bot)
+
+        assert text == "привет"
+        redis.get.assert_awaited_once_with("voice:transcript:small:int8:AgADxyz")
+        bot.get_file.assert_not_awaited()
+        assert service.cache_stats.hits == 1